@@ -0,0 +1,151 @@
+"""
+Ansible inventory generated from a testbed.
+
+Every device with a reachable address becomes a host: its management
+interface (alias `initial`), else its SSH connection. Host vars come from
+the connections and credentials, hosts are grouped by type (`type_router`)
+and by os (`os_ios`), and network os groups carry the network_cli settings.
+
+Generated inventories are cached as YAML files named after the testbed
+content hash, so a playbook run on an unchanged testbed reuses the file.
+They hold the device passwords, so they are only readable by their owner.
+
+    python -m lib.ansible_api.inventory testbed.yaml
+"""
+import argparse
+import os
+import re
+from typing import Iterable, Optional
+
+import yaml
+
+from lib.testbed.loader import load, testbed_hash
+
+# bump when the generated layout changes, so cached inventories are rebuilt
+INVENTORY_VERSION = 1
+
+NETWORK_OS = {
+    'ios': 'cisco.ios.ios',
+    'iosxe': 'cisco.ios.ios',
+    'nxos': 'cisco.nxos.nxos',
+    'asa': 'cisco.asa.asa',
+}
+
+NETWORK_CLI_VARS = {
+    'ansible_connection': 'ansible.netcommon.network_cli',
+    'ansible_become': True,
+    'ansible_become_method': 'enable',
+    'ansible_ssh_common_args': '-o StrictHostKeyChecking=no',
+}
+
+
+def group_name(prefix: str, value: str) -> str:
+    """Ansible group names only allow letters, digits and underscores"""
+    return f"{prefix}_{re.sub(r'[^A-Za-z0-9_]', '_', value)}"
+
+
+def _address(device):
+    index = getattr(device.testbed, 'index', None)
+    intf = index.interface(device.name, 'initial') if index is not None else None
+    if intf is not None and intf.ipv4:
+        return intf.ipv4.ip.compressed, None
+    if 'ssh' in device.connections and device.connections.ssh.get('ip'):
+        ssh = device.connections.ssh
+        return str(ssh.ip), ssh.get('port')
+    return None, None
+
+
+def host_vars(device) -> Optional[dict]:
+    """Connection and credential vars of one device, None when it has no address"""
+    host, port = _address(device)
+    if host is None:
+        return None
+    hostvars = {'ansible_host': host}
+    if port and int(port) != 22:
+        hostvars['ansible_port'] = int(port)
+
+    credentials = device.credentials
+    if 'default' in credentials:
+        if credentials.default.username:
+            hostvars['ansible_user'] = str(credentials.default.username)
+        if credentials.default.password:
+            hostvars['ansible_password'] = str(credentials.default.password)
+    if 'enable' in credentials and credentials.enable.password:
+        hostvars['ansible_become_password'] = str(credentials.enable.password)
+
+    # the other access paths (consoles...) stay available to playbooks
+    others = {}
+    for name, conn in device.connections.items():
+        if name != 'ssh' and conn.ip:
+            others[name] = {'protocol': conn.protocol, 'ip': str(conn.ip), 'port': conn.port}
+    if others:
+        hostvars['testbed_connections'] = others
+    return hostvars
+
+
+def build_inventory(testbed, skip: Iterable[str] = ()) -> dict:
+    """Inventory dict in the YAML inventory layout"""
+    skip = set(skip)
+    hosts, children = {}, {}
+    for dev_name, device in testbed.devices.items():
+        if dev_name in skip:
+            continue
+        hostvars = host_vars(device)
+        if hostvars is None:
+            continue
+        hosts[dev_name] = hostvars
+        if device.type:
+            children.setdefault(group_name('type', device.type), {'hosts': {}})['hosts'][dev_name] = None
+        if device.os:
+            group = children.setdefault(group_name('os', device.os), {'hosts': {}})
+            group['hosts'][dev_name] = None
+            if device.os in NETWORK_OS:
+                group['vars'] = dict(NETWORK_CLI_VARS, ansible_network_os=NETWORK_OS[device.os])
+    return {'all': {'hosts': hosts, 'children': children}}
+
+
+def write_private(path: str, text: str):
+    """Write a file only its owner can read, it holds plaintext credentials"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    # O_CREAT's mode does not apply to a file that already existed
+    os.fchmod(fd, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(text)
+
+
+class InventoryCache:
+    """Generated inventory files keyed by testbed content hash"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.inventory-v{INVENTORY_VERSION}.yaml')
+
+    def path(self, testbed_path: str, testbed=None, content_hash: str = None) -> str:
+        """Inventory file of the testbed, generated on a miss.
+
+        Pass the already loaded testbed and its hash when the caller has
+        them; otherwise the testbed files are hashed and loaded here.
+        """
+        entry = self._entry(content_hash or testbed_hash(testbed_path))
+        if not os.path.exists(entry):
+            inventory = build_inventory(testbed if testbed is not None else load(testbed_path))
+            tmp_path = f'{entry}.{os.getpid()}.tmp'
+            write_private(tmp_path, yaml.safe_dump(inventory, sort_keys=False))
+            os.replace(tmp_path, entry)
+        return entry
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate an Ansible inventory from a testbed')
+    parser.add_argument('testbed')
+    parser.add_argument('-o', '--output', help='write here instead of printing')
+    args = parser.parse_args()
+
+    inventory = yaml.safe_dump(build_inventory(load(args.testbed)), sort_keys=False)
+    if args.output:
+        write_private(args.output, inventory)
+    else:
+        print(inventory)
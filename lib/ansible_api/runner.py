@@ -0,0 +1,133 @@
+"""
+Asyncio wrapper around ansible-runner.
+
+Playbooks run with `ansible_runner.run_async` on the runner's own thread.
+Every per-host task event is handed back to the event loop with
+`call_soon_threadsafe` as it happens, so callers can stream progress while
+other coroutines (telnet, REST) keep running.
+
+    def show(event):
+        print(event.host, event.task, event.status)
+
+    runner = PlaybookRunner('/tmp/ansible', on_event=show)
+    result = asyncio.run(runner.run('site.yaml', inventory))
+"""
+import asyncio
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Union
+
+import ansible_runner
+
+# runner event -> status reported for the host
+HOST_EVENTS = {
+    'runner_on_ok': 'ok',
+    'runner_on_failed': 'failed',
+    'runner_on_unreachable': 'unreachable',
+    'runner_on_skipped': 'skipped',
+    'runner_item_on_failed': 'failed',
+}
+
+
+@dataclass
+class TaskEvent:
+    host: str
+    task: str
+    status: str
+    message: str = ''
+
+
+@dataclass
+class PlaybookResult:
+    playbook: str
+    status: str
+    rc: Optional[int]
+    # host -> {'ok': n, 'changed': n, 'failures': n, 'unreachable': n, 'skipped': n}
+    hosts: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    events: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 'successful' and self.rc == 0
+
+    @property
+    def failed_hosts(self) -> List[str]:
+        return sorted(host for host, counts in self.hosts.items() if counts['failures'] or counts['unreachable'])
+
+
+def task_event(event: dict) -> Optional[TaskEvent]:
+    """Per-host task outcome of a runner event, None for every other event"""
+    status = HOST_EVENTS.get(event.get('event'))
+    if status is None:
+        return None
+    data = event.get('event_data') or {}
+    res = data.get('res') or {}
+    if status == 'ok' and res.get('changed'):
+        status = 'changed'
+    message = res.get('msg') or ''
+    if isinstance(message, list):
+        message = '; '.join(str(line) for line in message)
+    return TaskEvent(data.get('host', ''), data.get('task', ''), status, str(message)[:200])
+
+
+def host_counts(stats: Optional[dict]) -> Dict[str, Dict[str, int]]:
+    hosts: Dict[str, Dict[str, int]] = {}
+    for key in ('ok', 'changed', 'failures', 'dark', 'skipped'):
+        for host, count in ((stats or {}).get(key) or {}).items():
+            counts = hosts.setdefault(host, {'ok': 0, 'changed': 0, 'failures': 0, 'unreachable': 0, 'skipped': 0})
+            counts['unreachable' if key == 'dark' else key] = count
+    return hosts
+
+
+class PlaybookRunner:
+    """Runs playbooks without blocking the event loop, streaming task events to on_event"""
+
+    def __init__(self, private_data_dir: str, on_event: Callable[[TaskEvent], None] = None):
+        self.private_data_dir = private_data_dir
+        self.on_event = on_event
+
+    async def run(self, playbook: str, inventory: Union[str, dict], extravars: dict = None,
+                  limit: str = None, timeout: float = None) -> PlaybookResult:
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
+        seen = 0
+
+        def deliver(event: TaskEvent):
+            if self.on_event is not None:
+                try:
+                    self.on_event(event)
+                except Exception as e:
+                    print(f"[ANSIBLE EVENT ERROR] {e}")
+
+        def event_handler(event: dict) -> bool:
+            # runner thread: only hand the event over to the loop
+            nonlocal seen
+            seen += 1
+            summary = task_event(event)
+            if summary is not None:
+                loop.call_soon_threadsafe(deliver, summary)
+            return True
+
+        os.makedirs(self.private_data_dir, exist_ok=True)
+        thread, runner = ansible_runner.run_async(
+            private_data_dir=self.private_data_dir,
+            playbook=os.path.abspath(playbook),
+            inventory=inventory,
+            extravars=extravars,
+            limit=limit,
+            quiet=True,
+            event_handler=event_handler,
+            cancel_callback=cancelled.is_set,
+        )
+        finished = loop.run_in_executor(None, thread.join)
+        try:
+            await asyncio.wait_for(asyncio.shield(finished), timeout)
+        except asyncio.TimeoutError:
+            # the runner stops at its next cancel check and reports 'canceled'
+            cancelled.set()
+            await finished
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return PlaybookResult(os.path.basename(playbook), runner.status, runner.rc, host_counts(runner.stats), seen)
@@ -1,43 +1,262 @@
+import re
+import socket
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import paramiko
 
 HOST = '192.168.200.1'
 PORT = 22  # replace with yours
 
+
+class SshTransportPool:
+    """Keeps one authenticated paramiko transport per (host, port, username)."""
+
+    def __init__(self, keepalive: int = 30):
+        self.keepalive = keepalive
+        self._clients = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get_transport(self, host, port, username, password, timeout: float = 10.0) -> paramiko.Transport:
+        key = (host, port, username)
+        # Per-device lock: handshakes to different devices run in parallel,
+        # concurrent callers for the same device share a single handshake.
+        with self._key_lock(key):
+            client = self._clients.get(key)
+            if client is not None:
+                transport = client.get_transport()
+                if transport is not None and transport.is_active():
+                    return transport
+                client.close()
+
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(
+                hostname=host,
+                port=port,
+                username=username,
+                password=password,
+                timeout=timeout,
+                banner_timeout=timeout,
+                auth_timeout=timeout,
+                look_for_keys=False,
+                allow_agent=False,
+            )
+            transport = client.get_transport()
+            transport.set_keepalive(self.keepalive)
+            self._clients[key] = client
+            return transport
+
+    def close(self, host, port, username):
+        key = (host, port, username)
+        with self._key_lock(key):
+            client = self._clients.pop(key, None)
+            if client is not None:
+                client.close()
+
+    def close_all(self):
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+
+default_pool = SshTransportPool()
+
+
 class SshConnection:
-    def __init__(self, host, port, username, password):
+    # Any CLI prompt, e.g. "Router#", "Router>", "Router(config-if)#"
+    prompt_regex = re.compile(r'[\w.\-]+(\([\w.\-]+\))?[#>]\s*$')
+    # Privileged exec prompt only, i.e. back out of configuration mode
+    exec_prompt_regex = re.compile(r'(^|\n)[\w.\-]+#\s*$')
+
+    def __init__(self, host, port, username, password, pool: SshTransportPool = None, max_channels: int = 4):
         self.host = host
-        self.port = port
+        self.port = int(port)
         self.username = username
         self.password = password
-        self.ssh = None
+        self.pool = pool or default_pool
+        self.max_channels = max_channels
+        self.transport = None
+        self.shell = None
+        # exec channels currently open, so abort() can fail just this connection's work
+        self._channels = set()
+        self._channels_lock = threading.Lock()
+        self._aborted = False
 
     def __enter__(self):
+        self.connect()
         return self
 
-    def connect(self):
-        self.ssh = paramiko.SSHClient()
-        self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        self.ssh.connect(
-            hostname=self.host,
-            port=self.port,
-            username=self.username,
-            password=self.password,
+    def connect(self, timeout: float = 10.0):
+        self.transport = self.pool.get_transport(
+            self.host, self.port, self.username, self.password, timeout=timeout
         )
+        return self
+
+    def execute(self, command: str, timeout: float = 30.0, deadline: float = None):
+        """Run one command on its own channel and return (exit_status, output).
+
+        The device closes the exec channel when the command is done, so EOF
+        plus the exit status marks completion - no fixed sleep is needed.
+        `timeout` bounds each wait for data; `deadline` (time.monotonic())
+        bounds the whole command and raises socket.timeout once passed.
+        """
+        def wait_time() -> float:
+            if deadline is None:
+                return timeout
+            left = deadline - time.monotonic()
+            if left <= 0:
+                raise socket.timeout(f'deadline reached during {command!r}')
+            return min(timeout, left)
+
+        if self._aborted:
+            raise socket.timeout(f'aborted before {command!r}')
+        if self.transport is None or not self.transport.is_active():
+            self.connect(timeout=wait_time())
+        channel = self.transport.open_session(timeout=wait_time())
+        with self._channels_lock:
+            self._channels.add(channel)
+        try:
+            channel.set_combine_stderr(True)
+            channel.exec_command(command)
+            chunks = []
+            while True:
+                channel.settimeout(wait_time())
+                data = channel.recv(65535)
+                if not data:
+                    break
+                chunks.append(data)
+            exit_status = channel.recv_exit_status()
+        finally:
+            with self._channels_lock:
+                self._channels.discard(channel)
+            channel.close()
+        if self._aborted:
+            # a closed channel reads as EOF, the output is incomplete
+            raise socket.timeout(f'aborted during {command!r}')
+        return exit_status, b''.join(chunks).decode(errors='replace')
+
+    def execute_many(self, commands: list, timeout: float = 30.0, deadline: float = None) -> list:
+        """Run commands on parallel channels multiplexed over the pooled transport.
+
+        Returns (command, output) pairs in command order, so a command listed
+        twice keeps both outputs. With a deadline, commands queued behind the
+        first max_channels get whatever time is left when they start.
+        """
+        if self.transport is None or not self.transport.is_active():
+            self.connect()
+        workers = max(1, min(self.max_channels, len(commands)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outputs = executor.map(lambda cmd: self.execute(cmd, timeout=timeout, deadline=deadline)[1], commands)
+            return list(zip(commands, outputs))
+
+    def open_shell(self, timeout: float = 10.0):
+        """Open an interactive shell channel on the pooled transport."""
+        if self.transport is None or not self.transport.is_active():
+            self.connect(timeout=timeout)
+        self.shell = self.transport.open_session(timeout=timeout)
+        self.shell.get_pty(width=512, height=24)
+        self.shell.invoke_shell()
+        self.read_until_prompt(timeout=timeout)
+        self.send_line('terminal length 0')
+        self.read_until_prompt(timeout=timeout)
+        return self.shell
+
+    def send_line(self, line: str):
+        self.shell.sendall((line + '\n').encode())
+
+    def read_until_prompt(self, prompt_regex=None, timeout: float = 10.0) -> str:
+        """Read from the shell until the buffer ends with a prompt or the timeout passes."""
+        prompt_regex = prompt_regex or self.prompt_regex
+        buffer = ''
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self.shell.settimeout(remaining)
+            try:
+                data = self.shell.recv(65535)
+            except socket.timeout:
+                break
+            if not data:
+                break
+            buffer += data.decode(errors='replace')
+            if prompt_regex.search(buffer):
+                break
+        return buffer
+
+    def send_config(self, commands: list, timeout: float = 60.0):
+        """Push configuration lines in one pipelined write.
+
+        All lines are sent back to back between ``configure terminal`` and
+        ``end``; only the final exec prompt is awaited, so the per-line round
+        trip of the console is gone. Returns the output and the IOS ``%``
+        error lines found in it.
+        """
+        if self.shell is None or self.shell.closed:
+            self.open_shell()
+        lines = ['configure terminal'] + list(commands) + ['end']
+        self.shell.sendall(('\n'.join(lines) + '\n').encode())
+        output = ''
+        deadline = time.monotonic() + timeout
+        # Intermediate config prompts match prompt_regex as well, keep reading
+        # until the device is back at the exec prompt after "end".
+        while time.monotonic() < deadline:
+            output += self.read_until_prompt(self.exec_prompt_regex, timeout=deadline - time.monotonic())
+            if self.exec_prompt_regex.search(output):
+                break
+        errors = [line.strip() for line in output.splitlines() if line.lstrip().startswith('%')]
+        return output, errors
+
+    def close_shell(self):
+        if self.shell is not None:
+            self.shell.close()
+            self.shell = None
 
     def configure(self):
-        stdin, stdout, stderr = self.ssh.exec_command('show version')
-        time.sleep(1)
-        print(stdout.read())
+        _, output = self.execute('show version')
+        print(output)
+
+    def abort(self):
+        """Close the channels this connection has open, from any thread.
+
+        Blocked execute() calls return and raise socket.timeout; the pooled
+        transport, which other connections may be using, stays open.
+        """
+        self._aborted = True
+        with self._channels_lock:
+            channels = list(self._channels)
+        for channel in channels:
+            channel.close()
+        shell = self.shell
+        if shell is not None:
+            shell.close()
 
+    def close(self):
+        self.close_shell()
+        self.pool.close(self.host, self.port, self.username)
+        self.transport = None
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        pass
+        # The transport stays in the pool so the next connection to this device
+        # skips the handshake; call close() to drop it explicitly.
+        self.close_shell()
+        self.transport = None
+
 
 if __name__ == '__main__':
     conn = SshConnection(HOST, PORT, 'admin', 'Cisco@123')
     conn.connect()
     conn.configure()
-
-
+    for cmd, out in conn.execute_many(['show ip interface brief', 'show ip route', 'show clock']):
+        print(f'--- {cmd} ---')
+        print(out)
@@ -19,6 +19,8 @@ class SwaggerConnector:
         self.__refresh_token = None
         self.__token_type = None
         self.connected = False
+        # pyATS passes the per-attempt timeout of device.connect() through
+        self.timeout = kwargs.get('connection_timeout', 30)
 
     def connect(self):
         host = self.device.connections.swagger.ip
@@ -39,6 +41,7 @@ class SwaggerConnector:
             url=self._url + endpoint,
             headers=self._headers,
             verify=False,
+            timeout=self.timeout,
             data=json.dumps(
                 {
                     'username': self.device.credentials.default.username,
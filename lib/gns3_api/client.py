@@ -0,0 +1,192 @@
+"""
+Pooled, cached client for the GNS3 v2 REST API.
+
+One keep-alive `requests` session with a connection pool sized for the
+worker threads serves every call. Templates, project metadata and node
+lists are cached for a short TTL and dropped as soon as a call changes
+them. Per-node operations run on a bounded thread pool, and whole-project
+start/stop use GNS3's bulk endpoints, so a 100-node lab costs a handful of
+round trips instead of thousands.
+
+The client also answers `base_url`/`http_call` like a gns3fy Connector.
+
+    client = Gns3Client('http://192.168.0.100:3080')
+    project = client.project_by_name('NetworkAutomation')
+    client.map(lambda node: client.stop_node(project['project_id'], node['node_id']),
+               client.nodes(project['project_id']))
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class TTLCache:
+    """Thread-safe dict whose entries expire `ttl` seconds after being set"""
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._entries: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if time.monotonic() >= expires:
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+        return value
+
+    def invalidate(self, *prefix):
+        """Drop every key starting with `prefix` (everything when empty)"""
+        with self._lock:
+            for key in [key for key in self._entries if key[:len(prefix)] == prefix]:
+                del self._entries[key]
+
+
+class Gns3Client:
+    """GNS3 REST calls over one pooled session, with cached reads and bounded parallel writes"""
+
+    def __init__(self, url: str, user: str = None, password: str = None, concurrency: int = 16,
+                 ttl: float = 30.0, timeout: float = 30.0, verify: bool = False):
+        self.url = url.rstrip('/')
+        self.base_url = f'{self.url}/v2'
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.cache = TTLCache(ttl)
+
+        self.session = requests.Session()
+        # one host, so one pool whose size matches the worker threads
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(concurrency, 10))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.verify = verify
+        if user:
+            self.session.auth = (user, password)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='gns3')
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def http_call(self, method: str, url: str, data=None, json_data=None, **kwargs) -> requests.Response:
+        """gns3fy Connector signature, so gns3fy objects can share this session"""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method.upper(), url, data=data, json=json_data, **kwargs)
+
+    def request(self, method: str, path: str, json_data: dict = None):
+        response = self.http_call(method, self.base_url + path, json_data=json_data)
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+    def _cached(self, key: tuple, path: str):
+        value = self.cache.get(key)
+        if value is None:
+            value = self.cache.set(key, self.request('get', path))
+        return value
+
+    def map(self, func: Callable, items: Iterable) -> List:
+        """Run func over items on the bounded pool; results in order, exceptions returned in place"""
+        futures = [self._executor.submit(func, item) for item in items]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    # templates
+
+    def templates(self) -> List[dict]:
+        return self._cached(('templates',), '/templates')
+
+    def template_ids(self) -> Dict[str, str]:
+        return {template['name']: template['template_id'] for template in self.templates()}
+
+    # projects
+
+    def projects(self) -> List[dict]:
+        return self._cached(('projects',), '/projects')
+
+    def project(self, project_id: str) -> dict:
+        return self._cached(('project', project_id), f'/projects/{project_id}')
+
+    def project_by_name(self, name: str) -> Optional[dict]:
+        return next((project for project in self.projects() if project['name'] == name), None)
+
+    def create_project(self, name: str) -> dict:
+        project = self.request('post', '/projects', {'name': name})
+        self.cache.invalidate('projects')
+        return project
+
+    def open_project(self, project_id: str) -> dict:
+        project = self.request('post', f'/projects/{project_id}/open')
+        self.cache.invalidate('project', project_id)
+        return project
+
+    # nodes
+
+    def nodes(self, project_id: str) -> List[dict]:
+        return self._cached(('nodes', project_id), f'/projects/{project_id}/nodes')
+
+    def create_node(self, project_id: str, template_id: str, name: str, x: int = 0, y: int = 0) -> dict:
+        node = self.request('post', f'/projects/{project_id}/templates/{template_id}',
+                            {'name': name, 'x': x, 'y': y, 'compute_id': 'local'})
+        self.cache.invalidate('nodes', project_id)
+        return node
+
+    def node_action(self, project_id: str, node_id: str, action: str) -> dict:
+        node = self.request('post', f'/projects/{project_id}/nodes/{node_id}/{action}')
+        self.cache.invalidate('nodes', project_id)
+        return node
+
+    def start_node(self, project_id: str, node_id: str) -> dict:
+        return self.node_action(project_id, node_id, 'start')
+
+    def stop_node(self, project_id: str, node_id: str) -> dict:
+        return self.node_action(project_id, node_id, 'stop')
+
+    def start_all(self, project_id: str):
+        """One call starts every node of the project"""
+        self.request('post', f'/projects/{project_id}/nodes/start')
+        self.cache.invalidate('nodes', project_id)
+
+    def stop_all(self, project_id: str):
+        self.request('post', f'/projects/{project_id}/nodes/stop')
+        self.cache.invalidate('nodes', project_id)
+
+    # snapshots
+
+    def snapshots(self, project_id: str) -> List[dict]:
+        return self.request('get', f'/projects/{project_id}/snapshots')
+
+    def create_snapshot(self, project_id: str, name: str) -> dict:
+        return self.request('post', f'/projects/{project_id}/snapshots', {'name': name})
+
+    def delete_snapshot(self, project_id: str, snapshot_id: str):
+        self.request('delete', f'/projects/{project_id}/snapshots/{snapshot_id}')
+
+    def restore_snapshot(self, project_id: str, snapshot_id: str) -> dict:
+        project = self.request('post', f'/projects/{project_id}/snapshots/{snapshot_id}/restore')
+        # a restore replaces the nodes and reopens the project
+        self.cache.invalidate('nodes', project_id)
+        self.cache.invalidate('project', project_id)
+        return project
@@ -0,0 +1,232 @@
+"""
+GNS3 lab bring-up from a testbed.
+
+Creates one GNS3 node per testbed device that has a template, starts all of
+them concurrently and waits until each console prints a prompt, so the lab
+is ready in the time of the slowest node. The console ports GNS3 assigned
+are written back into a generated testbed YAML.
+
+A device's template comes from `custom.gns3_template` in the testbed, or
+from the `templates` mapping (keyed by device name, then by os).
+
+    manager = LabManager('http://192.168.0.100:3080', 'NetworkAutomation')
+    nodes = asyncio.run(manager.bring_up(load('testbed.yaml'), 'testbed_gns3.yaml'))
+"""
+import asyncio
+import copy
+import ipaddress
+import re
+import socket
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+import telnetlib3
+import yaml
+
+from lib.gns3_api.client import Gns3Client
+
+# IOS/ASA/FTD prompts and login/setup questions all mean the console is usable
+PROMPT = re.compile(r'([\w.\-()]+[>#$]|[Ll]ogin:|[Uu]sername:|[Pp]assword:|\[yes/no\]:?|RETURN to get started)\s*$')
+
+GRID_COLUMNS = 8
+GRID_SPACING = 150
+
+
+@dataclass
+class LabNode:
+    name: str
+    template: str
+    node_id: Optional[str] = None
+    console_host: Optional[str] = None
+    console: Optional[int] = None
+    status: Optional[str] = None
+    ready: bool = False
+    # from the start request until the console showed a prompt
+    boot_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+def console_host(host: Optional[str], url: str) -> str:
+    """Servers listening on every address report the wildcard: reach the console through the API host"""
+    if not host or host in ('0.0.0.0', '::'):
+        return urlparse(url).hostname
+    return host
+
+
+def resolve_address(host: str) -> str:
+    """IP address of a console host; testbed connection `ip` fields must be addresses, not names"""
+    try:
+        return ipaddress.ip_address(host).compressed
+    except ValueError:
+        pass
+    try:
+        return socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)[0][4][0]
+    except socket.gaierror as e:
+        raise ValueError(f'Cannot resolve console host {host!r}: {e}') from None
+
+
+async def wait_for_prompt(host: str, port: int, timeout: float = 600.0, poke_interval: float = 5.0) -> str:
+    """Connect to a node console and press return until a prompt shows up; returns the prompt line"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.wait_for(telnetlib3.open_connection(host, port), timeout=10)
+            break
+        except (OSError, asyncio.TimeoutError):
+            # the console port opens a moment after the node starts
+            if time.monotonic() > deadline:
+                raise TimeoutError(f'Console {host}:{port} did not open')
+            await asyncio.sleep(1)
+
+    buffer = ''
+    try:
+        while time.monotonic() < deadline:
+            writer.write('\r\n')
+            try:
+                chunk = await asyncio.wait_for(reader.read(4096), timeout=poke_interval)
+            except asyncio.TimeoutError:
+                continue
+            if not chunk:
+                raise ConnectionError(f'Console {host}:{port} closed')
+            buffer = (buffer + chunk)[-2048:]
+            last_line = buffer.rstrip('\r\n').splitlines()[-1:] or ['']
+            if PROMPT.search(last_line[0]):
+                return last_line[0].strip()
+        raise TimeoutError(f'No prompt on console {host}:{port} after {timeout:.0f}s')
+    finally:
+        writer.close()
+
+
+class LabManager:
+    """Creates, starts and describes the GNS3 nodes of a testbed"""
+
+    def __init__(self, url: str, project_name: str, user: str = None, password: str = None,
+                 concurrency: int = 8, templates: Dict[str, str] = None, client: Gns3Client = None):
+        self.url = url
+        self.client = client or Gns3Client(url, user, password, concurrency=concurrency)
+        self.project_name = project_name
+        self.templates = templates or {}
+        self.project: Optional[dict] = None
+        self.nodes: Dict[str, LabNode] = {}
+
+    def open_project(self) -> dict:
+        """Open the lab project, creating it on first use"""
+        project = self.client.project_by_name(self.project_name) or self.client.create_project(self.project_name)
+        self.project = self.client.open_project(project['project_id'])
+        return self.project
+
+    def template_for(self, device) -> Optional[str]:
+        custom = getattr(device, 'custom', None) or {}
+        return custom.get('gns3_template') or self.templates.get(device.name) or self.templates.get(device.os)
+
+    def _update(self, lab_node: LabNode, node: dict):
+        lab_node.node_id = node['node_id']
+        lab_node.status = node.get('status')
+        if node.get('console'):
+            lab_node.console_host = console_host(node.get('console_host'), self.url)
+            lab_node.console = node['console']
+
+    def create_nodes(self, testbed, existing: bool = True) -> Dict[str, LabNode]:
+        """Create one node per device with a template, concurrently; existing nodes are reused"""
+        if self.project is None:
+            self.open_project()
+        project_id = self.project['project_id']
+        template_ids = self.client.template_ids()
+        present = {node['name']: node for node in self.client.nodes(project_id)}
+
+        wanted = [(device.name, self.template_for(device)) for device in testbed.devices.values()]
+        wanted = [(name, template) for name, template in wanted if template]
+
+        def create(item):
+            position, (name, template) = item
+            if existing and name in present:
+                return present[name]
+            if template not in template_ids:
+                raise KeyError(f'Unknown GNS3 template {template!r}')
+            return self.client.create_node(
+                project_id, template_ids[template], name,
+                x=(position % GRID_COLUMNS) * GRID_SPACING,
+                y=(position // GRID_COLUMNS) * GRID_SPACING,
+            )
+
+        for (name, template), node in zip(wanted, self.client.map(create, enumerate(wanted))):
+            lab_node = LabNode(name, template)
+            if isinstance(node, Exception):
+                lab_node.error = f'Create failed: {node}'
+            else:
+                self._update(lab_node, node)
+            self.nodes[name] = lab_node
+        return self.nodes
+
+    async def start_nodes(self, names: Iterable[str] = None, prompt_timeout: float = 600.0) -> Dict[str, LabNode]:
+        """Start the nodes and wait for every console prompt concurrently.
+
+        Only the testbed's nodes are started: the bulk start is used when the
+        project holds nothing else, otherwise nodes start one by one on the
+        client's bounded pool.
+        """
+        loop = asyncio.get_running_loop()
+        project_id = self.project['project_id']
+        names = [name for name in (names or self.nodes) if self.nodes[name].error is None]
+        started = time.monotonic()
+
+        node_ids = [self.nodes[name].node_id for name in names]
+        project_ids = {node['node_id'] for node in await loop.run_in_executor(None, self.client.nodes, project_id)}
+        if project_ids <= set(node_ids):
+            await loop.run_in_executor(None, self.client.start_all, project_id)
+        else:
+            results = await loop.run_in_executor(
+                None, self.client.map, lambda node_id: self.client.start_node(project_id, node_id), node_ids,
+            )
+            for name, result in zip(names, results):
+                if isinstance(result, Exception):
+                    self.nodes[name].error = f'Start failed: {result}'
+        by_id = {node['node_id']: node for node in await loop.run_in_executor(None, self.client.nodes, project_id)}
+
+        async def wait(name):
+            lab_node = self.nodes[name]
+            if lab_node.error is not None:
+                return
+            self._update(lab_node, by_id.get(lab_node.node_id, {'node_id': lab_node.node_id}))
+            try:
+                await wait_for_prompt(lab_node.console_host, lab_node.console, prompt_timeout)
+                lab_node.ready = True
+                lab_node.boot_seconds = round(time.monotonic() - started, 2)
+            except Exception as e:
+                lab_node.error = f'Start failed: {e or type(e).__name__}'
+
+        await asyncio.gather(*(wait(name) for name in names))
+        return self.nodes
+
+    def testbed_dict(self, testbed) -> dict:
+        """Copy of the testbed whose telnet connections point at the assigned consoles"""
+        data = copy.deepcopy(testbed.raw)
+        addresses = {}
+        for name, lab_node in self.nodes.items():
+            if lab_node.console is None:
+                continue
+            device = data['devices'][name]
+            connections = device.setdefault('connections', {})
+            telnet = connections.setdefault('telnet', {'protocol': 'telnet', 'class': 'telnet_con.TelnetConnection'})
+            # console_host may be the server name taken from the API URL
+            if lab_node.console_host not in addresses:
+                addresses[lab_node.console_host] = resolve_address(lab_node.console_host)
+            telnet['ip'] = addresses[lab_node.console_host]
+            telnet['port'] = lab_node.console
+        return data
+
+    def write_testbed(self, testbed, path: str) -> str:
+        with open(path, 'w') as f:
+            yaml.safe_dump(self.testbed_dict(testbed), f, sort_keys=False)
+        return path
+
+    async def bring_up(self, testbed, output_path: str = None, prompt_timeout: float = 600.0) -> Dict[str, LabNode]:
+        """Create, start and wait for the whole lab; optionally write the generated testbed"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.create_nodes, testbed)
+        await self.start_nodes(prompt_timeout=prompt_timeout)
+        if output_path:
+            self.write_testbed(testbed, output_path)
+        return self.nodes
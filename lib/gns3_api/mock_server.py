@@ -0,0 +1,235 @@
+"""
+In-memory mock of the GNS3 v2 REST API.
+
+Covers what the lab manager and the snapshot layer use: version, templates,
+projects, nodes (create from template, start, stop) and snapshots. Restoring
+a snapshot brings back the node list saved with it, stopped, as GNS3 does.
+Consoles are not emulated: nodes get console ports but nothing listens.
+
+    python -m lib.gns3_api.mock_server --port 3080
+"""
+import argparse
+import copy
+import itertools
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_TEMPLATES = (
+    {'name': 'Cisco IOSv 15.9(3)M6', 'template_type': 'qemu'},
+    {'name': 'Cisco FTDv 7.0.0', 'template_type': 'qemu'},
+)
+
+_ID = r'(?P<{}>[0-9a-f-]+)'
+
+
+class MockGns3:
+    """State of the mock server; every method returns (status, body)"""
+
+    def __init__(self, templates=DEFAULT_TEMPLATES, console_host='127.0.0.1', first_console=5000):
+        self.lock = threading.Lock()
+        self.console_host = console_host
+        self._consoles = itertools.count(first_console)
+        self.templates = {}
+        for template in templates:
+            template_id = str(uuid.uuid4())
+            self.templates[template_id] = dict(template, template_id=template_id, builtin=False)
+        self.projects = {}
+        # project_id -> node_id -> node
+        self.nodes = {}
+        # project_id -> snapshot_id -> (snapshot, saved nodes)
+        self.snapshots = {}
+        self.routes = [
+            ('GET', r'/v2/version$', self.version),
+            ('GET', r'/v2/templates$', self.list_templates),
+            ('GET', r'/v2/projects$', self.list_projects),
+            ('POST', r'/v2/projects$', self.create_project),
+            ('GET', rf'/v2/projects/{_ID.format("project_id")}$', self.get_project),
+            ('POST', rf'/v2/projects/{_ID.format("project_id")}/open$', self.open_project),
+            ('GET', rf'/v2/projects/{_ID.format("project_id")}/nodes$', self.list_nodes),
+            ('POST', rf'/v2/projects/{_ID.format("project_id")}/nodes/(?P<action>start|stop)$', self.all_nodes),
+            ('POST', rf'/v2/projects/{_ID.format("project_id")}/templates/{_ID.format("template_id")}$', self.create_node),
+            ('GET', rf'/v2/projects/{_ID.format("project_id")}/nodes/{_ID.format("node_id")}$', self.get_node),
+            ('POST', rf'/v2/projects/{_ID.format("project_id")}/nodes/{_ID.format("node_id")}/(?P<action>start|stop)$',
+             self.node_action),
+            ('GET', rf'/v2/projects/{_ID.format("project_id")}/snapshots$', self.list_snapshots),
+            ('POST', rf'/v2/projects/{_ID.format("project_id")}/snapshots$', self.create_snapshot),
+            ('DELETE', rf'/v2/projects/{_ID.format("project_id")}/snapshots/{_ID.format("snapshot_id")}$',
+             self.delete_snapshot),
+            ('POST', rf'/v2/projects/{_ID.format("project_id")}/snapshots/{_ID.format("snapshot_id")}/restore$',
+             self.restore_snapshot),
+        ]
+
+    def dispatch(self, method: str, path: str, body: dict):
+        for route_method, pattern, handler in self.routes:
+            match = re.match(pattern, path)
+            if match and route_method == method:
+                with self.lock:
+                    return handler(body, **match.groupdict())
+        return 404, {'status': 404, 'message': f'{method} {path} not found'}
+
+    @staticmethod
+    def _missing(kind, key):
+        return 404, {'status': 404, 'message': f'{kind} ID {key} doesn\'t exist'}
+
+    def version(self, body):
+        return 200, {'version': '2.2.0', 'local': True}
+
+    def list_templates(self, body):
+        return 200, list(self.templates.values())
+
+    def list_projects(self, body):
+        return 200, list(self.projects.values())
+
+    def create_project(self, body):
+        if any(project['name'] == body.get('name') for project in self.projects.values()):
+            return 409, {'status': 409, 'message': f'Project \'{body.get("name")}\' already exists'}
+        project_id = body.get('project_id') or str(uuid.uuid4())
+        project = {'project_id': project_id, 'name': body.get('name'), 'status': 'opened'}
+        self.projects[project_id] = project
+        self.nodes[project_id] = {}
+        self.snapshots[project_id] = {}
+        return 201, project
+
+    def get_project(self, body, project_id):
+        if project_id not in self.projects:
+            return self._missing('Project', project_id)
+        return 200, self.projects[project_id]
+
+    def open_project(self, body, project_id):
+        if project_id not in self.projects:
+            return self._missing('Project', project_id)
+        self.projects[project_id]['status'] = 'opened'
+        return 201, self.projects[project_id]
+
+    def list_nodes(self, body, project_id):
+        if project_id not in self.projects:
+            return self._missing('Project', project_id)
+        return 200, list(self.nodes[project_id].values())
+
+    def create_node(self, body, project_id, template_id):
+        if project_id not in self.projects:
+            return self._missing('Project', project_id)
+        template = self.templates.get(template_id)
+        if template is None:
+            return self._missing('Template', template_id)
+        node_id = str(uuid.uuid4())
+        node = {
+            'node_id': node_id,
+            'project_id': project_id,
+            'template_id': template_id,
+            'name': body.get('name') or f"{template['name']}-{len(self.nodes[project_id]) + 1}",
+            'node_type': template['template_type'],
+            'status': 'stopped',
+            'console': next(self._consoles),
+            'console_type': 'telnet',
+            'console_host': self.console_host,
+            'x': body.get('x', 0),
+            'y': body.get('y', 0),
+        }
+        self.nodes[project_id][node_id] = node
+        return 201, node
+
+    def get_node(self, body, project_id, node_id):
+        node = self.nodes.get(project_id, {}).get(node_id)
+        if node is None:
+            return self._missing('Node', node_id)
+        return 200, node
+
+    def node_action(self, body, project_id, node_id, action):
+        node = self.nodes.get(project_id, {}).get(node_id)
+        if node is None:
+            return self._missing('Node', node_id)
+        node['status'] = 'started' if action == 'start' else 'stopped'
+        return 200, node
+
+    def all_nodes(self, body, project_id, action):
+        if project_id not in self.projects:
+            return self._missing('Project', project_id)
+        for node in self.nodes[project_id].values():
+            node['status'] = 'started' if action == 'start' else 'stopped'
+        return 204, None
+
+    def list_snapshots(self, body, project_id):
+        if project_id not in self.projects:
+            return self._missing('Project', project_id)
+        return 200, [snapshot for snapshot, _ in self.snapshots[project_id].values()]
+
+    def create_snapshot(self, body, project_id):
+        if project_id not in self.projects:
+            return self._missing('Project', project_id)
+        name = body.get('name')
+        if any(snapshot['name'] == name for snapshot, _ in self.snapshots[project_id].values()):
+            return 409, {'status': 409, 'message': f'The snapshot name {name} already exists'}
+        snapshot = {
+            'snapshot_id': str(uuid.uuid4()),
+            'project_id': project_id,
+            'name': name,
+            'created_at': int(time.time()),
+        }
+        self.snapshots[project_id][snapshot['snapshot_id']] = (snapshot, copy.deepcopy(self.nodes[project_id]))
+        return 201, snapshot
+
+    def delete_snapshot(self, body, project_id, snapshot_id):
+        if snapshot_id not in self.snapshots.get(project_id, {}):
+            return self._missing('Snapshot', snapshot_id)
+        del self.snapshots[project_id][snapshot_id]
+        return 204, None
+
+    def restore_snapshot(self, body, project_id, snapshot_id):
+        if snapshot_id not in self.snapshots.get(project_id, {}):
+            return self._missing('Snapshot', snapshot_id)
+        _, saved = self.snapshots[project_id][snapshot_id]
+        nodes = copy.deepcopy(saved)
+        for node in nodes.values():
+            node['status'] = 'stopped'
+        self.nodes[project_id] = nodes
+        return 201, self.projects[project_id]
+
+
+def make_handler(state: MockGns3):
+    class Handler(BaseHTTPRequestHandler):
+        def _handle(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+            except ValueError:
+                body = None
+            if body is None:
+                status, payload = 400, {'status': 400, 'message': 'Invalid JSON body'}
+            else:
+                status, payload = state.dispatch(self.command, self.path.split('?', 1)[0], body)
+            data = b'' if payload is None else json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(host: str = '127.0.0.1', port: int = 3080, state: MockGns3 = None) -> ThreadingHTTPServer:
+    """Start the mock in a daemon thread; stop it with server.shutdown()"""
+    server = ThreadingHTTPServer((host, port), make_handler(state or MockGns3(console_host=host)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve an in-memory mock of the GNS3 REST API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3080)
+    args = parser.parse_args()
+
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(MockGns3(console_host=args.host)))
+    print(f'Mock GNS3 server on http://{args.host}:{args.port}/v2')
+    httpd.serve_forever()
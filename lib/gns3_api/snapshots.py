@@ -0,0 +1,95 @@
+"""
+Stage snapshots of a GNS3 lab.
+
+Once a slow stage is done (FTD initial setup is most of a fresh lab run),
+the project is saved as a named GNS3 snapshot. Later runs restore it, start
+the nodes and wait for their consoles instead of repeating the stage.
+
+    snapshots = LabSnapshots.connect('http://192.168.0.100:3080', project_id)
+    snapshots.take(stage_snapshot_name('ftd_initial'))
+    ...
+    asyncio.run(snapshots.restore_and_boot(stage_snapshot_name('ftd_initial')))
+
+`python -m lib.gns3_api.mock_server` serves the same REST API locally.
+"""
+import asyncio
+from typing import Dict, Optional
+
+from lib.gns3_api.client import Gns3Client
+from lib.gns3_api.lab_manager import console_host, wait_for_prompt
+
+SNAPSHOT_PREFIX = 'stage-'
+
+
+def stage_snapshot_name(stage: str) -> str:
+    return f'{SNAPSHOT_PREFIX}{stage}'
+
+
+class LabSnapshots:
+    """Take, list and restore the snapshots of one GNS3 project"""
+
+    def __init__(self, client: Gns3Client, project_id: str):
+        self.client = client
+        self.project_id = project_id
+
+    @classmethod
+    def connect(cls, url: str, project_id: str, user: str = None, password: str = None) -> 'LabSnapshots':
+        return cls(Gns3Client(url, user, password), project_id)
+
+    def list(self) -> Dict[str, dict]:
+        return {snapshot['name']: snapshot for snapshot in self.client.snapshots(self.project_id)}
+
+    def find(self, name: str) -> Optional[dict]:
+        return self.list().get(name)
+
+    def delete(self, name: str) -> bool:
+        snapshot = self.find(name)
+        if snapshot is None:
+            return False
+        self.client.delete_snapshot(self.project_id, snapshot['snapshot_id'])
+        return True
+
+    def take(self, name: str, replace: bool = True, stop_nodes: bool = False) -> dict:
+        """Snapshot the project under `name`.
+
+        Running qemu nodes are captured as their disks are at that moment;
+        stop_nodes gives consistent disks at the cost of a reboot.
+        """
+        if replace:
+            self.delete(name)
+        if stop_nodes:
+            self.client.stop_all(self.project_id)
+        try:
+            return self.client.create_snapshot(self.project_id, name)
+        finally:
+            if stop_nodes:
+                self.client.start_all(self.project_id)
+
+    def restore(self, name: str) -> dict:
+        snapshot = self.find(name)
+        if snapshot is None:
+            raise KeyError(f'No snapshot {name!r} in project {self.project_id}')
+        return self.client.restore_snapshot(self.project_id, snapshot['snapshot_id'])
+
+    def nodes(self) -> list:
+        return self.client.nodes(self.project_id)
+
+    async def restore_and_boot(self, name: str, prompt_timeout: float = 900.0) -> Dict[str, Optional[str]]:
+        """Restore a snapshot, start every node and wait for the consoles; node -> error or None"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.restore, name)
+        await loop.run_in_executor(None, self.client.start_all, self.project_id)
+        nodes = await loop.run_in_executor(None, self.nodes)
+
+        consoles = {
+            node['name']: (console_host(node.get('console_host'), self.client.url), node['console'])
+            for node in nodes if node.get('console') and node.get('console_type') == 'telnet'
+        }
+        waits = await asyncio.gather(
+            *(wait_for_prompt(host, port, prompt_timeout) for host, port in consoles.values()),
+            return_exceptions=True,
+        )
+        return {
+            name: (str(result) or type(result).__name__) if isinstance(result, Exception) else None
+            for name, result in zip(consoles, waits)
+        }
@@ -0,0 +1,111 @@
+"""
+Batched host network programming with `ip -batch`.
+
+Addresses, link state and routes are collected first and then applied by a
+single `ip -force -batch -` process, instead of one `sudo ip ...` fork per
+entry. `-force` keeps going after a failed line; its stderr names every
+failed line ("Command failed -:N"), which is mapped back to a per-entry
+result.
+
+    batch = IpBatch()
+    batch.address_add('192.168.200.254/24', 'ens4').link_up('ens4')
+    batch.route_add('192.168.10.0/24', '192.168.200.1')
+    for result in batch.run():
+        print(result.command, result.ok, result.error)
+"""
+import re
+import subprocess
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+# Errors meaning the entry is already in place
+ALREADY_PRESENT = ('File exists', 'already assigned')
+ALREADY_ABSENT = ('No such process', 'Cannot assign requested address')
+
+_FAILED_LINE = re.compile(r'^Command failed \S*:(\d+)\s*$')
+
+
+@dataclass
+class BatchResult:
+    command: str
+    ok: bool
+    error: str = ''
+    # failed, but only because the entry was already in the requested state
+    unchanged: bool = False
+
+
+def parse_failures(stderr: str) -> Dict[int, str]:
+    """Map 1-based batch line numbers to the error printed before their 'Command failed' line"""
+    failures, pending = {}, []
+    for line in stderr.splitlines():
+        match = _FAILED_LINE.match(line)
+        if match:
+            failures[int(match.group(1))] = '\n'.join(pending).strip()
+            pending = []
+        elif line.strip():
+            pending.append(line.strip())
+    return failures
+
+
+def _proto(proto) -> str:
+    return f' proto {proto}' if proto else ''
+
+
+class IpBatch:
+    """Collects `ip` commands and applies them with one process"""
+
+    def __init__(self, sudo: bool = True, ip: str = 'ip'):
+        self.sudo = sudo
+        self.ip = ip
+        self._entries: List[Tuple[str, Tuple[str, ...]]] = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, command: str, tolerate: Iterable[str] = ()) -> 'IpBatch':
+        """Queue a raw batch line, e.g. 'route add 10.0.0.0/24 via 10.1.1.1'"""
+        if '\n' in command:
+            raise ValueError('One ip command per batch line')
+        self._entries.append((command, tuple(tolerate)))
+        return self
+
+    def address_add(self, address: str, dev: str) -> 'IpBatch':
+        return self.add(f'address add {address} dev {dev}', ALREADY_PRESENT)
+
+    def link_up(self, dev: str) -> 'IpBatch':
+        return self.add(f'link set {dev} up')
+
+    def route_add(self, network: str, via: str, proto: str = None) -> 'IpBatch':
+        return self.add(f'route add {network} via {via}' + _proto(proto), ALREADY_PRESENT)
+
+    def route_replace(self, network: str, via: str, proto: str = None) -> 'IpBatch':
+        return self.add(f'route replace {network} via {via}' + _proto(proto))
+
+    def route_del(self, network: str, via: str = None, proto: str = None) -> 'IpBatch':
+        return self.add(f'route del {network}' + (f' via {via}' if via else '') + _proto(proto), ALREADY_ABSENT)
+
+    def run(self, timeout: float = 60) -> List[BatchResult]:
+        """Apply every queued command in one `ip -batch` run; one result per command"""
+        if not self._entries:
+            return []
+        cmd = (['sudo'] if self.sudo else []) + [self.ip, '-force', '-batch', '-']
+        script = ''.join(f'{command}\n' for command, _ in self._entries)
+        proc = subprocess.run(cmd, input=script, capture_output=True, text=True, timeout=timeout)
+
+        failures = parse_failures(proc.stderr or '')
+        if proc.returncode != 0 and not failures:
+            # ip itself did not start (sudo refused, binary missing...): every entry failed
+            error = (proc.stderr or '').strip() or f'{self.ip} exited with {proc.returncode}'
+            failures = {line: error for line in range(1, len(self._entries) + 1)}
+
+        results = []
+        for line, (command, tolerate) in enumerate(self._entries, start=1):
+            error = failures.get(line)
+            if error is None:
+                results.append(BatchResult(command, True))
+            elif any(text in error for text in tolerate):
+                results.append(BatchResult(command, True, error, unchanged=True))
+            else:
+                results.append(BatchResult(command, False, error))
+        self._entries = []
+        return results
@@ -0,0 +1,126 @@
+"""
+Desired-state reconciler for host routes.
+
+Reads the routing table as JSON (`ip -j route`), compares it with the routes
+a testbed needs and queues only the differences into one `ip -batch` run.
+Routes it installs carry their own protocol number, so later runs know
+which routes they own and never touch anything else on the host: a wanted
+destination already routed by another tool is reported as a conflict.
+
+    reconciler = RouteReconciler()
+    plan, results = reconciler.reconcile({'192.168.10.0/24': '192.168.200.1'})
+    print(plan.summary())
+"""
+import ipaddress
+import json
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from lib.hostnet.ip_batch import BatchResult, IpBatch
+
+# rtnetlink protocol number tagging the routes managed here (0-255, see /etc/iproute2/rt_protos)
+MANAGED_PROTO = '250'
+
+
+def normalize_dst(dst: str) -> str:
+    """'default' stays, host routes shown without a prefix length get /32"""
+    if dst == 'default':
+        return dst
+    return ipaddress.ip_network(dst, strict=False).compressed
+
+
+def read_routes(ip: str = 'ip', sudo: bool = False, timeout: float = 10) -> List[dict]:
+    """Main routing table as parsed `ip -j route show` entries"""
+    cmd = (['sudo'] if sudo else []) + [ip, '-j', 'route', 'show']
+    proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, check=True)
+    return json.loads(proc.stdout or '[]')
+
+
+@dataclass
+class RoutePlan:
+    add: Dict[str, str] = field(default_factory=dict)
+    # ours, present with another gateway
+    replace: Dict[str, str] = field(default_factory=dict)
+    delete: List[Tuple[str, Optional[str]]] = field(default_factory=list)
+    # wanted, but the destination is routed by someone else: left alone
+    conflicts: Dict[str, str] = field(default_factory=dict)
+    unchanged: int = 0
+
+    def __len__(self):
+        return len(self.add) + len(self.replace) + len(self.delete)
+
+    def summary(self) -> str:
+        text = (f'{len(self.add)} to add, {len(self.replace)} to replace, '
+                f'{len(self.delete)} to delete, {self.unchanged} unchanged')
+        if self.conflicts:
+            text += f', {len(self.conflicts)} conflicting ({", ".join(self.conflicts)})'
+        return text
+
+
+class RouteReconciler:
+    """Brings the host's managed routes to a desired network -> gateway map"""
+
+    def __init__(self, sudo: bool = True, ip: str = 'ip', proto: str = MANAGED_PROTO):
+        self.sudo = sudo
+        self.ip = ip
+        self.proto = proto
+
+    def plan(self, desired: Dict[str, str], current: List[dict] = None,
+             owned: Dict[str, str] = None) -> RoutePlan:
+        """Diff desired routes against the table.
+
+        Only routes tagged with our protocol are deleted or replaced, plus
+        the exact `owned` entries (routes added before they were tagged).
+        Wanted destinations routed only by others end up in `conflicts`.
+        """
+        if current is None:
+            current = read_routes(self.ip)
+        desired = {normalize_dst(dst): gateway for dst, gateway in desired.items()}
+        owned = {normalize_dst(dst): gateway for dst, gateway in (owned or {}).items()}
+
+        plan = RoutePlan()
+        seen = set()
+        present, ours_present = set(), set()
+        for route in current:
+            dst = normalize_dst(route['dst'])
+            gateway = route.get('gateway')
+            ours = route.get('protocol') == self.proto or (dst in owned and owned[dst] == gateway)
+            present.add(dst)
+            if ours:
+                ours_present.add(dst)
+            if dst in desired:
+                if ours and gateway == desired[dst] and dst not in seen:
+                    plan.unchanged += 1
+                    seen.add(dst)
+                elif ours and dst in seen:
+                    plan.delete.append((dst, gateway))
+                continue
+            if ours:
+                plan.delete.append((dst, gateway))
+
+        for dst, gateway in desired.items():
+            if dst in seen:
+                continue
+            if dst in ours_present:
+                plan.replace[dst] = gateway
+            elif dst in present:
+                plan.conflicts[dst] = gateway
+            else:
+                plan.add[dst] = gateway
+        return plan
+
+    def queue(self, plan: RoutePlan, batch: IpBatch) -> IpBatch:
+        """Append the plan to a batch, deletes first so replaced gateways never overlap"""
+        for dst, gateway in plan.delete:
+            batch.route_del(dst, gateway)
+        for dst, gateway in plan.replace.items():
+            batch.route_replace(dst, gateway, self.proto)
+        for dst, gateway in plan.add.items():
+            batch.route_add(dst, gateway, self.proto)
+        return batch
+
+    def reconcile(self, desired: Dict[str, str], owned: Dict[str, str] = None) -> Tuple[RoutePlan, List[BatchResult]]:
+        plan = self.plan(desired, owned=owned)
+        results = self.queue(plan, IpBatch(sudo=self.sudo, ip=self.ip)).run() if plan else []
+        return plan, results
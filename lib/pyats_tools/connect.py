@@ -0,0 +1,136 @@
+"""
+Concurrent device connect and teardown for aetest scripts.
+
+Every device of the testbed is connected at the same time, each with its
+own timeout and retries, so setup takes as long as the slowest device
+instead of the sum of all of them. In a setup section:
+
+    connect_devices(self, tb, devices=['CSR'], log_stdout=True)
+
+registers the connected devices as the `devices` script parameter for the
+later testcases and fails the section when a device stays unreachable.
+`disconnect_devices(self)` is the matching cleanup.
+
+Consoles driven by hand (telnetlib3 coroutines) use `gather_devices`, the
+asyncio equivalent with the same results. Its factories should only open the
+connection: a timed out attempt is cancelled and retried, so anything that
+changes the device (a config push) belongs after the gather, run once.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+
+@dataclass
+class ConnectResult:
+    device: str
+    connected: bool
+    attempts: int
+    seconds: float
+    error: Optional[str] = None
+    # whatever device.connect() / the coroutine returned
+    connection: Any = None
+
+
+def connect_device(device, timeout: float = 60, retries: int = 2, retry_delay: float = 5,
+                   **connect_kwargs) -> ConnectResult:
+    """device.connect() with up to `retries` more attempts; never raises"""
+    started = time.monotonic()
+    error = None
+    for attempt in range(1, retries + 2):
+        try:
+            connection = device.connect(connection_timeout=timeout, **connect_kwargs)
+            return ConnectResult(device.name, True, attempt, round(time.monotonic() - started, 2), None, connection)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            # a half open session would make the next connect() a no-op
+            try:
+                device.destroy()
+            except Exception:
+                pass
+        if attempt <= retries:
+            time.sleep(retry_delay)
+    return ConnectResult(device.name, False, retries + 1, round(time.monotonic() - started, 2), error)
+
+
+def connect_all(testbed, devices: Iterable[str] = None, timeout: float = 60, retries: int = 2,
+                retry_delay: float = 5, max_workers: int = None, **connect_kwargs) -> Dict[str, ConnectResult]:
+    """Connect the named devices (all testbed devices by default) in parallel"""
+    names = list(devices) if devices is not None else list(testbed.devices)
+    if not names:
+        return {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(names)) as pool:
+        futures = {
+            name: pool.submit(connect_device, testbed.devices[name], timeout, retries, retry_delay, **connect_kwargs)
+            for name in names
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+def disconnect_all(devices: Iterable, max_workers: int = None) -> Dict[str, Optional[str]]:
+    """Disconnect devices in parallel; device name -> error or None"""
+    devices = [device for device in devices if device.is_connected()]
+    if not devices:
+        return {}
+
+    def disconnect(device) -> Optional[str]:
+        try:
+            device.disconnect()
+            return None
+        except Exception as e:
+            return str(e) or type(e).__name__
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(devices)) as pool:
+        return dict(zip((device.name for device in devices), pool.map(disconnect, devices)))
+
+
+async def gather_devices(jobs: Dict[str, Callable[[], Awaitable]], timeout: float = 60, retries: int = 2,
+                         retry_delay: float = 5) -> Dict[str, ConnectResult]:
+    """Run one coroutine factory per device concurrently, each attempt bounded by timeout.
+
+    A failing device never takes the others down: any exception ends that
+    attempt only. A timed out attempt is cancelled, so a factory that opens
+    a connection must close it again on `asyncio.CancelledError`.
+    """
+
+    async def run(name, job) -> ConnectResult:
+        started = time.monotonic()
+        error = None
+        for attempt in range(1, retries + 2):
+            try:
+                result = await asyncio.wait_for(job(), timeout)
+                return ConnectResult(name, True, attempt, round(time.monotonic() - started, 2), None, result)
+            except asyncio.TimeoutError:
+                error = f'no answer within {timeout}s'
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            if attempt <= retries:
+                await asyncio.sleep(retry_delay)
+        return ConnectResult(name, False, retries + 1, round(time.monotonic() - started, 2), error)
+
+    results = await asyncio.gather(*(run(name, job) for name, job in jobs.items()))
+    return {result.device: result for result in results}
+
+
+def connect_devices(section, testbed, devices: Iterable[str] = None, timeout: float = 60, retries: int = 2,
+                    retry_delay: float = 5, parameter: str = 'devices', **connect_kwargs) -> Dict[str, ConnectResult]:
+    """aetest setup helper: connect in parallel, register the connected devices, fail on the rest"""
+    results = connect_all(testbed, devices, timeout, retries, retry_delay, **connect_kwargs)
+    for result in results.values():
+        state = 'connected' if result.connected else f'FAILED ({result.error})'
+        print(f'{result.device:20s} {state} after {result.attempts} attempt(s), {result.seconds}s')
+
+    connected = section.parent.parameters.setdefault(parameter, {})
+    connected.update({name: testbed.devices[name] for name, result in results.items() if result.connected})
+    failed = sorted(name for name, result in results.items() if not result.connected)
+    if failed:
+        section.failed(f"Could not connect to {', '.join(failed)}")
+    return results
+
+
+def disconnect_devices(section, parameter: str = 'devices') -> Dict[str, Optional[str]]:
+    """aetest cleanup helper for connect_devices"""
+    devices = section.parent.parameters.get(parameter) or {}
+    return disconnect_all(devices.values())
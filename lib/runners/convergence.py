@@ -0,0 +1,108 @@
+"""
+RIP convergence watcher.
+
+Polls `show ip route` on every router at the same time until each one has
+learned every prefix it should know from the testbed, and records how long
+that took per router and for the whole network (the slowest router).
+
+    report = asyncio.run(wait_for_convergence(testbed, expected_prefixes(testbed)))
+    print(report.converged, report.seconds)
+"""
+import asyncio
+import ipaddress
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+from lib.connectors.ssh_con import SshTransportPool
+from lib.runners.verification import SHOW_ROUTES, collect, parse_ip_route, ssh_target
+
+
+@dataclass
+class RouterConvergence:
+    device: str
+    converged: bool
+    # from the start of the watch until every expected prefix was in the table
+    seconds: Optional[float] = None
+    polls: int = 0
+    missing: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+@dataclass
+class ConvergenceReport:
+    converged: bool
+    seconds: Optional[float]
+    routers: Dict[str, RouterConvergence]
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _routed_interfaces(device):
+    for intf in device.interfaces.values():
+        if getattr(intf, 'alias', None) == 'initial' or getattr(getattr(intf, 'link', None), 'name', None) == 'management':
+            continue
+        if getattr(intf, 'ipv4', None):
+            yield intf
+
+
+def expected_prefixes(testbed, routers: Iterable[str] = None) -> Dict[str, Set[str]]:
+    """Every router should end up with every network RIP advertises, i.e. all router interface networks"""
+    if routers is None:
+        routers = [dev.name for dev in testbed.index.devices('router')]
+    routers = list(routers)
+    networks = {
+        ipaddress.IPv4Interface(str(intf.ipv4)).network.compressed
+        for name in routers for intf in _routed_interfaces(testbed.devices[name])
+    }
+    return {name: set(networks) for name in routers}
+
+
+def _missing(output: str, expected: Set[str]) -> List[str]:
+    return sorted(expected - parse_ip_route(output).keys())
+
+
+async def watch_router(device, expected: Set[str], started: float, deadline: float, interval: float = 2.0,
+                       pool: SshTransportPool = None, timeout: float = 15.0) -> RouterConvergence:
+    """Poll one router until its table holds every expected prefix or the deadline passes"""
+    loop = asyncio.get_running_loop()
+    result = RouterConvergence(device.name, False, missing=sorted(expected))
+    target = ssh_target(device)
+    if target is None:
+        result.error = 'No management interface (alias initial)'
+        return result
+
+    while True:
+        result.polls += 1
+        try:
+            outputs = await asyncio.wait_for(
+                loop.run_in_executor(None, collect, target, (SHOW_ROUTES,), pool, timeout), timeout=timeout + 5,
+            )
+            result.missing = await loop.run_in_executor(None, _missing, outputs.get(SHOW_ROUTES, ''), expected)
+            result.error = None
+        except Exception as e:
+            # the router may still be reloading its configuration: keep polling
+            result.error = f'Poll failed: {e or type(e).__name__}'
+        if not result.missing and result.error is None:
+            result.converged = True
+            result.seconds = round(time.monotonic() - started, 2)
+            return result
+        if time.monotonic() + interval > deadline:
+            return result
+        await asyncio.sleep(interval)
+
+
+async def wait_for_convergence(testbed, expected: Dict[str, Set[str]], interval: float = 2.0, timeout: float = 180.0,
+                               pool: SshTransportPool = None, started: float = None) -> ConvergenceReport:
+    """Watch every router concurrently; `started` is a time.monotonic() value, default now"""
+    started = time.monotonic() if started is None else started
+    deadline = time.monotonic() + timeout
+    names = list(expected)
+    results = await asyncio.gather(*(
+        watch_router(testbed.devices[name], expected[name], started, deadline, interval, pool) for name in names
+    ))
+    routers = dict(zip(names, results))
+    converged = all(result.converged for result in results)
+    seconds = max((result.seconds for result in results), default=0.0) if converged else None
+    return ConvergenceReport(converged, seconds, routers)
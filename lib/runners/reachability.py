@@ -0,0 +1,181 @@
+"""
+Asyncio reachability prober.
+
+Probes every target at once: an ICMP echo over an unprivileged ping socket
+(or a raw socket when running as root), falling back to TCP connects on
+ports 22, 23 and 443 when ICMP is not allowed or gets no answer. A refused
+connection still proves the host is up. Results come back as a
+device -> target -> result matrix with RTTs.
+
+    python -m lib.runners.reachability testbed.yaml
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import socket
+import struct
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional
+
+TCP_PORTS = (22, 23, 443)
+
+_ICMP_ECHO_REQUEST = 8
+_ICMP_ECHO_REPLY = 0
+_sequence = itertools.count(1)
+
+
+@dataclass
+class ProbeResult:
+    target: str
+    reachable: bool
+    method: Optional[str] = None
+    rtt_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _icmp_socket():
+    """Unprivileged ping socket where net.ipv4.ping_group_range allows it, raw socket otherwise"""
+    try:
+        return socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP), False
+    except PermissionError:
+        return socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP), True
+
+
+async def _icmp_probe(ip: str, timeout: float) -> Optional[float]:
+    """RTT in ms of one echo, None on timeout; raises OSError when ICMP is not permitted"""
+    loop = asyncio.get_running_loop()
+    sock, raw = _icmp_socket()
+    try:
+        sock.setblocking(False)
+        # ping sockets get their identifier from the kernel, raw sockets see every reply and need ours
+        ident = os.getpid() & 0xFFFF
+        seq = next(_sequence) & 0xFFFF
+        header = struct.pack('!BBHHH', _ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+        payload = struct.pack('!d', time.time())
+        packet = struct.pack('!BBHHH', _ICMP_ECHO_REQUEST, 0, _checksum(header + payload), ident, seq) + payload
+
+        started = time.perf_counter()
+        await loop.sock_sendto(sock, packet, (ip, 0))
+        deadline = started + timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            try:
+                data, (source, _) = await asyncio.wait_for(loop.sock_recvfrom(sock, 1024), remaining)
+            except asyncio.TimeoutError:
+                return None
+            if raw:
+                data = data[(data[0] & 0x0F) * 4:]
+            if len(data) < 8 or source != ip:
+                continue
+            msg_type, _, _, reply_ident, reply_seq = struct.unpack('!BBHHH', data[:8])
+            if msg_type == _ICMP_ECHO_REPLY and reply_seq == seq and (not raw or reply_ident == ident):
+                return (time.perf_counter() - started) * 1000
+    finally:
+        sock.close()
+
+
+async def _tcp_probe(ip: str, port: int, timeout: float) -> Optional[float]:
+    """RTT in ms of a TCP handshake; a refused connection counts as reachable"""
+    started = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except ConnectionRefusedError:
+        return (time.perf_counter() - started) * 1000
+    except (OSError, asyncio.TimeoutError):
+        return None
+    writer.close()
+    return (time.perf_counter() - started) * 1000
+
+
+async def probe(ip: str, timeout: float = 1.0, ports: Iterable[int] = TCP_PORTS, icmp: bool = True) -> ProbeResult:
+    error = None
+    if icmp:
+        try:
+            rtt = await _icmp_probe(ip, timeout)
+            if rtt is not None:
+                return ProbeResult(ip, True, 'icmp', round(rtt, 2))
+        except OSError as e:
+            # no ICMP permission: rely on TCP only
+            error = f'icmp: {e.strerror or e}'
+
+    ports = list(ports)
+    rtts = await asyncio.gather(*(_tcp_probe(ip, port, timeout) for port in ports))
+    answered = [(rtt, port) for rtt, port in zip(rtts, ports) if rtt is not None]
+    if answered:
+        rtt, port = min(answered)
+        return ProbeResult(ip, True, f'tcp/{port}', round(rtt, 2))
+    return ProbeResult(ip, False, error=error or 'no answer')
+
+
+async def probe_matrix(targets: Dict[str, List[str]], timeout: float = 1.0, concurrency: int = 256,
+                       ports: Iterable[int] = TCP_PORTS) -> Dict[str, Dict[str, ProbeResult]]:
+    """Probe every target of every device concurrently; returns device -> ip -> result"""
+    slots = asyncio.Semaphore(concurrency)
+    ports = tuple(ports)
+
+    async def bounded(ip):
+        async with slots:
+            return await probe(ip, timeout, ports)
+
+    pairs = [(device, ip) for device, ips in targets.items() for ip in ips]
+    results = await asyncio.gather(*(bounded(ip) for _, ip in pairs))
+    matrix = {device: {} for device in targets}
+    for (device, ip), result in zip(pairs, results):
+        matrix[device][ip] = result
+    return matrix
+
+
+def interface_targets(testbed, skip: Iterable[str] = ('UbuntuServer',)) -> Dict[str, List[str]]:
+    """Interface IPs of every testbed device, keyed by device"""
+    skip = set(skip)
+    targets = {}
+    for dev_name, device in testbed.devices.items():
+        if dev_name in skip:
+            continue
+        ips = [intf.ipv4.ip.compressed for intf in device.interfaces.values() if getattr(intf, 'ipv4', None)]
+        if ips:
+            targets[dev_name] = ips
+    return targets
+
+
+def format_matrix(matrix: Dict[str, Dict[str, ProbeResult]]) -> str:
+    lines = []
+    width = max((len(device) for device in matrix), default=6)
+    for device, row in matrix.items():
+        cells = [
+            f'{ip} {result.method} {result.rtt_ms}ms' if result.reachable else f'{ip} DOWN'
+            for ip, result in row.items()
+        ]
+        lines.append(f'{device:<{width}}  ' + ' | '.join(cells))
+    return '\n'.join(lines)
+
+
+def matrix_to_dict(matrix: Dict[str, Dict[str, ProbeResult]]) -> Dict[str, Dict[str, dict]]:
+    return {device: {ip: asdict(result) for ip, result in row.items()} for device, row in matrix.items()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Probe every interface IP of a testbed concurrently')
+    parser.add_argument('testbed')
+    parser.add_argument('--timeout', type=float, default=1.0)
+    parser.add_argument('--concurrency', type=int, default=256)
+    args = parser.parse_args()
+
+    from lib.testbed.loader import load
+    result = asyncio.run(probe_matrix(interface_targets(load(args.testbed)), args.timeout, args.concurrency))
+    print(format_matrix(result))
+    sys.exit(0 if all(r.reachable for row in result.values() for r in row.values()) else 1)
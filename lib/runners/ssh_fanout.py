@@ -0,0 +1,135 @@
+import argparse
+import json
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, TextIO
+
+from lib.connectors.ssh_con import SshConnection, SshTransportPool, default_pool
+
+
+def _plaintext(secret):
+    return getattr(secret, 'plaintext', secret)
+
+
+def testbed_targets(testbed, device_type: Optional[str] = None) -> List[Dict]:
+    """Build fan-out targets from every testbed device that has an ssh connection."""
+    targets = []
+    for name, device in testbed.devices.items():
+        if device_type and getattr(device, 'type', '') != device_type:
+            continue
+        if 'ssh' not in device.connections:
+            continue
+        ssh = device.connections.ssh
+        targets.append({
+            'name': name,
+            'host': str(ssh.ip),
+            'port': int(ssh.get('port', 22)),
+            'username': device.credentials.default.username,
+            'password': _plaintext(device.credentials.default.password),
+        })
+    return targets
+
+
+def _run_device(target: Dict, commands: List[str], timeout: float, pool: SshTransportPool) -> Dict:
+    """Connect and run every command within one deadline of `timeout` seconds for the device.
+
+    When the deadline passes the channels this task opened are closed, which
+    fails the commands still blocked on them, so a hung device frees its
+    worker; the pooled transport stays up for anyone else using it.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    result = {'device': target['name'], 'host': target['host'], 'status': 'ok', 'outputs': [], 'error': None}
+    conn = SshConnection(target['host'], target['port'], target['username'], target['password'], pool=pool)
+    watchdog = threading.Timer(timeout, conn.abort)
+    watchdog.daemon = True
+    watchdog.start()
+    try:
+        conn.connect(timeout=timeout)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise socket.timeout('device timeout reached after connect')
+        result['outputs'] = [
+            {'command': command, 'output': output}
+            for command, output in conn.execute_many(commands, timeout=remaining, deadline=deadline)
+        ]
+    except socket.timeout as e:
+        result.update(status='timeout', error=str(e) or 'timed out')
+    except Exception as e:
+        if time.monotonic() >= deadline:
+            # the watchdog closed the channel under a running command
+            result.update(status='timeout', error=f'exceeded {timeout}s ({e or type(e).__name__})')
+        else:
+            result.update(status='error', error=str(e))
+    finally:
+        watchdog.cancel()
+    result['elapsed'] = round(time.monotonic() - start, 3)
+    return result
+
+
+def run_targets(
+    targets: Iterable[Dict],
+    commands: List[str],
+    max_workers: int = 16,
+    timeout: float = 60.0,
+    output: Optional[TextIO] = sys.stdout,
+    pool: SshTransportPool = None,
+) -> Dict:
+    """Run commands on all targets over a bounded worker pool.
+
+    Each device result is written as one JSON line to ``output`` as soon as
+    it finishes, followed by a final summary line with throughput figures.
+    """
+    targets = list(targets)
+    pool = pool or default_pool
+    results = []
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets) or 1))) as executor:
+        futures = [executor.submit(_run_device, target, commands, timeout, pool) for target in targets]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if output is not None:
+                output.write(json.dumps(result) + '\n')
+                output.flush()
+
+    elapsed = time.monotonic() - start
+    succeeded = [r for r in results if r['status'] == 'ok']
+    summary = {
+        'devices': len(results),
+        'succeeded': len(succeeded),
+        'failed': len(results) - len(succeeded),
+        'commands': len(succeeded) * len(commands),
+        'elapsed': round(elapsed, 3),
+        'slowest_device': max((r['elapsed'] for r in results), default=0.0),
+        'devices_per_sec': round(len(results) / elapsed, 2) if elapsed else 0.0,
+        'commands_per_sec': round(len(succeeded) * len(commands) / elapsed, 2) if elapsed else 0.0,
+    }
+    if output is not None:
+        output.write(json.dumps({'summary': summary}) + '\n')
+        output.flush()
+    return {'results': results, 'summary': summary}
+
+
+def run_testbed(testbed, commands: List[str], device_type: Optional[str] = None, **kwargs) -> Dict:
+    if isinstance(testbed, str):
+        from pyats import topology
+        testbed = topology.loader.load(testbed)
+    return run_targets(testbed_targets(testbed, device_type=device_type), commands, **kwargs)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run commands on every SSH device of a testbed')
+    parser.add_argument('testbed')
+    parser.add_argument('commands', nargs='+')
+    parser.add_argument('--type', dest='device_type', default=None)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--timeout', type=float, default=60.0)
+    args = parser.parse_args()
+
+    run_testbed(args.testbed, args.commands, device_type=args.device_type,
+                max_workers=args.workers, timeout=args.timeout)
+    default_pool.close_all()
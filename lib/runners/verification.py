@@ -0,0 +1,193 @@
+"""
+Post-configuration verification of IOS routers.
+
+Collects `show ip interface brief` and `show ip route` from every router at
+once over pooled SSH transports, parses them into records off the event
+loop and compares them with the testbed: every interface carries its
+testbed address and is up/up, every interface network is a connected
+route, and optionally every expected prefix is in the routing table.
+
+    results = asyncio.run(verify_devices(testbed, ['IOU1', 'Router']))
+    for name, result in results.items():
+        print(name, result.passed, result.differences)
+"""
+import asyncio
+import ipaddress
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from lib.connectors.ssh_con import SshConnection, SshTransportPool, default_pool
+from lib.testbed.addressing import classful_network
+
+SHOW_INTERFACES = 'show ip interface brief'
+SHOW_ROUTES = 'show ip route'
+
+_ROUTE_LINE = re.compile(
+    r'^(?P<code>[A-Za-z]\*?(?: [A-Za-z0-9]{1,2})?)\s+'
+    r'(?P<network>\d+\.\d+\.\d+\.\d+)(?:/(?P<prefixlen>\d+))?\s+(?P<rest>.*)$'
+)
+_SUBNETTED = re.compile(r'^\s+(?P<network>\d+\.\d+\.\d+\.\d+)/(?P<prefixlen>\d+) is (?P<variably>variably )?subnetted')
+_CONTINUATION = re.compile(r'^\s+\[\d+/\d+\] via (?P<via>\d+\.\d+\.\d+\.\d+)')
+_UPTIME = re.compile(r'^\d+[:dhwmy]')
+
+
+def parse_ip_interface_brief(output: str) -> Dict[str, dict]:
+    interfaces = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) < 6 or parts[0] == 'Interface' or parts[2] not in ('YES', 'NO'):
+            continue
+        interfaces[parts[0]] = {
+            'ip': None if parts[1] == 'unassigned' else parts[1],
+            'method': parts[3],
+            'status': ' '.join(parts[4:-1]),
+            'protocol': parts[-1],
+        }
+    return interfaces
+
+
+def parse_ip_route(output: str) -> Dict[str, dict]:
+    """Routes keyed by prefix ('10.1.1.0/24') with their code, next hops and interface"""
+    routes = {}
+    # (major network, mask of its subnets) from the last "is subnetted" header
+    major = None
+    last = None
+    for line in output.splitlines():
+        header = _SUBNETTED.match(line)
+        if header:
+            address, prefixlen = header.group('network'), int(header.group('prefixlen'))
+            if header.group('variably'):
+                # "10.0.0.0/8 is variably subnetted": the subnets carry their own lengths
+                major = (ipaddress.ip_network(f'{address}/{prefixlen}', strict=False), None)
+            else:
+                # "10.0.0.0/24 is subnetted": the lines below leave out the /24
+                major = (classful_network(address), prefixlen)
+            continue
+        continuation = _CONTINUATION.match(line)
+        if continuation and last is not None:
+            last['via'].append(continuation.group('via'))
+            continue
+        match = _ROUTE_LINE.match(line)
+        if not match:
+            continue
+        try:
+            address = ipaddress.ip_address(match.group('network'))
+        except ValueError:
+            continue
+        if major is not None and address not in major[0]:
+            major = None
+        prefixlen = match.group('prefixlen')
+        if prefixlen is None:
+            # outside a subnetted major network IOS leaves out the length of classful networks only
+            prefixlen = major[1] if major is not None and major[1] is not None else classful_network(address).prefixlen
+        network = ipaddress.ip_network(f'{address}/{prefixlen}', strict=False)
+        rest = match.group('rest')
+        interface = None
+        if 'directly connected,' in rest:
+            interface = rest.split('directly connected,', 1)[1].strip()
+        elif ',' in rest:
+            tail = rest.rsplit(',', 1)[1].strip()
+            interface = None if _UPTIME.match(tail) else tail
+        last = {
+            'code': match.group('code').strip(),
+            'via': re.findall(r'via (\d+\.\d+\.\d+\.\d+)', rest),
+            'interface': interface,
+        }
+        routes[network.compressed] = last
+    return routes
+
+
+@dataclass
+class VerificationResult:
+    device: str
+    passed: bool
+    differences: List[str] = field(default_factory=list)
+    interfaces: Dict[str, dict] = field(default_factory=dict)
+    routes: Dict[str, dict] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def compare_with_intent(device, interfaces: Dict[str, dict], routes: Dict[str, dict],
+                        expected_routes: Iterable[str] = ()) -> List[str]:
+    """Differences between the parsed device state and the testbed interfaces"""
+    differences = []
+    for intf_name, intf in device.interfaces.items():
+        ipv4 = getattr(intf, 'ipv4', None)
+        if not ipv4:
+            continue
+        actual = interfaces.get(intf_name)
+        if actual is None:
+            differences.append(f'{intf_name}: not present on the device')
+            continue
+        if actual['ip'] != ipv4.ip.compressed:
+            differences.append(f'{intf_name}: expected {ipv4.ip.compressed}, found {actual["ip"] or "unassigned"}')
+        if actual['status'] != 'up' or actual['protocol'] != 'up':
+            differences.append(f'{intf_name}: {actual["status"]}/{actual["protocol"]}')
+        network = ipv4.network.compressed
+        if routes.get(network, {}).get('code') != 'C':
+            differences.append(f'{network}: no connected route')
+    for prefix in expected_routes:
+        if ipaddress.ip_network(prefix).compressed not in routes:
+            differences.append(f'{prefix}: missing from the routing table')
+    return differences
+
+
+def ssh_target(device) -> Optional[tuple]:
+    """(host, port, username, password) for the device's management interface"""
+    index = getattr(getattr(device, 'testbed', None), 'index', None)
+    if index is not None:
+        mgmt = index.interface(device.name, 'initial')
+    else:
+        mgmt = next((i for i in device.interfaces.values() if getattr(i, 'alias', None) == 'initial'), None)
+    if mgmt is None or not getattr(mgmt, 'ipv4', None):
+        return None
+    port = device.connections.ssh.get('port', 22) if 'ssh' in device.connections else 22
+    credentials = device.credentials.default
+    return mgmt.ipv4.ip.compressed, port, credentials.username, credentials.password.plaintext
+
+
+def collect(target: tuple, commands: Iterable[str], pool: SshTransportPool = None, timeout: float = 30.0) -> Dict[str, str]:
+    """Run distinct show commands on parallel channels of one pooled transport (blocking); command -> output"""
+    host, port, username, password = target
+    conn = SshConnection(host, port, username, password, pool=pool or default_pool)
+    conn.connect(timeout=timeout)
+    return dict(conn.execute_many(list(dict.fromkeys(commands)), timeout=timeout))
+
+
+def _parse_and_compare(device, outputs: Dict[str, str], expected_routes) -> VerificationResult:
+    interfaces = parse_ip_interface_brief(outputs.get(SHOW_INTERFACES, ''))
+    routes = parse_ip_route(outputs.get(SHOW_ROUTES, ''))
+    differences = compare_with_intent(device, interfaces, routes, expected_routes)
+    return VerificationResult(device.name, not differences, differences, interfaces, routes)
+
+
+async def verify_device(device, expected_routes: Iterable[str] = (), pool: SshTransportPool = None,
+                        timeout: float = 30.0) -> VerificationResult:
+    loop = asyncio.get_running_loop()
+    target = ssh_target(device)
+    if target is None:
+        return VerificationResult(device.name, False, error='No management interface (alias initial)')
+    try:
+        outputs = await asyncio.wait_for(
+            loop.run_in_executor(None, collect, target, (SHOW_INTERFACES, SHOW_ROUTES), pool, timeout),
+            timeout=timeout + 10,
+        )
+    except Exception as e:
+        return VerificationResult(device.name, False, error=f'Collection failed: {e or type(e).__name__}')
+    # regex parsing of large tables stays off the event loop as well
+    return await loop.run_in_executor(None, _parse_and_compare, device, outputs, tuple(expected_routes))
+
+
+async def verify_devices(testbed, device_names: Iterable[str], expected_routes: Dict[str, Iterable[str]] = None,
+                         pool: SshTransportPool = None, timeout: float = 30.0) -> Dict[str, VerificationResult]:
+    """Verify every device concurrently; expected_routes maps device -> prefixes it must have"""
+    expected_routes = expected_routes or {}
+    names = list(device_names)
+    results = await asyncio.gather(*(
+        verify_device(testbed.devices[name], expected_routes.get(name, ()), pool, timeout) for name in names
+    ))
+    return dict(zip(names, results))
@@ -0,0 +1,134 @@
+"""
+Address planning for testbeds.
+
+Checks interface addressing before anything is pushed (duplicate IPs,
+overlapping or reused subnets, links mixing subnets) and computes the
+smallest routing statements that cover a set of networks: summarized static
+routes and classful RIP `network` statements.
+
+    from lib.testbed.loader import load
+    from lib.testbed.addressing import check_addressing
+
+    errors = check_addressing(load('testbed.yaml'))
+"""
+import ipaddress
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class PrefixTrie:
+    """Binary trie over IPv4 prefixes, one level per address bit"""
+
+    __slots__ = ('_root', '_size')
+
+    def __init__(self):
+        # node = [zero child, one child, value or None]
+        self._root = [None, None, None]
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _bits(network: ipaddress.IPv4Network):
+        address = int(network.network_address)
+        for depth in range(network.prefixlen):
+            yield (address >> (31 - depth)) & 1
+
+    def insert(self, network: ipaddress.IPv4Network, value) -> List[Tuple[ipaddress.IPv4Network, object]]:
+        """Store a prefix and return the already stored prefixes covering it (including itself)"""
+        covering = []
+        node = self._root
+        if node[2] is not None:
+            covering.append(node[2])
+        for bit in self._bits(network):
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+            if node[2] is not None:
+                covering.append(node[2])
+        if node[2] is None:
+            self._size += 1
+            node[2] = (network, value)
+        return covering
+
+
+def _interfaces(testbed):
+    for dev_name, device in testbed.devices.items():
+        for intf_name, intf in device.interfaces.items():
+            ipv4 = getattr(intf, 'ipv4', None)
+            if ipv4:
+                link = getattr(getattr(intf, 'link', None), 'name', None)
+                yield dev_name, intf_name, link, ipaddress.IPv4Interface(str(ipv4))
+
+
+def check_addressing(testbed) -> List[str]:
+    """Duplicate IPs, subnets reused or overlapping across links, links mixing subnets.
+
+    Sorting the subnets puts every supernet before its subnets, so one pass of
+    trie inserts finds all overlaps in O(n log n).
+    """
+    errors = []
+    owners: Dict[ipaddress.IPv4Address, List[str]] = {}
+    subnet_links: Dict[ipaddress.IPv4Network, set] = {}
+    link_subnets: Dict[str, set] = {}
+
+    for dev_name, intf_name, link, ipv4 in _interfaces(testbed):
+        owners.setdefault(ipv4.ip, []).append(f'{dev_name} {intf_name}')
+        if ipv4.network.prefixlen < 31 and ipv4.ip in (ipv4.network.network_address, ipv4.network.broadcast_address):
+            errors.append(f'{dev_name} {intf_name}: {ipv4} is not a host address')
+        # interfaces without a link are their own segment
+        segment = link or f'{dev_name} {intf_name}'
+        subnet_links.setdefault(ipv4.network, set()).add(segment)
+        link_subnets.setdefault(segment, set()).add(ipv4.network)
+
+    for ip, where in owners.items():
+        if len(where) > 1:
+            errors.append(f'Duplicate IP {ip} on {", ".join(where)}')
+
+    for link, subnets in sorted(link_subnets.items()):
+        if len(subnets) > 1:
+            errors.append(f'Link {link} mixes subnets {", ".join(str(s) for s in sorted(subnets))}')
+
+    trie = PrefixTrie()
+    for network in sorted(subnet_links, key=lambda n: (int(n.network_address), n.prefixlen)):
+        links = sorted(subnet_links[network])
+        if len(links) > 1:
+            errors.append(f'Subnet {network} is used on several links: {", ".join(links)}')
+        for covering, covering_links in trie.insert(network, links):
+            if covering != network:
+                errors.append(f'Subnet {network} ({", ".join(links)}) overlaps {covering} ({", ".join(covering_links)})')
+    return errors
+
+
+def summarize(networks: Iterable) -> List[ipaddress.IPv4Network]:
+    """Smallest set of prefixes covering exactly the given networks"""
+    return list(ipaddress.collapse_addresses(ipaddress.IPv4Network(str(n)) for n in networks))
+
+
+def summarize_routes(routes: Dict[str, str]) -> Dict[str, str]:
+    """Merge routes that share a gateway into covering prefixes.
+
+    Only exact unions are merged, so a summary never captures address space
+    that was not routed through the same gateway.
+    """
+    by_gateway: Dict[str, List[str]] = {}
+    for network, gateway in routes.items():
+        by_gateway.setdefault(gateway, []).append(network)
+    summarized = {}
+    for gateway, networks in by_gateway.items():
+        for network in summarize(networks):
+            summarized[network.compressed] = gateway
+    return dict(sorted(summarized.items(), key=lambda item: ipaddress.IPv4Network(item[0])))
+
+
+def classful_network(address) -> ipaddress.IPv4Network:
+    address = ipaddress.IPv4Address(str(address).split('/')[0])
+    first_octet = int(address) >> 24
+    prefixlen = 8 if first_octet < 128 else 16 if first_octet < 192 else 24
+    return ipaddress.IPv4Network((address, prefixlen), strict=False)
+
+
+def rip_networks(networks: Iterable) -> List[str]:
+    """RIP `network` statements are classful: one per major network is enough"""
+    majors = {classful_network(ipaddress.IPv4Network(str(n)).network_address) for n in networks}
+    return [str(network.network_address) for network in sorted(majors)]
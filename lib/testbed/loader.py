@@ -0,0 +1,359 @@
+"""
+Lightweight testbed loader.
+
+Reads a pyATS testbed YAML (following `extends:` like the pyATS loader) into
+small `__slots__` records with the attributes scripts actually use: names,
+types, credentials, connections, interfaces and links. pyATS is only imported
+when something outside that subset is touched, e.g. `device.connect()` or
+`testbed.pyats`, which builds the real topology from the same data once.
+
+    from lib.testbed.loader import load
+
+    tb = load('testbed.yaml')
+    for name, device in tb.devices.items():
+        print(name, device.type, device.connections.telnet.ip)
+"""
+import copy
+import hashlib
+import importlib
+import ipaddress
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+import yaml
+
+
+def _merge(base: dict, override: dict) -> dict:
+    """Recursive dict merge, values of override win"""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def resolve_extends(path: str, _seen: Optional[tuple] = None) -> Tuple[dict, List[str]]:
+    """Load a testbed YAML and everything it extends.
+
+    Each extended file overrides the previous one and the file itself
+    overrides them all. Returns the merged dict and the absolute paths of
+    every file involved, in resolution order.
+    """
+    path = os.path.abspath(path)
+    seen = _seen or ()
+    if path in seen:
+        raise ValueError(f"Circular 'extends' involving {os.path.basename(path)}")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Testbed file not found: {os.path.basename(path)}")
+
+    with open(path) as f:
+        data = yaml.safe_load(f) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{os.path.basename(path)} is not a YAML mapping")
+
+    extends = data.pop('extends', None) or []
+    if isinstance(extends, str):
+        extends = [extends]
+
+    merged, files = {}, []
+    for parent in extends:
+        parent_data, parent_files = resolve_extends(os.path.join(os.path.dirname(path), parent), seen + (path,))
+        merged = _merge(merged, parent_data)
+        files.extend(parent_files)
+    files.append(path)
+    return _merge(merged, data), files
+
+
+def content_hash(files: List[str]) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(set(files)):
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def testbed_hash(path: str) -> str:
+    """Content hash of a testbed file and everything it extends, the key of every testbed cache.
+
+    The file list comes from resolve_extends, so the key covers exactly the
+    files the merged model is built from.
+    """
+    return content_hash(resolve_extends(path)[1])
+
+
+class AttrDict(dict):
+    """dict with attribute access, like the pyATS containers (`device.connections.ssh`)"""
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+class AliasDict(AttrDict):
+    """Devices or interfaces by name, falling back to their alias like pyATS does"""
+    __slots__ = ()
+
+    def __missing__(self, key):
+        for value in self.values():
+            if getattr(value, 'alias', None) == key:
+                return value
+        raise KeyError(key)
+
+
+class Secret(str):
+    """Password string exposing `.plaintext` like pyATS SecretString"""
+    __slots__ = ()
+
+    @property
+    def plaintext(self) -> str:
+        return str(self)
+
+
+@dataclass(slots=True)
+class Credential:
+    username: Optional[str] = None
+    password: Optional[Secret] = None
+
+
+@dataclass(slots=True)
+class Connection:
+    name: str
+    protocol: Optional[str] = None
+    ip: Optional[Union[ipaddress.IPv4Address, ipaddress.IPv6Address]] = None
+    port: Optional[int] = None
+    cls: Optional[str] = None
+    extra: AttrDict = field(default_factory=AttrDict)
+
+    def get(self, key: str, default=None):
+        """Dict-style lookup, as on pyATS connection blocks"""
+        if key == 'class':
+            # pyATS hands out the imported class, not its dotted path
+            return _import_class(self.cls) if self.cls else default
+        if key in ('name', 'protocol', 'ip', 'port'):
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default)
+
+    def __getitem__(self, key: str):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        try:
+            return self.extra[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+@dataclass(slots=True, eq=False)
+class Link:
+    name: str
+    interfaces: List['Interface'] = field(default_factory=list, repr=False)
+
+
+@dataclass(slots=True, eq=False)
+class Interface:
+    name: str
+    device: 'Device' = field(repr=False)
+    type: Optional[str] = None
+    alias: Optional[str] = None
+    ipv4: Optional[ipaddress.IPv4Interface] = None
+    ipv6: Optional[ipaddress.IPv6Interface] = None
+    link: Optional[Link] = None
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(_pyats(self.device.testbed, name).devices[self.device.name].interfaces[self.name], name)
+
+
+@dataclass(slots=True, eq=False)
+class Device:
+    name: str
+    testbed: 'Testbed' = field(repr=False)
+    type: Optional[str] = None
+    os: Optional[str] = None
+    platform: Optional[str] = None
+    alias: Optional[str] = None
+    credentials: AttrDict = field(default_factory=AttrDict, repr=False)
+    connections: AttrDict = field(default_factory=AttrDict, repr=False)
+    interfaces: Dict[str, Interface] = field(default_factory=AliasDict, repr=False)
+    custom: AttrDict = field(default_factory=AttrDict, repr=False)
+
+    def __getattr__(self, name):
+        # connect(), execute(), parse(), api... live on the real pyATS device
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(_pyats(self.testbed, name).devices[self.name], name)
+
+
+@dataclass(slots=True, eq=False)
+class Testbed:
+    name: Optional[str] = None
+    devices: Dict[str, Device] = field(default_factory=AliasDict, repr=False)
+    links: Dict[str, Link] = field(default_factory=AttrDict, repr=False)
+    credentials: AttrDict = field(default_factory=AttrDict, repr=False)
+    raw: dict = field(default_factory=dict, repr=False)
+    index: Optional['TestbedIndex'] = field(default=None, repr=False)
+    _pyats: object = field(default=None, repr=False)
+
+    @property
+    def pyats(self):
+        """The full pyATS testbed, built from the same data on first use"""
+        if self._pyats is None:
+            from pyats.topology import loader
+            self._pyats = loader.load(copy.deepcopy(self.raw))
+        return self._pyats
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(_pyats(self, name), name)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Testbed':
+        """Build records from an already merged testbed dict"""
+        testbed = cls(name=(data.get('testbed') or {}).get('name'), raw=data)
+        testbed.credentials = _credentials((data.get('testbed') or {}).get('credentials'))
+
+        for dev_name, dev in (data.get('devices') or {}).items():
+            dev = dev or {}
+            device = Device(
+                name=dev_name,
+                testbed=testbed,
+                type=dev.get('type'),
+                os=dev.get('os'),
+                platform=dev.get('platform'),
+                alias=dev.get('alias', dev_name),
+                # devices fall back to the testbed-wide credentials
+                credentials=AttrDict(testbed.credentials, **_credentials(dev.get('credentials'))),
+                connections=AttrDict({
+                    conn_name: _connection(conn_name, conn)
+                    for conn_name, conn in (dev.get('connections') or {}).items()
+                    if isinstance(conn, dict)
+                }),
+                custom=AttrDict(dev.get('custom') or {}),
+            )
+            testbed.devices[dev_name] = device
+
+        for dev_name, topo in (data.get('topology') or {}).items():
+            device = testbed.devices.get(dev_name)
+            if device is None:
+                continue
+            for intf_name, intf in ((topo or {}).get('interfaces') or {}).items():
+                intf = intf or {}
+                interface = Interface(
+                    name=intf_name,
+                    device=device,
+                    type=intf.get('type'),
+                    alias=intf.get('alias'),
+                    ipv4=ipaddress.IPv4Interface(str(intf['ipv4'])) if intf.get('ipv4') else None,
+                    ipv6=ipaddress.IPv6Interface(str(intf['ipv6'])) if intf.get('ipv6') else None,
+                )
+                if intf.get('link'):
+                    link = testbed.links.setdefault(intf['link'], Link(intf['link']))
+                    link.interfaces.append(interface)
+                    interface.link = link
+                device.interfaces[intf_name] = interface
+        testbed.index = TestbedIndex(testbed)
+        return testbed
+
+
+class TestbedIndex:
+    """Devices by type, interfaces by link and by (device, alias), built once per load.
+
+    Works on these records as well as on a loaded pyATS testbed.
+    """
+    __slots__ = ('by_type', 'by_link', 'by_alias')
+
+    def __init__(self, testbed):
+        self.by_type: Dict[Optional[str], List] = {}
+        self.by_link: Dict[str, List] = {}
+        self.by_alias: Dict[Tuple[str, str], object] = {}
+        for dev_name, device in testbed.devices.items():
+            self.by_type.setdefault(getattr(device, 'type', None), []).append(device)
+            for intf in device.interfaces.values():
+                link = getattr(getattr(intf, 'link', None), 'name', None)
+                if link:
+                    self.by_link.setdefault(link, []).append(intf)
+                alias = getattr(intf, 'alias', None)
+                if alias:
+                    self.by_alias.setdefault((dev_name, alias), intf)
+
+    def devices(self, device_type: str) -> List:
+        return self.by_type.get(device_type, [])
+
+    def first(self, device_type: str):
+        """First device of a type, or None"""
+        devices = self.by_type.get(device_type)
+        return devices[0] if devices else None
+
+    def endpoints(self, link: str) -> List:
+        """Interfaces attached to a link"""
+        return self.by_link.get(link, [])
+
+    def interface(self, device_name: str, alias: str):
+        """Interface of a device by its alias, or None"""
+        return self.by_alias.get((device_name, alias))
+
+
+def _pyats(testbed: 'Testbed', name: str):
+    """pyATS testbed for the attribute fallback; without pyATS the attribute just doesn't exist"""
+    try:
+        return testbed.pyats
+    except ImportError as e:
+        # getattr(obj, name, default) and hasattr() only swallow AttributeError
+        raise AttributeError(f"{name!r} needs pyATS, which is not installed") from e
+
+
+def _credentials(data: Optional[dict]) -> AttrDict:
+    return AttrDict({
+        name: Credential(
+            username=cred.get('username'),
+            password=Secret(cred['password']) if cred.get('password') is not None else None,
+        )
+        for name, cred in (data or {}).items()
+        if isinstance(cred, dict)
+    })
+
+
+def _connection(name: str, data: dict) -> Connection:
+    known = ('protocol', 'ip', 'port', 'class')
+    extra = AttrDict({key: value for key, value in data.items() if key not in known})
+    if 'credentials' in extra:
+        extra['credentials'] = _credentials(extra['credentials'])
+    return Connection(
+        name=name,
+        protocol=data.get('protocol'),
+        ip=ipaddress.ip_address(str(data['ip']).strip()) if data.get('ip') else None,
+        port=int(data['port']) if data.get('port') is not None else None,
+        cls=data.get('class'),
+        extra=extra,
+    )
+
+
+def _import_class(path: str):
+    module_name, _, class_name = path.rpartition('.')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def load(testbed: Union[str, dict]) -> Testbed:
+    """Load a testbed file (or merged dict) into lightweight records"""
+    if isinstance(testbed, dict):
+        return Testbed.from_dict(testbed)
+    data, _ = resolve_extends(testbed)
+    return Testbed.from_dict(data)
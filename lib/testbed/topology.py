@@ -0,0 +1,194 @@
+"""
+Topology graph of a testbed, used to derive the routes a host needs.
+
+Devices are joined by the links their interfaces sit on. From a root host
+(normally the UbuntuServer) the graph keeps the shortest path to every
+device through forwarding devices (routers, firewalls) and the gateway on
+the root's own link where that path starts. Every subnet behind those
+devices becomes a route `network -> gateway`.
+
+Links can be added and removed afterwards; only the part of the shortest
+path tree that the change touches is recomputed.
+
+    from lib.testbed.loader import load
+    from lib.testbed.topology import TopologyGraph
+
+    graph = TopologyGraph.from_testbed(load('testbed.yaml'))
+    for network, gateway in graph.routes().items():
+        print(network, 'via', gateway)
+"""
+import heapq
+import ipaddress
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+FORWARDING_TYPES = ('router', 'ftd')
+
+_Key = Tuple[int, ipaddress.IPv4Address]
+
+
+class TopologyGraph:
+    """Shortest-path next hops from a root device, maintained incrementally"""
+
+    def __init__(self, root: str, forwarding_types: Iterable[str] = FORWARDING_TYPES):
+        self.root = root
+        self.forwarding_types = set(forwarding_types)
+        self.device_types: Dict[str, Optional[str]] = {}
+        # link -> {device: interface address on that link}
+        self.links: Dict[str, Dict[str, ipaddress.IPv4Interface]] = {}
+        self.device_links: Dict[str, Set[str]] = {}
+        # subnet -> devices with an interface in it
+        self.subnets: Dict[ipaddress.IPv4Network, Set[str]] = {}
+
+        # shortest path tree: (hops, gateway) per device, the (device, link) it was reached from
+        self._key: Dict[str, _Key] = {}
+        self._parent: Dict[str, Tuple[str, str]] = {}
+        self._children: Dict[str, Set[str]] = {}
+        self._routes: Dict[ipaddress.IPv4Network, ipaddress.IPv4Address] = {}
+
+    @classmethod
+    def from_testbed(cls, testbed, root: str = 'UbuntuServer', **kwargs) -> 'TopologyGraph':
+        """Build the graph from a loaded testbed (lightweight records or pyATS)"""
+        graph = cls(root, **kwargs)
+        endpoints: Dict[str, Dict[str, ipaddress.IPv4Interface]] = {}
+        for dev_name, device in testbed.devices.items():
+            graph.add_device(dev_name, getattr(device, 'type', None))
+            for intf in device.interfaces.values():
+                link = getattr(getattr(intf, 'link', None), 'name', None)
+                ipv4 = getattr(intf, 'ipv4', None)
+                if link and ipv4:
+                    endpoints.setdefault(link, {})[dev_name] = ipaddress.IPv4Interface(str(ipv4))
+        for link, members in endpoints.items():
+            graph.add_link(link, members)
+        return graph
+
+    def add_device(self, name: str, device_type: Optional[str] = None):
+        self.device_types[name] = device_type
+        self.device_links.setdefault(name, set())
+        if name == self.root and name not in self._key:
+            self._key[name] = (0, ipaddress.IPv4Address(0))
+            self._relax_from([name])
+
+    def _forwards(self, device: str) -> bool:
+        return device == self.root or self.device_types.get(device) in self.forwarding_types
+
+    def add_link(self, link: str, members: Dict[str, ipaddress.IPv4Interface]):
+        """Attach devices to a link (creating it if needed) and update paths and routes"""
+        current = self.links.setdefault(link, {})
+        for device, ipv4 in members.items():
+            ipv4 = ipaddress.IPv4Interface(str(ipv4))
+            if device not in self.device_types:
+                self.add_device(device)
+            old = current.get(device)
+            current[device] = ipv4
+            self.device_links[device].add(link)
+            if old is not None and old.network != ipv4.network:
+                self._drop_subnet(old.network, device)
+            self.subnets.setdefault(ipv4.network, set()).add(device)
+            self._refresh_routes([ipv4.network])
+        self._relax_from(current)
+
+    def remove_link(self, link: str):
+        """Detach every device from a link and repair the paths that went through it"""
+        members = self.links.pop(link, {})
+        for device in members:
+            self.device_links[device].discard(link)
+        for device, ipv4 in members.items():
+            self._drop_subnet(ipv4.network, device)
+
+        # everything reached through this link loses its path, the rest of the tree stays valid
+        lost = [device for device, (_, via) in self._parent.items() if via == link]
+        invalid = set()
+        while lost:
+            device = lost.pop()
+            if device in invalid:
+                continue
+            invalid.add(device)
+            lost.extend(self._children.get(device, ()))
+        for device in invalid:
+            self._detach(device)
+            del self._key[device]
+
+        # re-enter the invalidated region from its still valid neighbours
+        seeds = set()
+        for device in invalid:
+            for other_link in self.device_links.get(device, ()):
+                seeds.update(d for d in self.links[other_link] if d in self._key)
+        self._relax_from(seeds)
+        self._refresh_routes(self._subnets_of(invalid) | {ipv4.network for ipv4 in members.values()})
+
+    def _drop_subnet(self, network: ipaddress.IPv4Network, device: str):
+        attached = self.subnets.get(network)
+        if attached is None:
+            return
+        # the device may still have another interface in the same subnet
+        if not any(self.links[link][device].network == network for link in self.device_links.get(device, ())):
+            attached.discard(device)
+        if not attached:
+            del self.subnets[network]
+        self._refresh_routes([network])
+
+    def _detach(self, device: str):
+        parent = self._parent.pop(device, None)
+        if parent is not None:
+            self._children[parent[0]].discard(device)
+
+    def _relax_from(self, sources: Iterable[str]):
+        """Dijkstra on (hops, gateway) keys, starting from devices whose key is already known"""
+        heap = [(self._key[s], s) for s in sources if s in self._key]
+        heapq.heapify(heap)
+        changed = set()
+        while heap:
+            key, device = heapq.heappop(heap)
+            if key != self._key.get(device) or not self._forwards(device):
+                continue
+            hops, gateway = key
+            for link in self.device_links.get(device, ()):
+                for neighbour, ipv4 in self.links[link].items():
+                    if neighbour == device or neighbour == self.root:
+                        continue
+                    # the first hop's address on the root link is the gateway for everything behind it
+                    candidate = (hops + 1, ipv4.ip if device == self.root else gateway)
+                    if candidate < self._key.get(neighbour, (float('inf'),)):
+                        self._key[neighbour] = candidate
+                        self._detach(neighbour)
+                        self._parent[neighbour] = (device, link)
+                        self._children.setdefault(device, set()).add(neighbour)
+                        changed.add(neighbour)
+                        heapq.heappush(heap, (candidate, neighbour))
+        if changed:
+            self._refresh_routes(self._subnets_of(changed))
+
+    def _subnets_of(self, devices: Iterable[str]) -> Set[ipaddress.IPv4Network]:
+        return {
+            self.links[link][device].network
+            for device in devices
+            for link in self.device_links.get(device, ())
+        }
+
+    def _refresh_routes(self, networks: Iterable[ipaddress.IPv4Network]):
+        root_networks = self._subnets_of([self.root])
+        for network in networks:
+            self._routes.pop(network, None)
+            if network in root_networks:
+                continue
+            keys = [self._key[d] for d in self.subnets.get(network, ()) if d in self._key and d != self.root]
+            if keys:
+                self._routes[network] = min(keys)[1]
+
+    def next_hop(self, device: str) -> Optional[str]:
+        """Gateway the root uses to reach a device, None if unreachable or directly connected"""
+        key = self._key.get(device)
+        if key is None or device == self.root:
+            return None
+        return key[1].compressed
+
+    def distance(self, device: str) -> Optional[int]:
+        key = self._key.get(device)
+        return key[0] if key else None
+
+    def routes(self) -> Dict[str, str]:
+        """Routes the root needs for every subnet it is not directly attached to"""
+        return {
+            network.compressed: gateway.compressed
+            for network, gateway in sorted(self._routes.items())
+        }
@@ -1,24 +1,15 @@
-# add multiple routes in parallel using multi processing
+# add multiple routes with a single ip -batch process instead of one process per route
 
 # Andrei Rad
-import multiprocessing as mp
-import subprocess
-
-
-def add_routes(dest_ip, next_hop):
-    subprocess.run(['ip', 'route', 'add', f'{dest_ip}/24', 'via', f'{next_hop}'])
+from lib.hostnet.ip_batch import IpBatch
 
 
 if __name__ == '__main__':
-    subprocess.run(['ip', 'addr', 'add', '192.168.100.100/24', 'dev', 'ens4'])
-    processes = []
+    batch = IpBatch(sudo=False)
+    batch.address_add('192.168.100.100/24', 'ens4')
     for i in range(1, 5):
-        p = mp.Process(target=add_routes, args=(f'192.168.10{i}.0', f'192.168.100.{1}'))
-        processes.append(p)
-    print("Starting to set routes")
-    for proc in processes:
-        proc.start()
+        batch.route_add(f'192.168.10{i}.0/24', '192.168.100.1')
     print("Setting routes")
-    for proc in processes:
-        proc.join()
-    print("All processes finished")
+    for result in batch.run():
+        print(f"{result.command}: {'ok' if result.ok else result.error}")
+    print("All routes processed")
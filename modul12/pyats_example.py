@@ -3,10 +3,13 @@ import subprocess
 import sys
 import time
 
-from pyats import aetest, topology
+from pyats import aetest
 
 import modul12.commands as ssh_commands
 from lib.connectors.telnet_con import TelnetConnection
+from lib.pyats_tools.connect import gather_devices
+from lib.testbed import loader
+from lib.testbed.topology import TopologyGraph
 
 print(sys.path)
 
@@ -15,7 +18,7 @@ class CommonSetup(aetest.CommonSetup):
     @aetest.subsection
     def load_testbed(self, steps):
         with steps.start("Load testbed"):
-            self.tb = topology.loader.load('testbed.yaml')
+            self.tb = loader.load('testbed.yaml')
             self.parent.parameters.update(tb=self.tb)
 
     @aetest.subsection
@@ -29,59 +32,85 @@ class CommonSetup(aetest.CommonSetup):
                 subprocess.run(['sudo', 'ip', 'link', 'set', 'dev', f'{intf_name}', 'up'])
 
         with steps.start('Add routes'):
-            for device in self.tb.devices:
-                if self.tb.devices[device].type != 'router':
-                    continue
-                gateway = self.tb.devices[device].interfaces['initial'].ipv4.ip.compressed
-                for interface in self.tb.devices[device].interfaces:
-                    if self.tb.devices[device].interfaces[interface].link.name == 'management':
-                        continue
-                    subnet = self.tb.devices[device].interfaces[interface].ipv4.network.compressed
-                    subprocess.run(['sudo', 'ip', 'route', 'add', f'{subnet}', 'via', f'{gateway}'])
+            # shortest-path next hop from the server for every subnet behind the routers
+            graph = TopologyGraph.from_testbed(self.tb, root='UbuntuServer')
+            for subnet, gateway in graph.routes().items():
+                subprocess.run(['sudo', 'ip', 'route', 'add', f'{subnet}', 'via', f'{gateway}'])
 
         time.sleep(2)
 
     @aetest.subsection
     def bring_up_router_interface(self, steps):
-        for device in self.tb.devices:
-            if self.tb.devices[device].type != 'router':
+        # management endpoints of the routers, straight from the link index
+        jobs = {}
+        commands = {}
+        for intf_obj in self.tb.index.endpoints('management'):
+            if intf_obj.device.type != 'router':
                 continue
-            with steps.start(f'Bring up interface {device}', continue_=True):
-
-                for interface in self.tb.devices[device].interfaces:
-                    if self.tb.devices[device].interfaces[interface].link.name != 'management':
-                        continue
-
-                    intf_obj = self.tb.devices[device].interfaces[interface]
-                    conn_class = self.tb.devices[device].connections.get('telnet', {}).get('class', None)
-                    assert conn_class, 'No connection for device {}'.format(device)
-                    ip = self.tb.devices[device].connections.telnet.ip.compressed
-                    port = self.tb.devices[device].connections.telnet.port
-                    commands = ssh_commands.commands
-                    formatted_commands = list(map(
-                        lambda s: s.format(
-                            interface=interface,
-                            ip=intf_obj.ipv4.ip.compressed,
-                            sm=intf_obj.ipv4.netmask.exploded,
-                            hostname=device,
-                            domain=self.tb.devices[device].custom.get('domain', ''),
-                            username=self.tb.devices[device].credentials.default.username,
-                            password=self.tb.devices[device].credentials.default.password.plaintext,
-
-                        ),
-                        commands
-                    ))
-
+            device = intf_obj.device.name
+            with steps.start(f'Prepare {device}', continue_=True):
+                conn_class = self.tb.devices[device].connections.get('telnet', {}).get('class', None)
+                assert conn_class, 'No connection for device {}'.format(device)
+                ip = self.tb.devices[device].connections.telnet.ip.compressed
+                port = self.tb.devices[device].connections.telnet.port
+                formatted_commands = [
+                    s.format(
+                        interface=intf_obj.name,
+                        ip=intf_obj.ipv4.ip.compressed,
+                        sm=intf_obj.ipv4.netmask.exploded,
+                        hostname=device,
+                        domain=self.tb.devices[device].custom.get('domain', ''),
+                        username=self.tb.devices[device].credentials.default.username,
+                        password=self.tb.devices[device].credentials.default.password.plaintext,
+                    )
+                    for s in ssh_commands.commands
+                ]
+
+                async def open_console(conn_class=conn_class, ip=ip, port=port):
                     conn: TelnetConnection = conn_class(ip, port)
-
-                    async def setup():
+                    try:
                         await conn.connect()
-                        time.sleep(1)
-                        await conn.execute_commends(formatted_commands, '#')
-
-                    asyncio.run(setup())
-
-
+                    except asyncio.CancelledError:
+                        # timed out: do not leave the console session behind
+                        if getattr(conn, 'writer', None) is not None:
+                            conn.writer.close()
+                        raise
+                    return conn
+
+                jobs[device] = open_console
+                commands[device] = formatted_commands
+
+        # every router at once: setup takes as long as the slowest console
+        results = asyncio.run(self.configure_routers(jobs, commands))
+        for device, (result, error) in results.items():
+            with steps.start(f'Bring up interface {device}', continue_=True) as step:
+                if not result.connected:
+                    step.failed(f'{result.error} after {result.attempts} attempt(s)')
+                elif error is not None:
+                    step.failed(error)
+
+    @staticmethod
+    async def configure_routers(jobs, commands, timeout=120):
+        # only the connect is retried; the configuration is sent exactly once
+        results = await gather_devices(jobs, timeout=30, retries=1)
+
+        async def push(result):
+            conn: TelnetConnection = result.connection
+            try:
+                await asyncio.sleep(1)
+                await asyncio.wait_for(conn.execute_commends(commands[result.device], '#'), timeout)
+                return None
+            except asyncio.TimeoutError:
+                return f'configuration not done within {timeout}s'
+            except Exception as e:
+                return str(e) or type(e).__name__
+            finally:
+                conn.writer.close()
+
+        connected = [result for result in results.values() if result.connected]
+        errors = dict(zip((result.device for result in connected),
+                          await asyncio.gather(*(push(result) for result in connected))))
+        return {device: (result, errors.get(device)) for device, result in results.items()}
 
 
 class ConfigureInterfaces(aetest.Testcase):
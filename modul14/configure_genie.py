@@ -4,6 +4,9 @@ from genie.libs.conf.interface.iosxe import Interface
 from genie.libs.conf.static_routing import StaticRouting
 from pyats.topology import Device
 
+from lib.pyats_tools.connect import connect_devices, disconnect_devices
+from lib.pyats_tools.genie_batch import ConfigBatch
+
 
 class CommonSetup(aetest.CommonSetup):
     @aetest.subsection
@@ -12,42 +15,44 @@ class CommonSetup(aetest.CommonSetup):
             tb = topology.loader.load('testbed2.yaml')
             self.parent.parameters.update(tb=tb)
 
+    @aetest.subsection
+    def connect(self):
+        connect_devices(self, self.parent.parameters['tb'], devices=['CSR'], log_stdout=True)
+
 
 class ConfigureGenie(aetest.Testcase):
     @aetest.setup
-    def connect(self, steps):
-        tb = self.parent.parameters.get("tb")
-        self.dev: Device = tb.devices.CSR
-        self.dev.connect(log_stdout=True)
+    def setup(self, devices):
+        self.dev: Device = devices['CSR']
 
     @aetest.test
     def configure_interfaces(self, steps):
-        with steps.start("Configure interface 1"):
-            intf = Interface(
-                name='GigabitEthernet2'
-            )
-            intf.device = self.dev
-            intf.ipv4 = self.dev.interfaces['GigabitEthernet2'].ipv4
-            config = intf.build_config(apply=False)
-            self.dev.configure(config.cli_config.data)
-            print(config)
-
-        with steps.start("Configure interface 2"):
-            intf = Interface(
-                name='GigabitEthernet3'
-            )
-            intf.device = self.dev
-            intf.ipv4 = self.dev.interfaces['GigabitEthernet3'].ipv4
-            config = intf.build_config(apply=False)
-            self.dev.configure(config.cli_config.data)
-            print(config)
-
-        with steps.start("Configure static routing"):
+        batch = ConfigBatch()
+        with steps.start("Build interface and static routing config"):
+            for name in ('GigabitEthernet2', 'GigabitEthernet3'):
+                intf = Interface(name=name)
+                intf.device = self.dev
+                intf.ipv4 = self.dev.interfaces[name].ipv4
+                batch.add(intf)
+
             route = StaticRouting()
             route.devices = [self.dev]
             route.device_attr[self.dev].vrf_attr["default"].address_family_attr["ipv4"].route_attr["192.168.205.0/24"].next_hop_attr["192.168.204.4"]
-            config = route.build_config(apply=False)
-            self.dev.configure(config[self.dev.name].cli_config.data)
+            batch.add(route)
+            print(batch.config(self.dev.name))
+
+        with steps.start("Apply config") as step:
+            # one trip into config mode per device
+            for result in batch.apply().values():
+                if not result.ok:
+                    step.failed(f'{result.device}: {result.error}')
+
+
+class CommonCleanup(aetest.CommonCleanup):
+    @aetest.subsection
+    def disconnect(self):
+        disconnect_devices(self)
+
 
 if __name__ == '__main__':
     aetest.main()
\ No newline at end of file
@@ -6,6 +6,7 @@ from pyats import aetest, topology
 import math
 
 from lib.connectors.swagger_con import SwaggerConnector
+from lib.pyats_tools.connect import connect_all
 
 
 class ConnectFTDREST(aetest.Testcase):
@@ -23,13 +24,15 @@ class ConnectFTDREST(aetest.Testcase):
     def connect_via_rest(self, steps):  # pylint: disable=missing-function-docstring,too-many-locals
         tb = self.parent.parameters.get('tb')
         with steps.start("Connect via rest"):
-            for device in tb.devices:
-                if tb.devices[device].type != 'ftd':
-                    continue
-                if "swagger" not in tb.devices[device].connections:
-                    continue
-                connection: SwaggerConnector = tb.devices[device].connect()
-                # print(connection)
+            ftds = [
+                name for name, device in tb.devices.items()
+                if device.type == 'ftd' and 'swagger' in device.connections
+            ]
+            # all FTDs log in at once
+            for result in connect_all(tb, ftds, timeout=60, retries=2).values():
+                if not result.connected:
+                    self.failed(f'{result.device}: {result.error}')
+                connection: SwaggerConnector = result.connection
                 swagger = connection.get_swagger_client()
                 if not swagger:
                     self.failed('No swagger connection')
@@ -1,15 +1,20 @@
+import asyncio
 from pathlib import Path
 
-import ansible_runner
+from lib.ansible_api.inventory import InventoryCache
+from lib.ansible_api.runner import PlaybookRunner
 
 BASE = Path(__file__).parent.resolve()
 PLAYBOOK = str((BASE / "add_static_route.yaml").resolve())
-INVENTORY = str((BASE / "inventory.ini").resolve())
-
-out = ansible_runner.run(
-    private_data_dir='.',
-    playbook=PLAYBOOK,
-    inventory=INVENTORY,
-    json_mode=True,
-)
+TESTBED = str((BASE.parent / "testbed.yaml").resolve())
+# Generated from the testbed instead of the hand-written inventory.ini
+INVENTORY = InventoryCache(str(BASE / '.ansible' / 'inventory')).path(TESTBED)
+
+
+def show(event):
+    print(f'{event.host:10s} {event.task:30s} {event.status} {event.message}')
+
+
+runner = PlaybookRunner(str(BASE / '.ansible'), on_event=show)
+out = asyncio.run(runner.run(PLAYBOOK, INVENTORY))
 print(out)
@@ -0,0 +1,32 @@
+import argparse
+import asyncio
+import time
+
+from lib.gns3_api.lab_manager import LabManager
+from lib.testbed import loader
+
+# Template per device os, used when a device has no custom.gns3_template
+TEMPLATES = {
+    'ios': 'Cisco IOSv 15.9(3)M6',
+    'ftd': 'Cisco FTDv 7.0.0',
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Create and start the GNS3 lab of a testbed')
+    parser.add_argument('testbed', nargs='?', default='testbed.yaml')
+    parser.add_argument('--server', default='http://192.168.0.100:3080')
+    parser.add_argument('--project', default='NetworkAutomation')
+    parser.add_argument('--output', default='testbed_gns3.yaml')
+    parser.add_argument('--timeout', type=float, default=900)
+    args = parser.parse_args()
+
+    tb = loader.load(args.testbed)
+    manager = LabManager(args.server, args.project, templates=TEMPLATES)
+
+    started = time.monotonic()
+    nodes = asyncio.run(manager.bring_up(tb, args.output, prompt_timeout=args.timeout))
+    for node in nodes.values():
+        state = f'ready in {node.boot_seconds}s' if node.ready else node.error
+        print(f'{node.name:15s} {node.console_host}:{node.console}  {state}')
+    print(f'Lab up in {time.monotonic() - started:.0f}s, testbed written to {args.output}')
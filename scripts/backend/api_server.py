@@ -1,91 +1,89 @@
-import asyncio
 import os
-import threading
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from werkzeug.utils import secure_filename
-import urllib3
 import sys
+import time
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask_cors import CORS
 
-# Add current directory and parent project folder to path so imports inside orchestrator work
+# server_common and the job modules are imported by their own names; server_common sets up the rest of the path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.append(current_dir)
-parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
-if parent_dir not in sys.path:
-    sys.path.append(parent_dir)
-
-try:
-    from orchestrator import NetworkOrchestrator
-    ORCHESTRATOR_AVAILABLE = True
-except ImportError as e:
-    print(f"Failed to import NetworkOrchestrator: {e}")
-    ORCHESTRATOR_AVAILABLE = False
 
-# Disable SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from server_common import (
+    ORCHESTRATOR_AVAILABLE, MAX_WORKERS, MAX_QUEUE, HISTORY_DB, UPLOAD_FOLDER, MAX_CONTENT_LENGTH, SSE_KEEPALIVE,
+    RequestError, orchestrator_factory, testbed_cache, upload_path, upload_response, job_request, job_response,
+    health, latest_status, latest_job_id, last_event_id, stream_start, event_frames, job_finished, stream_done,
+    long_poll_timeout, etag_matches, full_status, status_since,
+)
+from job_manager import JobManager, QueueFullError, FINISHED_STATES
+from job_history import JobHistory
 
 
 def create_app():
     app = Flask(__name__)
     CORS(app)
 
-    UPLOAD_FOLDER = 'uploads'
-    ALLOWED_EXTENSIONS = {'yaml', 'yml'}
-
-    if not os.path.exists(UPLOAD_FOLDER):
-        os.makedirs(UPLOAD_FOLDER)
-
     app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
-
-    # Global orchestration status
-    app.orchestration_status = {
-        'current_step': 0,
-        'steps': [
-            {'id': 1, 'name': 'Load testbed', 'completed': False, 'inProgress': False, 'message': ''},
-            {'id': 2, 'name': 'Server interfaces', 'completed': False, 'inProgress': False, 'message': ''},
-            {'id': 3, 'name': 'Router Configuration', 'completed': False, 'inProgress': False, 'message': ''},
-            {'id': 4, 'name': 'FTD Initial setup', 'completed': False, 'inProgress': False, 'message': ''},
-            {'id': 5, 'name': 'FTD API Configuration', 'completed': False, 'inProgress': False, 'message': ''}
-        ],
-        'isRunning': False,
-        'error': None
-    }
-
-    app.status_lock = threading.Lock()
-
-    def allowed_file(filename):
-        return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-    def status_callback(step_id, completed=False, in_progress=False, message=""):
-        """Callback function to update status from orchestrator"""
-        with app.status_lock:
-            for step in app.orchestration_status['steps']:
-                if step['id'] == step_id:
-                    step['completed'] = completed
-                    step['inProgress'] = in_progress
-                    step['message'] = message
-                    if completed:
-                        app.orchestration_status['current_step'] = step_id
-                    break
-            print(f"[CALLBACK] Step {step_id}: completed={completed}, inProgress={in_progress}, message='{message}'")
-
-    def reset_status():
-        """Reset all status to initial state"""
-        with app.status_lock:
-            app.orchestration_status = {
-                'current_step': 0,
-                'steps': [
-                    {'id': 1, 'name': 'Load testbed', 'completed': False, 'inProgress': False, 'message': ''},
-                    {'id': 2, 'name': 'Server interfaces', 'completed': False, 'inProgress': False, 'message': ''},
-                    {'id': 3, 'name': 'Router Configuration', 'completed': False, 'inProgress': False, 'message': ''},
-                    {'id': 4, 'name': 'FTD Initial setup', 'completed': False, 'inProgress': False, 'message': ''},
-                    {'id': 5, 'name': 'FTD API Configuration', 'completed': False, 'inProgress': False, 'message': ''}
-                ],
-                'isRunning': False,
-                'error': None
-            }
+    app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+
+    app.testbed_cache = testbed_cache()
+
+    app.job_history = JobHistory(HISTORY_DB)
+
+    app.job_manager = JobManager(
+        orchestrator_factory=orchestrator_factory(),
+        max_workers=MAX_WORKERS,
+        max_queue=MAX_QUEUE,
+        history=app.job_history,
+    )
+
+    def error(e: RequestError):
+        return jsonify(e.payload()), e.status
+
+    def event_stream(event_log, snapshot_fn, finished_fn=None):
+        """Server-Sent Events response following event_log, resumable via Last-Event-ID.
+
+        With finished_fn the stream ends after the job's final status.
+        """
+        last_id = last_event_id(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+
+        def generate():
+            seq, snapshot = stream_start(event_log, last_id, snapshot_fn)
+            if snapshot:
+                yield snapshot
+                if stream_done([], finished_fn):
+                    return
+            while True:
+                events = event_log.wait(seq, timeout=SSE_KEEPALIVE)
+                last, frames = event_frames(events)
+                yield frames
+                seq = last if last is not None else seq
+                if stream_done(events, finished_fn):
+                    return
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
+
+    def tagged(payload, etag):
+        response = jsonify(payload) if payload is not None else Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    def versioned_status(event_log, snapshot_fn, scope, job_id_fn=None):
+        """Status document with ETag/304 support, or a long-polled delta for ?since=<version>"""
+        since = request.args.get('since', type=int)
+        if since is None or not event_log.can_resume(since):
+            payload, etag = full_status(event_log, snapshot_fn, scope)
+            if since is None and etag_matches(request.headers.get('If-None-Match'), etag):
+                payload = None
+            return tagged(payload, etag)
+
+        timeout = long_poll_timeout(request.args.get('timeout', type=float))
+        events = event_log.wait(since, timeout=timeout)
+        return tagged(*status_since(events, since, snapshot_fn, scope, job_id_fn, request.headers.get('If-None-Match')))
 
     # API Routes
     @app.route('/api/upload', methods=['POST'])
@@ -95,133 +93,121 @@ def create_app():
                 return jsonify({'error': 'No file provided'}), 400
 
             file = request.files['file']
-            if file.filename == '':
-                return jsonify({'error': 'No file selected'}), 400
-
-            if not allowed_file(file.filename):
-                return jsonify({'error': 'Only YAML files are allowed'}), 400
-
-            filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+            filename, filepath = upload_path(file.filename)
             file.save(filepath)
 
-            reset_status()
-            return jsonify({
-                'message': 'File uploaded successfully',
-                'filename': filename,
-                'filepath': filepath
-            }), 200
+            testbed_hash, errors = app.testbed_cache.store(filepath)
+            payload, status = upload_response(filename, filepath, testbed_hash, errors)
+            return jsonify(payload), status
 
+        except RequestError as e:
+            return error(e)
         except Exception as e:
             return jsonify({'error': f'Upload failed: {str(e)}'}), 500
 
     @app.route('/api/orchestrate', methods=['POST'])
+    @app.route('/api/jobs', methods=['POST'])
     def start_orchestration():
         try:
-            if not ORCHESTRATOR_AVAILABLE:
-                return jsonify({'error': 'Orchestrator not available'}), 500
-
-            data = request.get_json()
-            if not data:
-                return jsonify({'error': 'No JSON data provided'}), 400
-
-            testbed_file = data.get('testbed_file')
-            if not testbed_file:
-                return jsonify({'error': 'No testbed file specified'}), 400
-
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], testbed_file)
-            if not os.path.exists(filepath):
-                return jsonify({'error': 'Testbed file not found'}), 404
-
-            # Reset and start orchestration
-            reset_status()
-            with app.status_lock:
-                app.orchestration_status['isRunning'] = True
-
-            # Start orchestration in background thread
-            thread = threading.Thread(
-                target=run_orchestration_async,
-                args=(app, filepath, status_callback)
-            )
-            thread.daemon = True
-            thread.start()
-
-            return jsonify({
-                'message': 'Orchestration started successfully',
-                'status': app.orchestration_status
-            }), 200
-
+            filepath, start_stage = job_request(request.get_json(silent=True))
+            try:
+                testbed_hash = app.testbed_cache.testbed_hash(filepath)
+            except (OSError, ValueError):
+                testbed_hash = None
+            job = app.job_manager.submit(filepath, testbed_hash=testbed_hash, start_stage=start_stage)
+            return jsonify(job_response(job)), 200
+
+        except RequestError as e:
+            return error(e)
+        except QueueFullError as e:
+            return jsonify({'error': str(e)}), 429
         except Exception as e:
             print(f"[ERROR] Failed to start orchestration: {e}")
             return jsonify({'error': str(e)}), 500
 
+    @app.route('/api/jobs', methods=['GET'])
+    def list_jobs():
+        return jsonify({'jobs': [job.summary() for job in app.job_manager.list()]}), 200
+
+    @app.route('/api/jobs/<job_id>', methods=['GET'])
+    def get_job_status(job_id):
+        job = app.job_manager.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return versioned_status(job.events, job.snapshot, job.id)
+
+    @app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+    def cancel_job(job_id):
+        job = app.job_manager.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        if not app.job_manager.cancel(job_id):
+            return jsonify({'error': f'Job already {job.state}'}), 409
+        return jsonify({'message': 'Cancellation requested', 'job_id': job_id}), 200
+
+    @app.route('/api/jobs/<job_id>/result', methods=['GET'])
+    def get_job_result(job_id):
+        job = app.job_manager.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.state not in FINISHED_STATES:
+            return jsonify({'error': f'Job is {job.state}', 'job_id': job_id}), 409
+        return jsonify(job.result()), 200
+
+    @app.route('/api/jobs/<job_id>/events', methods=['GET'])
+    def stream_job_events(job_id):
+        job = app.job_manager.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return event_stream(job.events, job.snapshot, job_finished(job))
+
     @app.route('/api/status', methods=['GET'])
     def get_status():
-        with app.status_lock:
-            return jsonify(app.orchestration_status), 200
+        """Latest job status; versions here count events of all jobs"""
+        manager = app.job_manager
+        return versioned_status(manager.events, lambda: latest_status(manager), 'all', lambda: latest_job_id(manager))
+
+    @app.route('/api/events', methods=['GET'])
+    def stream_events():
+        """Events of every job; each event carries its job_id"""
+        return event_stream(app.job_manager.events, lambda: latest_status(app.job_manager))
+
+    @app.route('/api/history/jobs', methods=['GET'])
+    def list_job_history():
+        days = request.args.get('days', type=float)
+        return jsonify(app.job_history.list_jobs(
+            page=request.args.get('page', default=1, type=int),
+            per_page=request.args.get('per_page', default=20, type=int),
+            testbed_hash=request.args.get('testbed_hash'),
+            state=request.args.get('state'),
+            since=time.time() - days * 86400 if days else None,
+        )), 200
+
+    @app.route('/api/history/jobs/<job_id>', methods=['GET'])
+    def get_job_history(job_id):
+        job = app.job_history.get_job(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found in history'}), 404
+        return jsonify(job), 200
+
+    @app.route('/api/history/devices/failures', methods=['GET'])
+    def get_device_failures():
+        days = request.args.get('days', default=7, type=float)
+        limit = request.args.get('limit', default=10, type=int)
+        return jsonify({'days': days, 'devices': app.job_history.device_failures(days=days, limit=limit)}), 200
+
+    @app.route('/api/history/steps/<int:step_id>/durations', methods=['GET'])
+    def get_step_durations(step_id):
+        days = request.args.get('days', default=7, type=float)
+        return jsonify(app.job_history.step_durations(step_id, days=days)), 200
 
     @app.route('/api/health', methods=['GET'])
     def health_check():
-        return jsonify({
-            'status': 'healthy',
-            'orchestrator_available': ORCHESTRATOR_AVAILABLE,
-            'service': 'Network Orchestrator API'
-        }), 200
+        return jsonify(health()), 200
 
     return app
 
 
-def run_orchestration_async(app_instance, testbed_path, status_callback):
-    """Run orchestration in a new event loop"""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        loop.run_until_complete(run_orchestration(app_instance, testbed_path, status_callback))
-    except Exception as e:
-        print(f"Orchestration error: {e}")
-        with app_instance.status_lock:
-            app_instance.orchestration_status['error'] = str(e)
-            app_instance.orchestration_status['isRunning'] = False
-    finally:
-        loop.close()
-
-
-async def run_orchestration(app_instance, testbed_path, status_callback):
-    """Run the full orchestration process"""
-    try:
-        print("\n" + "=" * 50)
-        print("STARTING ORCHESTRATION")
-        print("=" * 50)
-
-        # Create orchestrator with status callback
-        orchestrator = NetworkOrchestrator(test_bed=testbed_path, status_callback=status_callback)
-
-        # Run full orchestration
-        results = await orchestrator.full_orchestration()
-
-        # Final status update
-        success = all(results.values()) if results else False
-        with app_instance.status_lock:
-            app_instance.orchestration_status['isRunning'] = False
-            if success:
-                print("\n✓ ORCHESTRATION COMPLETED SUCCESSFULLY")
-                # mark all steps completed if not already done
-                for step in app_instance.orchestration_status['steps']:
-                    step['completed'] = True
-                    step['inProgress'] = False
-            else:
-                print("\n✗ ORCHESTRATION FAILED")
-                app_instance.orchestration_status['error'] = "Some steps failed - check logs"
-
-    except Exception as e:
-        print(f"\n[ORCHESTRATION ERROR] {e}")
-        import traceback
-        traceback.print_exc()
-        with app_instance.status_lock:
-            app_instance.orchestration_status['error'] = str(e)
-            app_instance.orchestration_status['isRunning'] = False
-
-
 app = create_app()
 
 if __name__ == '__main__':
@@ -229,8 +215,9 @@ if __name__ == '__main__':
     print("NETWORK ORCHESTRATOR API SERVER")
     print("=" * 60)
     print(f"Orchestrator available: {ORCHESTRATOR_AVAILABLE}")
+    print(f"Concurrent jobs: {MAX_WORKERS}, queue size: {MAX_QUEUE}")
     print("Server running on: http://0.0.0.0:5000")
-    print("API endpoints: /api/upload, /api/orchestrate, /api/status")
+    print("API endpoints: /api/upload, /api/orchestrate, /api/jobs, /api/status, /api/events, /api/history")
     print("=" * 60 + "\n")
 
-    app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
@@ -0,0 +1,306 @@
+"""
+Async serving mode for the orchestrator API.
+
+API handlers and orchestration jobs share one long-lived event loop: every job
+is a task on that loop, and status reads return the job's current snapshot
+without taking a lock. Exposes the same endpoints as api_server.py.
+
+    python async_api_server.py
+"""
+import asyncio
+import os
+import shutil
+import sys
+import time
+
+from aiohttp import web
+
+# server_common and the job modules are imported by their own names; server_common sets up the rest of the path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from server_common import (
+    ORCHESTRATOR_AVAILABLE, MAX_WORKERS, MAX_QUEUE, HISTORY_DB, MAX_CONTENT_LENGTH, SSE_KEEPALIVE,
+    RequestError, orchestrator_factory, testbed_cache, upload_path, upload_response, job_request, job_response,
+    health, latest_status, latest_job_id, last_event_id, stream_start, event_frames, job_finished, stream_done,
+    long_poll_timeout, etag_matches, full_status, status_since,
+)
+from job_manager import QueueFullError, FINISHED_STATES
+from async_job_manager import AsyncJobManager
+from job_history import JobHistory
+
+routes = web.RouteTableDef()
+
+
+def json_error(message: str, status: int, **extra):
+    return web.json_response(dict(extra, error=message), status=status)
+
+
+@web.middleware
+async def cors_middleware(request, handler):
+    if request.method == 'OPTIONS':
+        response = web.Response()
+    else:
+        response = await handler(request)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Last-Event-ID, If-None-Match'
+    response.headers['Access-Control-Expose-Headers'] = 'ETag'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    return response
+
+
+async def event_stream(request, event_log, snapshot_fn, finished_fn=None):
+    """Server-Sent Events response following event_log, resumable via Last-Event-ID.
+
+    With finished_fn the stream ends after the job's final status.
+    """
+    last_id = last_event_id(request.headers.get('Last-Event-ID') or request.query.get('last_event_id'))
+
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+        'Access-Control-Allow-Origin': '*',
+    })
+    await response.prepare(request)
+
+    # Snapshot and sequence are read in the same loop iteration, so they match
+    seq, snapshot = stream_start(event_log, last_id, snapshot_fn)
+    try:
+        if snapshot:
+            await response.write(snapshot.encode())
+        done = bool(snapshot) and stream_done([], finished_fn)
+        while not done:
+            events = await event_log.next_events(seq, timeout=SSE_KEEPALIVE)
+            last, frames = event_frames(events)
+            await response.write(frames.encode())
+            seq = last if last is not None else seq
+            done = stream_done(events, finished_fn)
+    except ConnectionResetError:
+        pass
+    return response
+
+
+def _etag_response(payload: dict, etag: str):
+    """JSON response tagged with etag, or 304 without a body when payload is None"""
+    tag = f'"{etag}"'
+    if payload is None:
+        return web.Response(status=304, headers={'ETag': tag})
+    return web.json_response(payload, headers={'ETag': tag})
+
+
+async def versioned_status(request, event_log, snapshot_fn, scope, job_id_fn=None):
+    """Status document with ETag/304 support, or a long-polled delta for ?since=<version>"""
+    try:
+        since = int(request.query['since']) if 'since' in request.query else None
+        timeout = long_poll_timeout(request.query.get('timeout'))
+    except ValueError:
+        return json_error('since and timeout must be numbers', 400)
+
+    if since is None or not event_log.can_resume(since):
+        payload, etag = full_status(event_log, snapshot_fn, scope)
+        if since is None and etag_matches(request.headers.get('If-None-Match'), etag):
+            payload = None
+        return _etag_response(payload, etag)
+
+    events = await event_log.next_events(since, timeout=timeout)
+    return _etag_response(*status_since(events, since, snapshot_fn, scope, job_id_fn,
+                                        request.headers.get('If-None-Match')))
+
+
+@routes.post('/api/upload')
+async def upload_testbed(request):
+    try:
+        form = await request.post()
+        file = form.get('file')
+        if file is None or not hasattr(file, 'file'):
+            return json_error('No file provided', 400)
+        filename, filepath = upload_path(file.filename)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, _save_upload, filepath, file.file)
+
+        testbed_hash, errors = await loop.run_in_executor(None, request.app['testbed_cache'].store, filepath)
+        payload, status = upload_response(filename, filepath, testbed_hash, errors)
+        return web.json_response(payload, status=status)
+    except RequestError as e:
+        return web.json_response(e.payload(), status=e.status)
+    except Exception as e:
+        return json_error(f'Upload failed: {str(e)}', 500)
+
+
+def _save_upload(path: str, source):
+    """Copy the spooled upload to disk; runs in the executor like the other file I/O"""
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(source, f)
+
+
+@routes.post('/api/orchestrate')
+@routes.post('/api/jobs')
+async def start_orchestration(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    try:
+        filepath, start_stage = job_request(data)
+    except RequestError as e:
+        return web.json_response(e.payload(), status=e.status)
+
+    try:
+        # reads and hashes the testbed and everything it extends
+        testbed_hash = await asyncio.get_running_loop().run_in_executor(
+            None, request.app['testbed_cache'].testbed_hash, filepath,
+        )
+    except (OSError, ValueError):
+        testbed_hash = None
+    try:
+        job = request.app['job_manager'].submit(filepath, testbed_hash=testbed_hash, start_stage=start_stage)
+    except QueueFullError as e:
+        return json_error(str(e), 429)
+    return web.json_response(job_response(job))
+
+
+@routes.get('/api/jobs')
+async def list_jobs(request):
+    return web.json_response({'jobs': [job.summary() for job in request.app['job_manager'].list()]})
+
+
+@routes.get('/api/jobs/{job_id}')
+async def get_job_status(request):
+    job = request.app['job_manager'].get(request.match_info['job_id'])
+    if job is None:
+        return json_error('Job not found', 404)
+    return await versioned_status(request, job.events, job.snapshot, job.id)
+
+
+@routes.post('/api/jobs/{job_id}/cancel')
+async def cancel_job(request):
+    job_id = request.match_info['job_id']
+    job = request.app['job_manager'].get(job_id)
+    if job is None:
+        return json_error('Job not found', 404)
+    if not request.app['job_manager'].cancel(job_id):
+        return json_error(f'Job already {job.state}', 409)
+    return web.json_response({'message': 'Cancellation requested', 'job_id': job_id})
+
+
+@routes.get('/api/jobs/{job_id}/result')
+async def get_job_result(request):
+    job_id = request.match_info['job_id']
+    job = request.app['job_manager'].get(job_id)
+    if job is None:
+        return json_error('Job not found', 404)
+    if job.state not in FINISHED_STATES:
+        return json_error(f'Job is {job.state}', 409, job_id=job_id)
+    return web.json_response(job.result())
+
+
+@routes.get('/api/jobs/{job_id}/events')
+async def stream_job_events(request):
+    job = request.app['job_manager'].get(request.match_info['job_id'])
+    if job is None:
+        return json_error('Job not found', 404)
+    return await event_stream(request, job.events, job.snapshot, job_finished(job))
+
+
+@routes.get('/api/status')
+async def get_status(request):
+    """Latest job status; versions here count events of all jobs"""
+    manager = request.app['job_manager']
+    return await versioned_status(request, manager.events, lambda: latest_status(manager), 'all',
+                                  lambda: latest_job_id(manager))
+
+
+@routes.get('/api/events')
+async def stream_events(request):
+    manager = request.app['job_manager']
+    return await event_stream(request, manager.events, lambda: latest_status(manager))
+
+
+def _query_number(request, name: str, default=None, cast=int):
+    try:
+        return cast(request.query[name])
+    except (KeyError, ValueError):
+        return default
+
+
+async def _history_call(func, *args, **kwargs):
+    """Run a history query in the executor so SQLite never blocks the loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, lambda: func(*args, **kwargs))
+
+
+@routes.get('/api/history/jobs')
+async def list_job_history(request):
+    days = _query_number(request, 'days', cast=float)
+    history = request.app['job_history']
+    return web.json_response(await _history_call(
+        history.list_jobs,
+        page=_query_number(request, 'page', 1),
+        per_page=_query_number(request, 'per_page', 20),
+        testbed_hash=request.query.get('testbed_hash'),
+        state=request.query.get('state'),
+        since=time.time() - days * 86400 if days else None,
+    ))
+
+
+@routes.get('/api/history/jobs/{job_id}')
+async def get_job_history(request):
+    job = await _history_call(request.app['job_history'].get_job, request.match_info['job_id'])
+    if job is None:
+        return json_error('Job not found in history', 404)
+    return web.json_response(job)
+
+
+@routes.get('/api/history/devices/failures')
+async def get_device_failures(request):
+    days = _query_number(request, 'days', 7, cast=float)
+    limit = _query_number(request, 'limit', 10)
+    devices = await _history_call(request.app['job_history'].device_failures, days=days, limit=limit)
+    return web.json_response({'days': days, 'devices': devices})
+
+
+@routes.get(r'/api/history/steps/{step_id:\d+}/durations')
+async def get_step_durations(request):
+    days = _query_number(request, 'days', 7, cast=float)
+    return web.json_response(await _history_call(
+        request.app['job_history'].step_durations, int(request.match_info['step_id']), days=days,
+    ))
+
+
+@routes.get('/api/health')
+async def health_check(request):
+    return web.json_response(health(mode='async'))
+
+
+async def _shutdown_jobs(app):
+    await app['job_manager'].shutdown()
+
+
+def create_app():
+    app = web.Application(middlewares=[cors_middleware], client_max_size=MAX_CONTENT_LENGTH)
+    app['job_history'] = JobHistory(HISTORY_DB)
+    app['job_manager'] = AsyncJobManager(
+        orchestrator_factory=orchestrator_factory(),
+        max_workers=MAX_WORKERS,
+        max_queue=MAX_QUEUE,
+        history=app['job_history'],
+    )
+    app['testbed_cache'] = testbed_cache()
+    app.add_routes(routes)
+    app.on_shutdown.append(_shutdown_jobs)
+    return app
+
+
+if __name__ == '__main__':
+    print("\n" + "=" * 60)
+    print("NETWORK ORCHESTRATOR API SERVER (async mode)")
+    print("=" * 60)
+    print(f"Orchestrator available: {ORCHESTRATOR_AVAILABLE}")
+    print(f"Concurrent jobs: {MAX_WORKERS}, queue size: {MAX_QUEUE}")
+    print("Server running on: http://0.0.0.0:5000")
+    print("API endpoints: /api/upload, /api/orchestrate, /api/jobs, /api/status, /api/events, /api/history")
+    print("=" * 60 + "\n")
+
+    web.run_app(create_app(), host='0.0.0.0', port=5000)
@@ -0,0 +1,276 @@
+import asyncio
+import copy
+import functools
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from status_events import AsyncStatusEventLog
+from job_manager import (
+    QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED, FINISHED_STATES, QueueFullError, initial_status,
+    track_step_time,
+)
+
+
+class AsyncJob:
+    """Orchestration job living on the server's event loop.
+
+    The status document is only mutated on the loop thread. After each change a
+    fresh snapshot replaces the previous one, so readers just return the current
+    reference without taking a lock.
+    """
+
+    def __init__(self, testbed_path: str, loop: asyncio.AbstractEventLoop, global_events: AsyncStatusEventLog,
+                 testbed_hash: Optional[str] = None, start_stage: Optional[str] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.testbed_path = testbed_path
+        self.testbed_hash = testbed_hash
+        self.start_stage = start_stage
+        self.state = QUEUED
+        self.results = None
+        self.passed = []
+        self.failed = []
+        self.devices = []
+        self.reachability = None
+        self.verification = None
+        self.convergence = None
+        self.ansible = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = AsyncStatusEventLog()
+        self.task: Optional[asyncio.Task] = None
+        self._status = initial_status()
+        self._snapshot = None
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        self._global_events = global_events
+        self._refresh_snapshot()
+
+    def _refresh_snapshot(self):
+        snapshot = copy.deepcopy(self._status)
+        snapshot.update({'job_id': self.id, 'state': self.state, 'testbed_file': self.testbed_path})
+        self._snapshot = snapshot
+
+    def _publish(self, event_type: str, data: dict):
+        self.events.publish(event_type, data)
+        self._global_events.publish(event_type, dict(data, job_id=self.id))
+
+    def status_callback(self, step_id, completed=False, in_progress=False, message=""):
+        """Callback function to update status from orchestrator, safe from executor threads"""
+        if threading.get_ident() != self._loop_thread:
+            self._loop.call_soon_threadsafe(self._apply_step, step_id, completed, in_progress, message)
+        else:
+            self._apply_step(step_id, completed, in_progress, message)
+
+    def _apply_step(self, step_id, completed, in_progress, message):
+        for step in self._status['steps']:
+            if step['id'] == step_id:
+                step['completed'] = completed
+                step['inProgress'] = in_progress
+                step['message'] = message
+                track_step_time(step, completed, in_progress)
+                if completed:
+                    # playbooks finish alongside the FTD steps: never move back
+                    self._status['current_step'] = max(self._status['current_step'], step_id)
+                self._refresh_snapshot()
+                self._publish('step', {'step': dict(step), 'current_step': self._status['current_step']})
+                break
+        print(f"[CALLBACK {self.id}] Step {step_id}: completed={completed}, inProgress={in_progress}, message='{message}'")
+
+    def device_callback(self, result: dict):
+        """Per-device outcome from the orchestrator, safe from executor threads"""
+        if threading.get_ident() != self._loop_thread:
+            self._loop.call_soon_threadsafe(self._apply_device, result)
+        else:
+            self._apply_device(result)
+
+    def _apply_device(self, result: dict):
+        self._status['devices'].append(result)
+        self._refresh_snapshot()
+        self._publish('device', {'device': dict(result)})
+
+    def set_state(self, state: str, **status_fields):
+        self.state = state
+        self._status.update(status_fields)
+        self._refresh_snapshot()
+        self._publish('status', self._snapshot)
+
+    def snapshot(self) -> dict:
+        return dict(self._snapshot, version=self.events.seq)
+
+    def summary(self) -> dict:
+        return {
+            'job_id': self.id,
+            'state': self.state,
+            'testbed_file': self.testbed_path,
+            'current_step': self._snapshot['current_step'],
+            'error': self._snapshot['error'],
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+    def result(self) -> dict:
+        return {
+            'job_id': self.id,
+            'state': self.state,
+            'results': self.results,
+            'configured_passed': self.passed,
+            'configured_failed': self.failed,
+            'reachability': self.reachability,
+            'verification': self.verification,
+            'convergence': self.convergence,
+            'ansible': self.ansible,
+            'error': self._snapshot['error'],
+            'duration': (self.finished_at - self.started_at) if self.finished_at and self.started_at else None,
+        }
+
+    def history_record(self) -> dict:
+        return {
+            'job_id': self.id,
+            'testbed_file': self.testbed_path,
+            'testbed_hash': self.testbed_hash,
+            'state': self.state,
+            'error': self._snapshot['error'],
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'steps': self._snapshot['steps'],
+            'devices': list(self.devices),
+        }
+
+
+class AsyncJobManager:
+    """Runs each orchestration job as a task on the shared event loop.
+
+    Concurrency is bounded by a semaphore instead of worker threads; a job
+    waiting on the semaphore is "queued".
+    """
+
+    def __init__(self, orchestrator_factory: Callable, max_workers: int = 2, max_queue: int = 20,
+                 max_history: int = 100, history=None):
+        self.orchestrator_factory = orchestrator_factory
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_history = max_history
+        self.history = history
+        self.events = AsyncStatusEventLog()
+        self._jobs: "OrderedDict[str, AsyncJob]" = OrderedDict()
+        self._slots = None
+        self._archiving = set()
+
+    def submit(self, testbed_path: str, testbed_hash: Optional[str] = None, start_stage: Optional[str] = None) -> AsyncJob:
+        """Must be called on the event loop"""
+        loop = asyncio.get_running_loop()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        queued = sum(1 for job in self._jobs.values() if job.state == QUEUED)
+        if queued >= self.max_queue:
+            raise QueueFullError(f'Job queue is full ({queued} jobs waiting)')
+        job = AsyncJob(testbed_path, loop, self.events, testbed_hash=testbed_hash, start_stage=start_stage)
+        self._jobs[job.id] = job
+        self._prune()
+        job._publish('status', job.snapshot())
+        job.task = loop.create_task(self._run(job))
+        job.task.add_done_callback(functools.partial(self._task_done, job))
+        return job
+
+    def _task_done(self, job: AsyncJob, task: asyncio.Task):
+        # a task cancelled before its first step never enters _run, so nothing else finishes the job
+        if task.cancelled() and job.state not in FINISHED_STATES:
+            job.finished_at = time.time()
+            job.set_state(CANCELLED, isRunning=False, error='Cancelled before start')
+            archive = asyncio.ensure_future(self._archive(job))
+            self._archiving.add(archive)
+            archive.add_done_callback(self._archiving.discard)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in FINISHED_STATES]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[AsyncJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[AsyncJob]:
+        return list(self._jobs.values())
+
+    def latest(self) -> Optional[AsyncJob]:
+        return next(reversed(self._jobs.values()), None)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if job is None or job.state in FINISHED_STATES or job.task is None:
+            return False
+        job.task.cancel()
+        return True
+
+    async def _run(self, job: AsyncJob):
+        orchestrator = None
+        try:
+            async with self._slots:
+                job.started_at = time.time()
+                job.set_state(RUNNING, isRunning=True)
+                print(f"\n[JOB {job.id}] STARTING ORCHESTRATION for {job.testbed_path}")
+
+                orchestrator = self.orchestrator_factory(
+                    test_bed=job.testbed_path, status_callback=job.status_callback, start_stage=job.start_stage,
+                    device_callback=job.device_callback,
+                )
+                results = await orchestrator.full_orchestration()
+
+                success = all(results.values()) if results else False
+                job.results = results
+                job.passed = sorted(orchestrator.configured_passed)
+                job.failed = sorted(orchestrator.configured_failed)
+                job.devices = list(orchestrator.device_results)
+                job.reachability = orchestrator.reachability
+                job.verification = orchestrator.verification
+                job.convergence = orchestrator.convergence
+                job.ansible = orchestrator.ansible
+                job.finished_at = time.time()
+                if success:
+                    print(f"\n✓ [JOB {job.id}] ORCHESTRATION COMPLETED SUCCESSFULLY")
+                    for step in job._status['steps']:
+                        step['completed'] = True
+                        step['inProgress'] = False
+                    job.set_state(SUCCEEDED, isRunning=False)
+                else:
+                    print(f"\n✗ [JOB {job.id}] ORCHESTRATION FAILED")
+                    job.set_state(FAILED, isRunning=False, error="Some steps failed - check logs")
+
+        except asyncio.CancelledError:
+            if orchestrator is not None:
+                # outcomes recorded before the cancel still go to the history
+                job.devices = list(orchestrator.device_results)
+            job.finished_at = time.time()
+            print(f"\n[JOB {job.id}] CANCELLED")
+            job.set_state(CANCELLED, isRunning=False,
+                          error='Cancelled' if job.started_at else 'Cancelled before start')
+        except Exception as e:
+            print(f"\n[ORCHESTRATION ERROR {job.id}] {e}")
+            traceback.print_exc()
+            if orchestrator is not None:
+                job.devices = list(orchestrator.device_results)
+            job.finished_at = time.time()
+            job.set_state(FAILED, isRunning=False, error=str(e))
+        await self._archive(job)
+
+    async def _archive(self, job: AsyncJob):
+        """Persist a finished job to the history store off the loop thread"""
+        if self.history is None:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.history.record_job, job.history_record())
+        except Exception as e:
+            print(f"[HISTORY ERROR {job.id}] {e}")
+
+    async def shutdown(self):
+        tasks = [job.task for job in self._jobs.values() if job.task and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
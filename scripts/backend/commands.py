@@ -23,4 +23,13 @@ device_commands = [
     "exit",
     "ip ssh version 2",
     "restconf",
-]
\ No newline at end of file
+]
+
+# Skipped when pushing over an SSH shell: SshConnection.send_config handles the
+# mode changes itself, and the RSA key already exists once SSH answers.
+ssh_skip_commands = {
+    "\n",
+    "enable",
+    "conf t",
+    "crypto key generate rsa modulus 2048",
+}
@@ -0,0 +1,161 @@
+import sqlite3
+import time
+from contextlib import closing
+from typing import List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    testbed_file TEXT,
+    testbed_hash TEXT,
+    state TEXT NOT NULL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_testbed_hash ON jobs (testbed_hash, created_at);
+
+CREATE TABLE IF NOT EXISTS steps (
+    job_id TEXT NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    step_id INTEGER NOT NULL,
+    name TEXT,
+    completed INTEGER NOT NULL,
+    message TEXT,
+    started_at REAL,
+    finished_at REAL,
+    duration REAL,
+    PRIMARY KEY (job_id, step_id)
+);
+CREATE INDEX IF NOT EXISTS idx_steps_time ON steps (step_id, started_at);
+
+-- one row per recorded outcome: a step may record a device several times (one per playbook)
+CREATE TABLE IF NOT EXISTS device_results (
+    job_id TEXT NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    device TEXT NOT NULL,
+    step_id INTEGER NOT NULL,
+    success INTEGER NOT NULL,
+    message TEXT,
+    started_at REAL,
+    finished_at REAL,
+    duration REAL,
+    PRIMARY KEY (job_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_device_results_device ON device_results (device, finished_at);
+CREATE INDEX IF NOT EXISTS idx_device_results_time ON device_results (finished_at, success);
+"""
+
+
+def _duration(start, end):
+    return round(end - start, 3) if start and end else None
+
+
+class JobHistory:
+    """SQLite store of finished orchestration jobs, their steps and per-device outcomes"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call, so any worker thread can record or query
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    def record_job(self, record: dict):
+        """Insert or replace a job with its steps and device results"""
+        job_id = record['job_id']
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, record.get('testbed_file'), record.get('testbed_hash'), record['state'],
+                 record.get('error'), record['created_at'], record.get('started_at'),
+                 record.get('finished_at'), _duration(record.get('started_at'), record.get('finished_at'))),
+            )
+            conn.execute('DELETE FROM steps WHERE job_id = ?', (job_id,))
+            conn.executemany(
+                'INSERT INTO steps VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(job_id, step['id'], step['name'], int(step['completed']), step.get('message'),
+                  step.get('started_at'), step.get('finished_at'),
+                  _duration(step.get('started_at'), step.get('finished_at')))
+                 for step in record.get('steps', [])],
+            )
+            conn.execute('DELETE FROM device_results WHERE job_id = ?', (job_id,))
+            conn.executemany(
+                'INSERT INTO device_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(job_id, seq, dev['device'], dev['step_id'], int(dev['success']), dev.get('message'),
+                  dev.get('started_at'), dev.get('finished_at'),
+                  _duration(dev.get('started_at'), dev.get('finished_at')))
+                 for seq, dev in enumerate(record.get('devices', []))],
+            )
+
+    def list_jobs(self, page: int = 1, per_page: int = 20, testbed_hash: Optional[str] = None,
+                  state: Optional[str] = None, since: Optional[float] = None) -> dict:
+        where, params = [], []
+        if testbed_hash:
+            where.append('testbed_hash = ?')
+            params.append(testbed_hash)
+        if state:
+            where.append('state = ?')
+            params.append(state)
+        if since:
+            where.append('created_at >= ?')
+            params.append(since)
+        clause = f"WHERE {' AND '.join(where)}" if where else ''
+        per_page = max(1, min(per_page, 200))
+        page = max(1, page)
+        with closing(self._connect()) as conn:
+            total = conn.execute(f'SELECT COUNT(*) FROM jobs {clause}', params).fetchone()[0]
+            rows = conn.execute(
+                f'SELECT * FROM jobs {clause} ORDER BY created_at DESC LIMIT ? OFFSET ?',
+                params + [per_page, (page - 1) * per_page],
+            ).fetchall()
+        return {'page': page, 'per_page': per_page, 'total': total, 'jobs': [dict(row) for row in rows]}
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        with closing(self._connect()) as conn:
+            job = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if job is None:
+                return None
+            steps = conn.execute('SELECT * FROM steps WHERE job_id = ? ORDER BY step_id', (job_id,)).fetchall()
+            devices = conn.execute(
+                'SELECT * FROM device_results WHERE job_id = ? ORDER BY step_id, device, seq', (job_id,)
+            ).fetchall()
+        return dict(job, steps=[dict(row) for row in steps], devices=[dict(row) for row in devices])
+
+    def device_failures(self, days: float = 7, limit: int = 10) -> List[dict]:
+        """Devices with the most failed outcomes in the last days"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT device, COUNT(*) AS runs, SUM(1 - success) AS failures '
+                'FROM device_results WHERE finished_at >= ? '
+                'GROUP BY device HAVING failures > 0 ORDER BY failures DESC, device LIMIT ?',
+                (time.time() - days * 86400, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def step_durations(self, step_id: int, days: float = 7, percentiles=(50, 95)) -> dict:
+        """Count, mean and percentiles of completed runs of one step"""
+        params = (step_id, time.time() - days * 86400)
+        base = 'FROM steps WHERE step_id = ? AND started_at >= ? AND completed = 1 AND duration IS NOT NULL'
+        with closing(self._connect()) as conn:
+            count, mean = conn.execute(f'SELECT COUNT(*), AVG(duration) {base}', params).fetchone()
+            result = {'step_id': step_id, 'days': days, 'count': count,
+                      'mean': round(mean, 3) if mean is not None else None}
+            for pct in percentiles:
+                value = None
+                if count:
+                    # nearest-rank percentile, the database sorts and skips
+                    offset = max(0, -(-pct * count // 100) - 1)
+                    value = conn.execute(
+                        f'SELECT duration {base} ORDER BY duration LIMIT 1 OFFSET ?', params + (offset,)
+                    ).fetchone()[0]
+                result[f'p{pct}'] = value
+        return result
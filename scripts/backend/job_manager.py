@@ -0,0 +1,365 @@
+import asyncio
+import copy
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from status_events import StatusEventLog
+
+# In execution order; the Ansible playbooks run alongside the FTD stages
+STEP_NAMES = [
+    'Load testbed',
+    'Server interfaces',
+    'Router Configuration',
+    'Routing convergence',
+    'Reachability check',
+    'Configuration verification',
+    'FTD Initial setup',
+    'FTD API Configuration',
+    'Ansible playbooks',
+]
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = {SUCCEEDED, FAILED, CANCELLED}
+
+
+def initial_status() -> dict:
+    return {
+        'current_step': 0,
+        'steps': [
+            {'id': i, 'name': name, 'completed': False, 'inProgress': False, 'message': '',
+             'started_at': None, 'finished_at': None}
+            for i, name in enumerate(STEP_NAMES, start=1)
+        ],
+        # per-device outcomes in the order they were recorded
+        'devices': [],
+        'isRunning': False,
+        'error': None
+    }
+
+
+def track_step_time(step: dict, completed: bool, in_progress: bool):
+    """Stamp when a step first reports and when it stops being in progress"""
+    now = time.time()
+    if step.get('started_at') is None:
+        step['started_at'] = now
+    step['finished_at'] = None if in_progress and not completed else now
+
+
+def status_delta(events: List[dict], snapshot: dict, version: int, job_id: Optional[str] = None) -> Optional[dict]:
+    """Collapse the events after a client's version into the steps that changed
+    and the device outcomes recorded since.
+
+    Returns None when an event belongs to another job than job_id, the caller
+    then has to send the full document.
+    """
+    changed_ids = []
+    changed_devices = []
+    for event in events:
+        if job_id is not None and event['data'].get('job_id', job_id) != job_id:
+            return None
+        if event['event'] == 'step':
+            step_id = event['data']['step']['id']
+            if step_id not in changed_ids:
+                changed_ids.append(step_id)
+        elif event['event'] == 'device':
+            changed_devices.append(event['data']['device'])
+    steps = {step['id']: step for step in snapshot['steps']}
+    return {
+        'full': False,
+        'version': version,
+        'job_id': snapshot.get('job_id'),
+        'state': snapshot.get('state'),
+        'current_step': snapshot['current_step'],
+        'isRunning': snapshot['isRunning'],
+        'error': snapshot['error'],
+        'changed_steps': [steps[step_id] for step_id in changed_ids if step_id in steps],
+        'changed_devices': changed_devices,
+    }
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class Job:
+    """One orchestration run with its own status document and event log"""
+
+    def __init__(self, testbed_path: str, global_events: StatusEventLog = None, testbed_hash: Optional[str] = None,
+                 start_stage: Optional[str] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.testbed_path = testbed_path
+        self.testbed_hash = testbed_hash
+        self.start_stage = start_stage
+        self.state = QUEUED
+        self.status = initial_status()
+        self.results = None
+        self.passed = []
+        self.failed = []
+        self.devices = []
+        self.reachability = None
+        self.verification = None
+        self.convergence = None
+        self.ansible = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.lock = threading.Lock()
+        self.events = StatusEventLog()
+        self._global_events = global_events
+        self.future = None
+        self._loop = None
+        self._task = None
+        self._cancel_requested = False
+
+    def _publish(self, event_type: str, data: dict):
+        """Must be called with self.lock held"""
+        self.events.publish(event_type, data)
+        if self._global_events is not None:
+            self._global_events.publish(event_type, dict(data, job_id=self.id))
+
+    def status_callback(self, step_id, completed=False, in_progress=False, message=""):
+        """Callback function to update status from orchestrator"""
+        with self.lock:
+            for step in self.status['steps']:
+                if step['id'] == step_id:
+                    step['completed'] = completed
+                    step['inProgress'] = in_progress
+                    step['message'] = message
+                    track_step_time(step, completed, in_progress)
+                    if completed:
+                        # playbooks finish alongside the FTD steps: never move back
+                        self.status['current_step'] = max(self.status['current_step'], step_id)
+                    self._publish('step', {'step': dict(step), 'current_step': self.status['current_step']})
+                    break
+            print(f"[CALLBACK {self.id}] Step {step_id}: completed={completed}, inProgress={in_progress}, message='{message}'")
+
+    def device_callback(self, result: dict):
+        """Per-device outcome from the orchestrator, added to the status document"""
+        with self.lock:
+            self.status['devices'].append(result)
+            self._publish('device', {'device': dict(result)})
+
+    def _set_state(self, state: str, **status_fields):
+        with self.lock:
+            self.state = state
+            self.status.update(status_fields)
+            self._publish('status', self._snapshot_locked())
+
+    def _snapshot_locked(self) -> dict:
+        snapshot = copy.deepcopy(self.status)
+        snapshot.update({'job_id': self.id, 'state': self.state, 'testbed_file': self.testbed_path})
+        return snapshot
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return dict(self._snapshot_locked(), version=self.events.seq)
+
+    def summary(self) -> dict:
+        with self.lock:
+            return {
+                'job_id': self.id,
+                'state': self.state,
+                'testbed_file': self.testbed_path,
+                'current_step': self.status['current_step'],
+                'error': self.status['error'],
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+            }
+
+    def result(self) -> dict:
+        with self.lock:
+            return {
+                'job_id': self.id,
+                'state': self.state,
+                'results': self.results,
+                'configured_passed': self.passed,
+                'configured_failed': self.failed,
+                'reachability': self.reachability,
+                'verification': self.verification,
+                'convergence': self.convergence,
+                'ansible': self.ansible,
+                'error': self.status['error'],
+                'duration': (self.finished_at - self.started_at) if self.finished_at and self.started_at else None,
+            }
+
+    def history_record(self) -> dict:
+        with self.lock:
+            return {
+                'job_id': self.id,
+                'testbed_file': self.testbed_path,
+                'testbed_hash': self.testbed_hash,
+                'state': self.state,
+                'error': self.status['error'],
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'steps': copy.deepcopy(self.status['steps']),
+                'devices': list(self.devices),
+            }
+
+
+class JobManager:
+    """Runs orchestration jobs on a bounded worker pool with a bounded queue"""
+
+    def __init__(self, orchestrator_factory: Callable, max_workers: int = 2, max_queue: int = 20,
+                 max_history: int = 100, history=None):
+        self.orchestrator_factory = orchestrator_factory
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_history = max_history
+        self.history = history
+        self.events = StatusEventLog()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='orchestration')
+
+    def submit(self, testbed_path: str, testbed_hash: Optional[str] = None, start_stage: Optional[str] = None) -> Job:
+        with self._lock:
+            queued = sum(1 for job in self._jobs.values() if job.state == QUEUED)
+            if queued >= self.max_queue:
+                raise QueueFullError(f'Job queue is full ({queued} jobs waiting)')
+            job = Job(testbed_path, global_events=self.events, testbed_hash=testbed_hash, start_stage=start_stage)
+            self._jobs[job.id] = job
+            self._prune_locked()
+        with job.lock:
+            job._publish('status', job._snapshot_locked())
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def _prune_locked(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in FINISHED_STATES]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def latest(self) -> Optional[Job]:
+        with self._lock:
+            return next(reversed(self._jobs.values()), None)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job, or interrupt a running one at its next await"""
+        job = self.get(job_id)
+        if job is None:
+            return False
+        with job.lock:
+            if job.state in FINISHED_STATES:
+                return False
+            job._cancel_requested = True
+            loop, task = job._loop, job._task
+        if job.future is not None and job.future.cancel():
+            job.finished_at = time.time()
+            job._set_state(CANCELLED, isRunning=False, error='Cancelled before start')
+            self._archive(job)
+            return True
+        if loop is not None and task is not None:
+            loop.call_soon_threadsafe(task.cancel)
+        return True
+
+    def _run(self, job: Job):
+        """Worker thread body: run one job on its own event loop"""
+        with job.lock:
+            cancelled = job._cancel_requested
+            if not cancelled:
+                job.started_at = time.time()
+        if cancelled:
+            # cancel() came after this worker took the future, so future.cancel() could not stop it
+            job.finished_at = time.time()
+            job._set_state(CANCELLED, isRunning=False, error='Cancelled before start')
+            self._archive(job)
+            return
+        job._set_state(RUNNING, isRunning=True)
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        orchestrator = None
+        try:
+            orchestrator = self.orchestrator_factory(
+                test_bed=job.testbed_path, status_callback=job.status_callback, start_stage=job.start_stage,
+                device_callback=job.device_callback,
+            )
+            with job.lock:
+                job._loop = loop
+                job._task = loop.create_task(orchestrator.full_orchestration())
+                if job._cancel_requested:
+                    job._task.cancel()
+            print(f"\n[JOB {job.id}] STARTING ORCHESTRATION for {job.testbed_path}")
+            results = loop.run_until_complete(job._task)
+
+            success = all(results.values()) if results else False
+            with job.lock:
+                job.results = results
+                job.passed = sorted(orchestrator.configured_passed)
+                job.failed = sorted(orchestrator.configured_failed)
+                job.devices = list(orchestrator.device_results)
+                job.reachability = orchestrator.reachability
+                job.verification = orchestrator.verification
+                job.convergence = orchestrator.convergence
+                job.ansible = orchestrator.ansible
+                job.finished_at = time.time()
+                if success:
+                    # mark all steps completed if not already done
+                    for step in job.status['steps']:
+                        step['completed'] = True
+                        step['inProgress'] = False
+            if success:
+                print(f"\n✓ [JOB {job.id}] ORCHESTRATION COMPLETED SUCCESSFULLY")
+                job._set_state(SUCCEEDED, isRunning=False)
+            else:
+                print(f"\n✗ [JOB {job.id}] ORCHESTRATION FAILED")
+                job._set_state(FAILED, isRunning=False, error="Some steps failed - check logs")
+
+        except asyncio.CancelledError:
+            self._keep_devices(job, orchestrator)
+            job.finished_at = time.time()
+            print(f"\n[JOB {job.id}] CANCELLED")
+            job._set_state(CANCELLED, isRunning=False, error='Cancelled')
+        except Exception as e:
+            print(f"\n[ORCHESTRATION ERROR {job.id}] {e}")
+            traceback.print_exc()
+            self._keep_devices(job, orchestrator)
+            job.finished_at = time.time()
+            job._set_state(FAILED, isRunning=False, error=str(e))
+        finally:
+            with job.lock:
+                job._loop = None
+                job._task = None
+            loop.close()
+            self._archive(job)
+
+    @staticmethod
+    def _keep_devices(job: Job, orchestrator):
+        """Device outcomes recorded before a cancel or crash still go to the history"""
+        if orchestrator is not None:
+            with job.lock:
+                job.devices = list(orchestrator.device_results)
+
+    def _archive(self, job: Job):
+        """Persist a finished job to the history store, if one is configured"""
+        if self.history is None:
+            return
+        try:
+            self.history.record_job(job.history_record())
+        except Exception as e:
+            print(f"[HISTORY ERROR {job.id}] {e}")
+
+    def shutdown(self, wait: bool = False):
+        for job in self.list():
+            self.cancel(job.id)
+        self._executor.shutdown(wait=wait)
@@ -1,11 +1,11 @@
 import asyncio
-import subprocess
+import functools
+import tempfile
 import threading
 import time
 import json
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import requests
-from pyats import topology
 import re
 import urllib3
 
@@ -14,25 +14,63 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 # Local backend imports
 from scripts.backend.telnet_con import TelnetConnection
 from scripts.backend.swagger_con import SwaggerConnector
-from scripts.backend.commands import device_commands, interface_commands
+from scripts.backend.commands import device_commands, interface_commands, ssh_skip_commands
+from scripts.backend.testbed_cache import TestbedCache, default_cache_dir
+
+# Shared modules from lib/ (the repository root is on sys.path)
+from lib.connectors.ssh_con import SshConnection
+from lib.testbed.loader import Testbed
+from lib.testbed.topology import TopologyGraph
+from lib.testbed.addressing import check_addressing, rip_networks, summarize_routes
+from lib.hostnet.ip_batch import IpBatch
+from lib.hostnet.routes import RouteReconciler
+from lib.runners.reachability import format_matrix, interface_targets, matrix_to_dict, probe_matrix
+from lib.runners.verification import verify_devices
+from lib.runners.convergence import expected_prefixes, wait_for_convergence
+from lib.gns3_api.snapshots import LabSnapshots, stage_snapshot_name
+from lib.ansible_api.runner import PlaybookRunner
+from lib.ansible_api.inventory import InventoryCache
+
+# Stages a run can start from by restoring the GNS3 snapshot taken when they finished
+SNAPSHOT_STAGES = ("ftd_initial",)
 
 
 class NetworkOrchestrator:
-    def __init__(self, test_bed: str = "copie_testbed1.yaml", status_callback=None):
+    def __init__(self, test_bed: str = "copie_testbed1.yaml", status_callback=None,
+                 start_stage: Optional[str] = None, lab: Optional[LabSnapshots] = None,
+                 playbooks: Optional[List[str]] = None, device_callback=None):
+        if start_stage is not None and start_stage not in SNAPSHOT_STAGES:
+            raise ValueError(f"Unknown start stage {start_stage!r}, expected one of {SNAPSHOT_STAGES}")
         self.test_bed = test_bed
         self.test_bed_data = None
         self.configured_passed = set()
         self.configured_failed = set()
+        self.device_results = []
+        # device -> interface IP -> probe result, filled after router configuration
+        self.reachability = None
+        # device -> passed, differences and parsed state, filled by the verification step
+        self.verification = None
+        # per-router and network time-to-convergence of RIP
+        self.convergence = None
+        self.convergence_timeout = 180.0
+        self.routers_configured_at = None
+        self.probe_timeout = 2.0
         self.max_workers = 4
         self.lock = threading.Lock()
         self.status_callback = status_callback
-        self.server_routes = {
-            "192.168.10.0/24": "192.168.200.1",
-            "192.168.20.0/24": "192.168.200.1",
-            "192.168.30.0/24": "192.168.200.2",
-            "192.168.40.0/24": "192.168.200.3",
-            "192.168.50.0/24": "192.168.200.4",
-        }
+        # called with every per-device outcome as it is recorded
+        self.device_callback = device_callback
+        self.topology = None
+        # network -> gateway on the server, derived from the testbed links on load
+        self.server_routes = {}
+        # GNS3 project snapshots: taken when a stage in SNAPSHOT_STAGES finishes, restored for start_stage
+        self.lab = lab
+        self.start_stage = start_stage
+        self.restored_stage = None
+        self.lab_boot_timeout = 900.0
+        # Ansible playbooks run on an inventory generated from the testbed, alongside the FTD stages
+        self.playbooks = list(playbooks or [])
+        self.ansible = None
 
     def _update_status(self, step_id: int, completed: bool = False, in_progress: bool = False, message: str = ""):
         """Thread-safe status update"""
@@ -44,11 +82,46 @@ class NetworkOrchestrator:
         if message:
             print(f"[STATUS] Step {step_id}: {message}")
 
+    def _record_device(self, step_id: int, device_name: str, success: bool, started_at: float, message: str = ""):
+        """Keep per-device outcome and timing for the job history and the live status"""
+        result = {
+            "device": device_name,
+            "step_id": step_id,
+            "success": bool(success),
+            "message": message,
+            "started_at": started_at,
+            "finished_at": time.time(),
+        }
+        with self.lock:
+            self.device_results.append(result)
+        if self.device_callback:
+            try:
+                self.device_callback(dict(result))
+            except Exception as e:
+                print(f"[DEVICE CALLBACK ERROR] {e}")
+
+    def _ftd_name(self) -> str:
+        ftd = self.test_bed_data.index.first("ftd") if self.test_bed_data else None
+        return ftd.name if ftd else "FTD"
+
     def load_testbed(self) -> bool:
         """Load testbed YAML file"""
         try:
             self._update_status(1, in_progress=True, message="Loading testbed...")
-            self.test_bed_data = topology.loader.load(self.test_bed)
+            # Parsed and validated once per content hash (normally at upload time); pyATS objects
+            # are only built if a pyATS-specific API is used on the testbed
+            model = TestbedCache(default_cache_dir(self.test_bed)).load_model(self.test_bed)
+            testbed = Testbed.from_dict(model)
+            # Reject bad addressing before any device is touched
+            errors = check_addressing(testbed)
+            if errors:
+                for error in errors:
+                    print(f"[ADDRESSING] {error}")
+                self._update_status(1, completed=False, message=f"Addressing errors: {'; '.join(errors[:3])}")
+                return False
+            self.test_bed_data = testbed
+            self.topology = TopologyGraph.from_testbed(self.test_bed_data, root="UbuntuServer")
+            self.server_routes = summarize_routes(self.topology.routes())
             self._update_status(1, completed=True, message="Testbed loaded successfully")
             return True
         except Exception as e:
@@ -65,28 +138,25 @@ class NetworkOrchestrator:
                 self._update_status(2, completed=False, message="UbuntuServer not found in testbed")
                 return False
 
+            # Addresses, links and the route changes go to the kernel in one `ip -batch` run
+            batch = IpBatch()
             for interface_name, interface in server.interfaces.items():
-                result = subprocess.run(
-                    ["sudo", "ip", "address", "add", f"{interface.ipv4.compressed}", "dev", interface_name],
-                    capture_output=True,
-                    text=True,
-                )
-                if result.returncode != 0 and "File exists" not in (result.stderr or ""):
-                    print(f"Interface error on {interface_name}: {result.stderr}")
-
-                subprocess.run(["sudo", "ip", "link", "set", interface_name, "up"], capture_output=True)
-
-            self._update_status(2, in_progress=True, message="Adding server routes...")
-            for network, gateway in self.server_routes.items():
-                result = subprocess.run(
-                    ["sudo", "ip", "route", "add", network, "via", gateway],
-                    capture_output=True,
-                    text=True,
-                )
-                if result.returncode != 0 and "File exists" not in (result.stderr or ""):
-                    print(f"Route error for {network}: {result.stderr}")
-
-            self._update_status(2, completed=True, message="Server interfaces and routes configured")
+                batch.address_add(interface.ipv4.compressed, interface_name)
+                batch.link_up(interface_name)
+            reconciler = RouteReconciler()
+            plan = reconciler.plan(self.server_routes)
+            reconciler.queue(plan, batch)
+            print(f"Server routes: {plan.summary()}")
+
+            self._update_status(2, in_progress=True, message=f"Applying {len(batch)} address/route entries...")
+            failed = [result for result in batch.run() if not result.ok]
+            for result in failed:
+                print(f"Server network error on '{result.command}': {result.error}")
+
+            self._update_status(
+                2, completed=True,
+                message="Server interfaces and routes configured" + (f" ({len(failed)} entries failed)" if failed else ""),
+            )
             return True
 
         except Exception as e:
@@ -96,10 +166,11 @@ class NetworkOrchestrator:
 
     async def configure_single_router(self, device_name: str) -> bool:
         """Configure a single router with timeout protection"""
+        started_at = time.time()
         try:
             device = self.test_bed_data.devices[device_name]
             all_interface_commands = []
-            rip_networks = set()
+            networks = []
 
             self._update_status(3, in_progress=True, message=f"Configuring {device_name}...")
 
@@ -115,7 +186,7 @@ class NetworkOrchestrator:
                     )
                     for cmds in interface_commands
                 ])
-                rip_networks.add(str(interface_object.ipv4.network.network_address))
+                networks.append(interface_object.ipv4.network)
 
             dev_cmds = [
                 cmds.format(
@@ -128,37 +199,27 @@ class NetworkOrchestrator:
             ]
 
             all_rip_commands = ["router rip", "version 2", "no auto-summary"]
-            for network in sorted(rip_networks):
+            # One classful network statement covers every interface in it
+            for network in rip_networks(networks):
                 all_rip_commands.append(f"network {network}")
 
             combined_commands = all_interface_commands + dev_cmds + all_rip_commands
 
-            host = device.connections.telnet.ip.compressed
-            port = device.connections.telnet.port
-            conn = TelnetConnection(host, port)
-            await asyncio.wait_for(conn.connect(), timeout=30)
-
-            try:
-                await conn.writeln("")
-                await asyncio.sleep(1)
-                banner = await asyncio.wait_for(conn.readuntil(timeout=5), timeout=10)
-                print(f"{device_name} connected: {banner[:100]}")
-
-                for cmd in combined_commands:
-                    try:
-                        await conn.writeln(cmd)
-                        out = await asyncio.wait_for(conn.readuntil(timeout=2), timeout=5)
-                        print(f"{device_name} >> {cmd[:50]}")
-                    except asyncio.TimeoutError:
-                        print(f"{device_name} timeout on command: {cmd[:50]}")
-                    except Exception as e:
-                        print(f"{device_name} error on '{cmd[:50]}': {e}")
-
-            finally:
-                await conn.close()
+            mgmt_ip = self._management_ip(device_name)
+            ssh_port = self._ssh_port(device)
+            pushed = False
+            if mgmt_ip and await self._ssh_reachable(mgmt_ip, ssh_port):
+                try:
+                    await self._push_config_ssh(device_name, device, mgmt_ip, ssh_port, combined_commands)
+                    pushed = True
+                except Exception as e:
+                    print(f"{device_name} SSH push failed ({e}), falling back to telnet")
+            if not pushed:
+                await self._push_config_telnet(device_name, device, combined_commands)
 
             with self.lock:
                 self.configured_passed.add(device_name)
+            self._record_device(3, device_name, True, started_at, "configured")
             self._update_status(3, in_progress=True, message=f"{device_name} configured")
             print(f"✓ {device_name} configured successfully")
             return True
@@ -167,6 +228,7 @@ class NetworkOrchestrator:
             print(f"✗ {device_name} configuration timed out")
             with self.lock:
                 self.configured_failed.add(device_name)
+            self._record_device(3, device_name, False, started_at, "timed out")
             self._update_status(3, in_progress=True, message=f"{device_name} timed out")
             return False
 
@@ -174,14 +236,90 @@ class NetworkOrchestrator:
             print(f"✗ {device_name} configuration failed: {e}")
             with self.lock:
                 self.configured_failed.add(device_name)
+            self._record_device(3, device_name, False, started_at, str(e)[:200])
             self._update_status(3, in_progress=True, message=f"{device_name} failed: {str(e)[:50]}")
             return False
 
+    def _management_ip(self, device_name: str) -> Optional[str]:
+        intf = self.test_bed_data.index.interface(device_name, "initial")
+        return intf.ipv4.ip.compressed if intf is not None and intf.ipv4 else None
+
+    @staticmethod
+    def _ssh_port(device) -> int:
+        """SSH port from the device's testbed connection, 22 when it has none"""
+        if "ssh" in device.connections:
+            return int(device.connections.ssh.get("port", 22))
+        return 22
+
+    @staticmethod
+    async def _ssh_reachable(ip: str, port: int = 22, timeout: float = 3) -> bool:
+        """Check whether the device answers on its SSH port"""
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout=timeout)
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True
+
+    async def _push_config_ssh(self, device_name: str, device, mgmt_ip: str, ssh_port: int, commands: list):
+        """Push the configuration over an interactive SSH shell in one pipelined write"""
+        self._update_status(3, in_progress=True, message=f"Configuring {device_name} over SSH...")
+        conn = SshConnection(
+            mgmt_ip,
+            ssh_port,
+            device.credentials.default.username,
+            device.credentials.default.password.plaintext,
+        )
+        ssh_commands = [cmd for cmd in commands if cmd not in ssh_skip_commands]
+
+        def push():
+            try:
+                conn.open_shell(timeout=15)
+                return conn.send_config(ssh_commands, timeout=60)
+            finally:
+                conn.close_shell()
+
+        loop = asyncio.get_running_loop()
+        _, errors = await asyncio.wait_for(loop.run_in_executor(None, push), timeout=90)
+        for error in errors:
+            print(f"{device_name} SSH config warning: {error}")
+        print(f"{device_name} >> {len(ssh_commands)} commands pushed over SSH")
+
+    async def _push_config_telnet(self, device_name: str, device, commands: list):
+        """Push the configuration line by line over the telnet console"""
+        host = device.connections.telnet.ip.compressed
+        port = device.connections.telnet.port
+        conn = TelnetConnection(host, port)
+        await asyncio.wait_for(conn.connect(), timeout=30)
+
+        try:
+            await conn.writeln("")
+            await asyncio.sleep(1)
+            banner = await asyncio.wait_for(conn.readuntil(timeout=5), timeout=10)
+            print(f"{device_name} connected: {banner[:100]}")
+
+            for cmd in commands:
+                try:
+                    await conn.writeln(cmd)
+                    out = await asyncio.wait_for(conn.readuntil(timeout=2), timeout=5)
+                    print(f"{device_name} >> {cmd[:50]}")
+                except asyncio.TimeoutError:
+                    print(f"{device_name} timeout on command: {cmd[:50]}")
+                except Exception as e:
+                    print(f"{device_name} error on '{cmd[:50]}': {e}")
+
+        finally:
+            await conn.close()
+
     async def configure_routers(self) -> bool:
         """Configure all routers concurrently"""
         try:
             self._update_status(3, in_progress=True, message="Starting router configuration...")
-            router_names = [dev_name for dev_name, dev in self.test_bed_data.devices.items() if getattr(dev, "type", "") == "router"]
+            router_names = [dev.name for dev in self.test_bed_data.index.devices("router")]
             print(f"Found routers: {router_names}")
 
             if not router_names:
@@ -190,6 +328,7 @@ class NetworkOrchestrator:
 
             tasks = [self.configure_single_router(router_name) for router_name in router_names]
             results = await asyncio.gather(*tasks, return_exceptions=True)
+            self.routers_configured_at = time.monotonic()
 
             success_count = sum(1 for result in results if result is True)
             if success_count == len(router_names):
@@ -204,11 +343,95 @@ class NetworkOrchestrator:
             print(f"[ERROR] Router configuration failed: {e}")
             return False
 
+    async def wait_for_routing(self) -> bool:
+        """Return as soon as every router has learned every testbed prefix"""
+        try:
+            self._update_status(4, in_progress=True, message="Waiting for RIP convergence...")
+            expected = expected_prefixes(self.test_bed_data)
+            started_at = time.time()
+            report = await wait_for_convergence(
+                self.test_bed_data, expected, timeout=self.convergence_timeout, started=self.routers_configured_at,
+            )
+            self.convergence = report.to_dict()
+
+            for name, router in report.routers.items():
+                if router.converged:
+                    message = f"converged in {router.seconds}s"
+                else:
+                    message = router.error or f"missing {', '.join(router.missing[:5])}"
+                self._record_device(4, name, router.converged, started_at, message[:200])
+
+            if report.converged:
+                message = f"Routing converged in {report.seconds}s"
+            else:
+                pending = [name for name, router in report.routers.items() if not router.converged]
+                message = f"Not converged after {self.convergence_timeout:.0f}s: {', '.join(pending)}"
+            self._update_status(4, completed=report.converged, message=message)
+            return report.converged
+
+        except Exception as e:
+            self._update_status(4, completed=False, message=f"Convergence check failed: {e}")
+            print(f"[ERROR] Convergence check failed: {e}")
+            return False
+
+    async def verify_reachability(self) -> bool:
+        """Probe every interface IP of the routers at once, right after they were configured"""
+        try:
+            self._update_status(5, in_progress=True, message="Probing router interfaces...")
+            routers = {dev.name for dev in self.test_bed_data.index.devices("router")}
+            targets = interface_targets(self.test_bed_data, skip=set(self.test_bed_data.devices) - routers)
+            matrix = await probe_matrix(targets, timeout=self.probe_timeout)
+            self.reachability = matrix_to_dict(matrix)
+            print(format_matrix(matrix))
+
+            total = sum(len(row) for row in matrix.values())
+            down = [f"{device} {ip}" for device, row in matrix.items() for ip, result in row.items() if not result.reachable]
+            message = f"{total - len(down)}/{total} router interfaces reachable"
+            if down:
+                message += f", down: {', '.join(down[:5])}"
+            self._update_status(5, completed=not down, message=message)
+            return not down
+
+        except Exception as e:
+            self._update_status(5, completed=False, message=f"Reachability check failed: {e}")
+            print(f"[ERROR] Reachability check failed: {e}")
+            return False
+
+    async def verify_configuration(self) -> bool:
+        """Compare every router's interfaces and connected routes with the testbed"""
+        try:
+            self._update_status(6, in_progress=True, message="Collecting router state...")
+            router_names = [dev.name for dev in self.test_bed_data.index.devices("router")]
+            started_at = time.time()
+            results = await verify_devices(
+                self.test_bed_data, router_names, expected_routes=expected_prefixes(self.test_bed_data, router_names),
+            )
+            self.verification = {name: result.to_dict() for name, result in results.items()}
+
+            failed = []
+            for name, result in results.items():
+                message = result.error or "; ".join(result.differences[:5]) or "matches testbed"
+                self._record_device(6, name, result.passed, started_at, message[:200])
+                if not result.passed:
+                    failed.append(name)
+                    print(f"{name} verification: {message}")
+
+            message = f"{len(results) - len(failed)}/{len(results)} routers match the testbed"
+            if failed:
+                message += f", failed: {', '.join(failed)}"
+            self._update_status(6, completed=not failed, message=message)
+            return not failed
+
+        except Exception as e:
+            self._update_status(6, completed=False, message=f"Configuration verification failed: {e}")
+            print(f"[ERROR] Configuration verification failed: {e}")
+            return False
+
     async def configure_ftd_initial_setup(self) -> bool:
         """Run FTD initial setup with hardcoded values for reliable command sending"""
         conn = None
         try:
-            self._update_status(4, in_progress=True, message="Starting FTD initial setup...")
+            self._update_status(7, in_progress=True, message="Starting FTD initial setup...")
             host = "92.81.55.146"
             port = 5013
             username = "admin"
@@ -435,11 +658,11 @@ class NetworkOrchestrator:
 
                 if setup_completed:
                     print("FTD: Setup wizard completed successfully")
-                    self._update_status(4, completed=True, message="FTD initial setup completed")
+                    self._update_status(7, completed=True, message="FTD initial setup completed")
                     return True
                 else:
                     print("FTD: Setup wizard did not complete in time")
-                    self._update_status(4, completed=False, message="FTD setup timed out")
+                    self._update_status(7, completed=False, message="FTD setup timed out")
                     return False
 
             finally:
@@ -447,11 +670,11 @@ class NetworkOrchestrator:
                     await conn.close()
 
         except asyncio.TimeoutError:
-            self._update_status(4, completed=False, message="FTD setup timed out")
+            self._update_status(7, completed=False, message="FTD setup timed out")
             print("FTD: Setup timed out")
             return False
         except Exception as e:
-            self._update_status(4, completed=False, message=f"FTD setup failed: {e}")
+            self._update_status(7, completed=False, message=f"FTD setup failed: {e}")
             print(f"[ERROR] FTD initial setup error: {e}")
             import traceback
             traceback.print_exc()
@@ -459,7 +682,7 @@ class NetworkOrchestrator:
     def wait_for_fdm(self, ip: str, port: int = 443, timeout: int = 900) -> bool:
         """Wait for FDM API service to be ready with better status updates"""
         start_time = time.time()
-        self._update_status(5, in_progress=True, message="Waiting for FDM service to start...")
+        self._update_status(8, in_progress=True, message="Waiting for FDM service to start...")
         last_update = 0
         check_interval = 10
 
@@ -468,7 +691,7 @@ class NetworkOrchestrator:
                 response = requests.get(f"https://{ip}:{port}/api/versions", verify=False, timeout=5)
                 if response.status_code in [200, 401, 403]:
                     elapsed = int(time.time() - start_time)
-                    self._update_status(5, in_progress=True, message=f"FDM service ready (after {elapsed}s)")
+                    self._update_status(8, in_progress=True, message=f"FDM service ready (after {elapsed}s)")
                     print(f"FDM service ready after {elapsed} seconds")
                     return True
             except requests.exceptions.RequestException:
@@ -476,12 +699,12 @@ class NetworkOrchestrator:
 
             elapsed = int(time.time() - start_time)
             if elapsed - last_update >= 30:
-                self._update_status(5, in_progress=True, message=f"Waiting for FDM... {elapsed}/{timeout}s")
+                self._update_status(8, in_progress=True, message=f"Waiting for FDM... {elapsed}/{timeout}s")
                 last_update = elapsed
                 print(f"Still waiting for FDM service... ({elapsed}/{timeout}s)")
             time.sleep(check_interval)
 
-        self._update_status(5, completed=False, message="FDM service timeout")
+        self._update_status(8, completed=False, message="FDM service timeout")
         print(f"FDM service did not start within {timeout} seconds")
         return False
 
@@ -491,157 +714,53 @@ class NetworkOrchestrator:
         Configures interfaces GigabitEthernet0/2 and GigabitEthernet0/3 and sets default gateway.
         """
         try:
-            self._update_status(5, in_progress=True, message="Adding FTD IPs and gateway...")
+            self._update_status(8, in_progress=True, message="Adding FTD IPs and gateway...")
 
             # Find FTD device
-            ftd_device = None
-            device_name = ""
-            for dev_name, dev in self.test_bed_data.devices.items():
-                if getattr(dev, "type", "") == "ftd":
-                    ftd_device = dev
-                    device_name = dev_name
-                    break
-
+            ftd_device = self.test_bed_data.index.first("ftd")
             if not ftd_device:
-                self._update_status(5, completed=False, message="FTD device not found")
+                self._update_status(8, completed=False, message="FTD device not found")
                 return False
+            device_name = ftd_device.name
 
             # Get management IP
-            mgmt_ip = None
-            for intf in ftd_device.interfaces.values():
-                if getattr(intf, "alias", "") == "initial":
-                    mgmt_ip = intf.ipv4.ip.compressed
-                    break
+            mgmt_ip = self._management_ip(device_name)
 
             if not mgmt_ip:
-                self._update_status(5, completed=False, message="FTD mgmt IP not found")
+                self._update_status(8, completed=False, message="FTD mgmt IP not found")
                 return False
 
-            self._update_status(5, in_progress=True, message=f"Connecting to FTD at {mgmt_ip}...")
+            self._update_status(8, in_progress=True, message=f"Connecting to FTD at {mgmt_ip}...")
             print(f"Configuring FTD ({device_name}) at mgmt {mgmt_ip} with gateway {default_gateway}")
 
             # Wait for FDM
-            if not self.wait_for_fdm(mgmt_ip, timeout=60):
+            if not await self._run_blocking(self.wait_for_fdm, mgmt_ip, 443, 60):
                 return False
 
             # Connect via Swagger connector
             connector = SwaggerConnector(ftd_device)
-            if not connector.connect():
-                self._update_status(5, completed=False, message="API connection failed")
+            if not await self._run_blocking(connector.connect):
+                self._update_status(8, completed=False, message="API connection failed")
                 return False
 
-            client = connector.get_swagger_client()
+            client = await self._run_blocking(connector.get_swagger_client)
 
             # Configure FTD Interfaces
-            configured_count = 0
-            try:
-                print("Getting existing interfaces...")
-                existing_interfaces = client.Interface.getPhysicalInterfaceList().result()
-                for interface in existing_interfaces.items:
-                    if interface.hardwareName in ["GigabitEthernet0/2", "GigabitEthernet0/3"]:
-                        target_intf = ftd_device.interfaces[interface.hardwareName]
-                        body = {
-                            "id": interface.id,
-                            "version": interface.version,
-                            "name": getattr(interface, "name", interface.hardwareName),
-                            "hardwareName": interface.hardwareName,
-                            "type": interface.type,
-                            "mode": "ROUTED",
-                            "enabled": True,
-                            "managementOnly": False,
-                            "monitorInterface": False,
-                            "mtu": 1500,
-                            "linkState": "UP",
-                            "ipv4": {
-                                "type": "interfaceipv4",
-                                "ipType": "STATIC",
-                                "dhcp": False,
-                                "ipAddress": {
-                                    "type": "haipv4address",
-                                    "ipAddress": target_intf.ipv4.ip.compressed,
-                                    "netmask": target_intf.ipv4.netmask.exploded,
-                                },
-                            },
-                            "securityLevel": 50,
-                            "description": f"Configured for {target_intf.ipv4.ip.compressed}/{target_intf.ipv4.netmask.exploded}",
-                        }
-                        try:
-                            client.Interface.editPhysicalInterface(objId=interface.id, body=body).result()
-                            configured_count += 1
-                            print(
-                                f"✓ Configured {interface.hardwareName}: {target_intf.ipv4.ip.compressed}/{target_intf.ipv4.netmask.exploded}"
-                            )
-                        except Exception as e:
-                            print(f"✗ Failed to configure {interface.hardwareName}: {e}")
-            except Exception as e:
-                print(f"✗ Interface configuration failed: {e}")
-                import traceback
-                traceback.print_exc()
+            configured_count = await self._run_blocking(self._configure_ftd_interfaces, client, ftd_device)
 
             # Configure default gateway
-            gateway_configured = False
-            try:
-                print("Configuring default gateway...")
-                networks_response = client.Network.getNetworkList().result()
-                gateway_network = next((n for n in networks_response.items if n.name == "default_gateway"), None)
-
-                if not gateway_network:
-                    # Create network object for gateway
-                    network_model = client.get_model("Network")
-                    gateway_network = network_model(
-                        name="default_gateway", value=default_gateway + "/32", type="network"
-                    )
-                    gateway_network = client.Network.addNetwork(body=gateway_network).result()
-                    print(f"✓ Created network object for gateway: {default_gateway}")
-
-                # Add static route
-                route_body = {
-                    "type": "staticroute",
-                    "gateway": {"id": gateway_network.id, "type": "network"},
-                    "metricValue": 1,
-                    "selectedNetworks": [{"type": "network", "id": "any-ipv4", "name": "any-ipv4"}],
-                }
-                client.Routing.addStaticRouteEntry(body=route_body).result()
-                print(f"✓ Default gateway configured: 0.0.0.0/0 via {default_gateway}")
-                gateway_configured = True
-
-            except Exception as e:
-                print(f"✗ Gateway configuration failed: {e}")
-                try:
-                    simple_route_body = {
-                        "type": "staticroute",
-                        "gateway": default_gateway,
-                        "metricValue": 1,
-                        "selectedNetworks": ["any-ipv4"],
-                    }
-                    client.Routing.addStaticRouteEntry(body=simple_route_body).result()
-                    gateway_configured = True
-                    print(f"✓ Default gateway configured (simple method): {default_gateway}")
-                except Exception as simple_e:
-                    print(f"✗ Simple gateway method failed: {simple_e}")
+            gateway_configured = await self._run_blocking(self._configure_ftd_gateway, client, default_gateway)
 
             # Deploy configuration
-            deployment_success = False
-            try:
-                print("Deploying configuration...")
-                deployment_body = {
-                    "type": "deploymentrequest",
-                    "forceDeploy": True,
-                    "ignoreWarning": True,
-                }
-                deployment_response = client.Deployment.addDeployment(body=deployment_body).result()
-                if deployment_response:
-                    deployment_success = True
-                    print("✓ Configuration deployment initiated")
-                    await asyncio.sleep(15)
-                    print("✓ Deployment should be complete")
-            except Exception as e:
-                print(f"⚠ Deployment failed: {e} - manual deployment required")
+            deployment_success = await self._run_blocking(self._deploy_ftd_config, client)
+            if deployment_success:
+                await asyncio.sleep(15)
+                print("✓ Deployment should be complete")
 
             # Final status
             success = configured_count >= 1
             status_msg = f"FTD: {configured_count}/2 interfaces, gateway: {gateway_configured}"
-            self._update_status(5, completed=success, message=status_msg)
+            self._update_status(8, completed=success, message=status_msg)
             print(f"🎉 {status_msg}")
 
             if success:
@@ -653,7 +772,7 @@ class NetworkOrchestrator:
             return success
 
         except Exception as e:
-            self._update_status(5, completed=False, message=f"FTD API configuration failed: {e}")
+            self._update_status(8, completed=False, message=f"FTD API configuration failed: {e}")
             print(f"❌ Error: {e}")
             import traceback
             traceback.print_exc()
@@ -662,16 +781,223 @@ class NetworkOrchestrator:
                     self.configured_failed.add(device_name)
             return False
 
+    def _configure_ftd_interfaces(self, client, ftd_device) -> int:
+        """Set static IPs on the FTD data interfaces, returns how many were configured"""
+        configured_count = 0
+        try:
+            print("Getting existing interfaces...")
+            existing_interfaces = client.Interface.getPhysicalInterfaceList().result()
+            for interface in existing_interfaces.items:
+                if interface.hardwareName in ["GigabitEthernet0/2", "GigabitEthernet0/3"]:
+                    target_intf = ftd_device.interfaces[interface.hardwareName]
+                    body = {
+                        "id": interface.id,
+                        "version": interface.version,
+                        "name": getattr(interface, "name", interface.hardwareName),
+                        "hardwareName": interface.hardwareName,
+                        "type": interface.type,
+                        "mode": "ROUTED",
+                        "enabled": True,
+                        "managementOnly": False,
+                        "monitorInterface": False,
+                        "mtu": 1500,
+                        "linkState": "UP",
+                        "ipv4": {
+                            "type": "interfaceipv4",
+                            "ipType": "STATIC",
+                            "dhcp": False,
+                            "ipAddress": {
+                                "type": "haipv4address",
+                                "ipAddress": target_intf.ipv4.ip.compressed,
+                                "netmask": target_intf.ipv4.netmask.exploded,
+                            },
+                        },
+                        "securityLevel": 50,
+                        "description": f"Configured for {target_intf.ipv4.ip.compressed}/{target_intf.ipv4.netmask.exploded}",
+                    }
+                    try:
+                        client.Interface.editPhysicalInterface(objId=interface.id, body=body).result()
+                        configured_count += 1
+                        print(
+                            f"✓ Configured {interface.hardwareName}: {target_intf.ipv4.ip.compressed}/{target_intf.ipv4.netmask.exploded}"
+                        )
+                    except Exception as e:
+                        print(f"✗ Failed to configure {interface.hardwareName}: {e}")
+        except Exception as e:
+            print(f"✗ Interface configuration failed: {e}")
+            import traceback
+            traceback.print_exc()
+        return configured_count
+
+    def _configure_ftd_gateway(self, client, default_gateway: str) -> bool:
+        """Add the default route, falling back to the simple route body"""
+        gateway_configured = False
+        try:
+            print("Configuring default gateway...")
+            networks_response = client.Network.getNetworkList().result()
+            gateway_network = next((n for n in networks_response.items if n.name == "default_gateway"), None)
+
+            if not gateway_network:
+                # Create network object for gateway
+                network_model = client.get_model("Network")
+                gateway_network = network_model(
+                    name="default_gateway", value=default_gateway + "/32", type="network"
+                )
+                gateway_network = client.Network.addNetwork(body=gateway_network).result()
+                print(f"✓ Created network object for gateway: {default_gateway}")
+
+            # Add static route
+            route_body = {
+                "type": "staticroute",
+                "gateway": {"id": gateway_network.id, "type": "network"},
+                "metricValue": 1,
+                "selectedNetworks": [{"type": "network", "id": "any-ipv4", "name": "any-ipv4"}],
+            }
+            client.Routing.addStaticRouteEntry(body=route_body).result()
+            print(f"✓ Default gateway configured: 0.0.0.0/0 via {default_gateway}")
+            gateway_configured = True
+
+        except Exception as e:
+            print(f"✗ Gateway configuration failed: {e}")
+            try:
+                simple_route_body = {
+                    "type": "staticroute",
+                    "gateway": default_gateway,
+                    "metricValue": 1,
+                    "selectedNetworks": ["any-ipv4"],
+                }
+                client.Routing.addStaticRouteEntry(body=simple_route_body).result()
+                gateway_configured = True
+                print(f"✓ Default gateway configured (simple method): {default_gateway}")
+            except Exception as simple_e:
+                print(f"✗ Simple gateway method failed: {simple_e}")
+        return gateway_configured
+
+    def _deploy_ftd_config(self, client) -> bool:
+        """Start a deployment of the pending FTD changes"""
+        deployment_success = False
+        try:
+            print("Deploying configuration...")
+            deployment_body = {
+                "type": "deploymentrequest",
+                "forceDeploy": True,
+                "ignoreWarning": True,
+            }
+            deployment_response = client.Deployment.addDeployment(body=deployment_body).result()
+            if deployment_response:
+                deployment_success = True
+                print("✓ Configuration deployment initiated")
+        except Exception as e:
+            print(f"⚠ Deployment failed: {e} - manual deployment required")
+        return deployment_success
+
+    async def run_playbooks(self) -> bool:
+        """Run the configured playbooks; per-host task events stream into the status as they happen"""
+        if not self.playbooks:
+            self._update_status(9, completed=True, message="No playbooks configured")
+            return True
+        try:
+            self._update_status(9, in_progress=True, message=f"Running {len(self.playbooks)} playbooks...")
+            # Generated once per testbed content, next to the cached testbed model
+            cache_dir = default_cache_dir(self.test_bed)
+            inventory = InventoryCache(cache_dir).path(
+                self.test_bed, self.test_bed_data, TestbedCache(cache_dir).testbed_hash(self.test_bed),
+            )
+
+            def on_event(event):
+                message = f"{event.host}: {event.task} {event.status}"
+                self._update_status(9, in_progress=True, message=message + (f" ({event.message})" if event.message else ""))
+
+            self.ansible = {}
+            with tempfile.TemporaryDirectory(prefix="ansible_") as private_data_dir:
+                runner = PlaybookRunner(private_data_dir, on_event=on_event)
+                for playbook in self.playbooks:
+                    started_at = time.time()
+                    result = await runner.run(playbook, inventory)
+                    self.ansible[result.playbook] = {"status": result.status, "rc": result.rc, "hosts": result.hosts}
+                    for host, counts in result.hosts.items():
+                        failed = counts["failures"] or counts["unreachable"]
+                        self._record_device(9, host, not failed, started_at, f"{result.playbook}: {counts}")
+                    if not result.ok:
+                        self._update_status(9, completed=False, message=f"{result.playbook} {result.status} (rc={result.rc})")
+                        return False
+
+            self._update_status(9, completed=True, message=f"{len(self.playbooks)} playbooks applied")
+            return True
+
+        except Exception as e:
+            self._update_status(9, completed=False, message=f"Ansible step failed: {e}")
+            print(f"[ERROR] Ansible step failed: {e}")
+            return False
+
+    async def restore_lab(self) -> bool:
+        """Restore the snapshot of start_stage and wait until every node console answers"""
+        name = stage_snapshot_name(self.start_stage)
+        try:
+            self._update_status(7, in_progress=True, message=f"Restoring lab snapshot {name}...")
+            errors = await self.lab.restore_and_boot(name, prompt_timeout=self.lab_boot_timeout)
+            failed = {node: error for node, error in errors.items() if error}
+            for node, error in failed.items():
+                print(f"{node} did not come back after restore: {error}")
+            if failed:
+                self._update_status(7, in_progress=True, message=f"Lab restored, {len(failed)} nodes not ready")
+                return False
+            self.restored_stage = self.start_stage
+            self._update_status(7, in_progress=True, message=f"Lab restored from {name}")
+            return True
+        except Exception as e:
+            self._update_status(7, in_progress=True, message=f"Snapshot restore failed, running from scratch: {e}")
+            print(f"[ERROR] Snapshot restore failed: {e}")
+            return False
+
+    async def snapshot_stage(self, stage: str) -> bool:
+        """Save the lab as it is right after `stage`, replacing an older snapshot of it"""
+        name = stage_snapshot_name(stage)
+        try:
+            await self._run_blocking(self.lab.take, name)
+            print(f"✓ Lab snapshot {name} saved")
+            return True
+        except Exception as e:
+            print(f"⚠ Lab snapshot {name} failed: {e}")
+            return False
+
+    async def _run_blocking(self, func, *args):
+        """Run a blocking call in the default executor so the event loop stays responsive"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args))
+
+    async def _ftd_stages(self) -> Dict[str, bool]:
+        results = {}
+        if self.restored_stage == "ftd_initial":
+            results["ftd_initial"] = True
+            self._update_status(7, completed=True, message="FTD initial setup restored from snapshot")
+        else:
+            started_at = time.time()
+            results["ftd_initial"] = await self.configure_ftd_initial_setup()
+            self._record_device(7, self._ftd_name(), results["ftd_initial"], started_at, "initial setup")
+            if results["ftd_initial"] and self.lab is not None:
+                await self.snapshot_stage("ftd_initial")
+        if not results["ftd_initial"]:
+            print("⚠️ FTD initial setup incomplete - trying API configuration anyway")
+
+        started_at = time.time()
+        results["ftd_api"] = await self.configure_ftd_via_api()
+        self._record_device(8, self._ftd_name(), results["ftd_api"], started_at, "API configuration")
+        return results
+
     async def full_orchestration(self) -> Dict[str, bool]:
         """Run complete orchestration with proper error handling"""
         results = {}
         try:
-            results["load_testbed"] = self.load_testbed()
+            results["load_testbed"] = await self._run_blocking(self.load_testbed)
             if not results["load_testbed"]:
                 print("❌ Testbed loading failed - stopping orchestration")
                 return results
 
-            results["server_setup"] = self.server_interfaces()
+            if self.start_stage and self.lab is not None and not await self.restore_lab():
+                print(f"⚠️ Could not start from {self.start_stage} - running every stage")
+
+            results["server_setup"] = await self._run_blocking(self.server_interfaces)
             if not results["server_setup"]:
                 print("⚠️ Server setup failed - continuing anyway")
 
@@ -679,11 +1005,22 @@ class NetworkOrchestrator:
             if not results["router_config"]:
                 print("⚠️ Router configuration had failures - continuing anyway")
 
-            results["ftd_initial"] = await self.configure_ftd_initial_setup()
-            if not results["ftd_initial"]:
-                print("⚠️ FTD initial setup incomplete - trying API configuration anyway")
+            # Probing before RIP has converged would report every remote subnet as unreachable
+            results["convergence"] = await self.wait_for_routing()
+            if not results["convergence"]:
+                print("⚠️ Routing did not converge - continuing anyway")
+
+            results["reachability"] = await self.verify_reachability()
+            if not results["reachability"]:
+                print("⚠️ Some router interfaces are unreachable - continuing anyway")
+
+            results["verification"] = await self.verify_configuration()
+            if not results["verification"]:
+                print("⚠️ Router state differs from the testbed - continuing anyway")
 
-            results["ftd_api"] = await self.configure_ftd_via_api()
+            # The FTD stages (telnet, then REST) and the playbooks touch different devices: run them together
+            ftd_results, results["ansible"] = await asyncio.gather(self._ftd_stages(), self.run_playbooks())
+            results.update(ftd_results)
 
             print("\n" + "=" * 60)
             print("ORCHESTRATION SUMMARY")
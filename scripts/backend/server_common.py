@@ -0,0 +1,249 @@
+"""
+Configuration and framework-independent helpers shared by api_server.py
+(Flask) and async_api_server.py (aiohttp).
+
+Both servers read the same environment, build the same orchestrator factory
+and answer status, SSE and upload requests with the same documents; only the
+request and response objects differ, so the servers keep the handlers and
+this module keeps everything else.
+"""
+import functools
+import os
+import sys
+from typing import Callable, List, Optional, Tuple
+
+import urllib3
+from werkzeug.utils import secure_filename
+
+# Add current directory and parent project folder to path so imports inside orchestrator work
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+# Repository root: orchestrator imports `scripts.backend.*` and the shared `lib.*` modules
+root_dir = os.path.abspath(os.path.join(current_dir, '..', '..'))
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+try:
+    from orchestrator import NetworkOrchestrator, SNAPSHOT_STAGES
+    from lib.gns3_api.snapshots import LabSnapshots
+    ORCHESTRATOR_AVAILABLE = True
+except ImportError as e:
+    print(f"Failed to import NetworkOrchestrator: {e}")
+    SNAPSHOT_STAGES = {}
+    ORCHESTRATOR_AVAILABLE = False
+
+from job_manager import FINISHED_STATES, initial_status, status_delta
+from status_events import format_sse
+from testbed_cache import TestbedCache, CACHE_DIR_NAME
+
+# Seconds between keep-alive comments on idle event streams
+SSE_KEEPALIVE = 15
+# Default and maximum seconds a ?since= long-poll request may block
+LONG_POLL_TIMEOUT = 25
+LONG_POLL_MAX = 60
+# Concurrent orchestration runs and jobs allowed to wait for a worker
+MAX_WORKERS = int(os.environ.get('ORCHESTRATOR_MAX_WORKERS', 2))
+MAX_QUEUE = int(os.environ.get('ORCHESTRATOR_MAX_QUEUE', 20))
+# SQLite file keeping every finished job
+HISTORY_DB = os.environ.get('ORCHESTRATOR_HISTORY_DB', 'orchestration_history.db')
+# Also run the full pyATS schema check on upload (imports pyATS)
+PYATS_VALIDATION = os.environ.get('ORCHESTRATOR_PYATS_VALIDATION', '') == '1'
+# GNS3 project whose stage snapshots jobs may start from (start_stage)
+GNS3_URL = os.environ.get('ORCHESTRATOR_GNS3_URL')
+GNS3_PROJECT_ID = os.environ.get('ORCHESTRATOR_GNS3_PROJECT_ID')
+# Playbooks every job runs on the inventory generated from its testbed (os.pathsep separated)
+PLAYBOOKS = [path for path in os.environ.get('ORCHESTRATOR_PLAYBOOKS', '').split(os.pathsep) if path]
+UPLOAD_FOLDER = 'uploads'
+ALLOWED_EXTENSIONS = {'yaml', 'yml'}
+MAX_CONTENT_LENGTH = 16 * 1024 * 1024
+KEEPALIVE_FRAME = ': keep-alive\n\n'
+
+# Disable SSL warnings
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+class RequestError(Exception):
+    """Invalid API request; the handler answers {'error': message, **extra} with status"""
+
+    def __init__(self, message: str, status: int = 400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+    def payload(self) -> dict:
+        return dict(self.extra, error=str(self))
+
+
+def orchestrator_factory():
+    """NetworkOrchestrator bound to the configured playbooks and GNS3 lab snapshots"""
+    if not ORCHESTRATOR_AVAILABLE:
+        return None
+    lab = LabSnapshots.connect(GNS3_URL, GNS3_PROJECT_ID) if GNS3_URL and GNS3_PROJECT_ID else None
+    return functools.partial(NetworkOrchestrator, lab=lab, playbooks=PLAYBOOKS)
+
+
+def testbed_cache() -> TestbedCache:
+    # Shared with the orchestrator, which looks next to the testbed file
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    return TestbedCache(os.path.join(UPLOAD_FOLDER, CACHE_DIR_NAME), pyats_validation=PYATS_VALIDATION)
+
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def upload_path(filename: Optional[str]) -> Tuple[str, str]:
+    """(safe file name, path in the upload folder) for an uploaded testbed"""
+    if not filename:
+        raise RequestError('No file selected')
+    if not allowed_file(filename):
+        raise RequestError('Only YAML files are allowed')
+    filename = secure_filename(filename)
+    return filename, os.path.join(UPLOAD_FOLDER, filename)
+
+
+def upload_response(filename: str, filepath: str, testbed_hash: Optional[str], errors: List[str]) -> Tuple[dict, int]:
+    if errors:
+        return {
+            'error': 'Testbed validation failed',
+            'validation_errors': errors,
+            'filename': filename,
+            'filepath': filepath
+        }, 422
+    return {
+        'message': 'File uploaded successfully',
+        'filename': filename,
+        'filepath': filepath,
+        'testbed_hash': testbed_hash
+    }, 200
+
+
+def job_request(data: Optional[dict]) -> Tuple[str, Optional[str]]:
+    """(testbed path, start stage) of a POST /api/jobs body"""
+    if not ORCHESTRATOR_AVAILABLE:
+        raise RequestError('Orchestrator not available', 500)
+    if not data:
+        raise RequestError('No JSON data provided')
+
+    testbed_file = data.get('testbed_file')
+    if not testbed_file:
+        raise RequestError('No testbed file specified')
+
+    filepath = os.path.join(UPLOAD_FOLDER, secure_filename(testbed_file))
+    if not os.path.exists(filepath):
+        raise RequestError('Testbed file not found', 404)
+
+    start_stage = data.get('start_stage')
+    if start_stage is not None:
+        if start_stage not in SNAPSHOT_STAGES:
+            raise RequestError(f'Unknown start stage, expected one of {list(SNAPSHOT_STAGES)}')
+        if not (GNS3_URL and GNS3_PROJECT_ID):
+            raise RequestError('No GNS3 project configured for snapshots')
+    return filepath, start_stage
+
+
+def job_response(job) -> dict:
+    return {
+        'message': 'Orchestration queued successfully',
+        'job_id': job.id,
+        'status': job.snapshot()
+    }
+
+
+def health(**extra) -> dict:
+    return dict({
+        'status': 'healthy',
+        'orchestrator_available': ORCHESTRATOR_AVAILABLE,
+        'service': 'Network Orchestrator API'
+    }, **extra)
+
+
+def latest_status(job_manager) -> dict:
+    """Status of the most recent job, kept for clients of the single-run API"""
+    job = job_manager.latest()
+    return job.snapshot() if job else initial_status()
+
+
+def latest_job_id(job_manager) -> Optional[str]:
+    job = job_manager.latest()
+    return job.id if job else None
+
+
+# SSE
+
+def last_event_id(value: Optional[str]) -> Optional[int]:
+    """Last-Event-ID header (or ?last_event_id=) of a resuming client"""
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def stream_start(event_log, last_id: Optional[int], snapshot_fn: Callable[[], dict]) -> Tuple[int, Optional[str]]:
+    """Sequence to follow from and the snapshot frame a new or unresumable client gets first"""
+    if last_id is not None and event_log.can_resume(last_id):
+        return last_id, None
+    # Take the sequence first so no event between the two reads is lost
+    seq = event_log.seq
+    return seq, format_sse(seq, 'snapshot', snapshot_fn())
+
+
+def event_frames(events: List[dict]) -> Tuple[Optional[int], str]:
+    """SSE frames of a batch of events and the id of the last one (None and a keep-alive when empty)"""
+    if not events:
+        return None, KEEPALIVE_FRAME
+    return events[-1]['id'], ''.join(format_sse(event['id'], event['event'], event['data']) for event in events)
+
+
+def job_finished(job) -> Callable[[], bool]:
+    return lambda: job.state in FINISHED_STATES
+
+
+def stream_done(events: List[dict], finished_fn: Optional[Callable[[], bool]]) -> bool:
+    """True once a job's stream has sent its final status, or idles after the job finished"""
+    if finished_fn is None:
+        return False
+    if events:
+        return any(event['event'] == 'status' and event['data'].get('state') in FINISHED_STATES
+                   for event in events)
+    return finished_fn()
+
+
+# Versioned status with ETags and ?since= long polls
+
+def long_poll_timeout(value) -> float:
+    return min(float(value) if value is not None else LONG_POLL_TIMEOUT, LONG_POLL_MAX)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == '*' or f'"{etag}"' in if_none_match
+
+
+def full_status(event_log, snapshot_fn: Callable[[], dict], scope: str) -> Tuple[dict, str]:
+    """Complete status document and its ETag"""
+    version = event_log.seq
+    return dict(snapshot_fn(), version=version, full=True), f'{scope}-{version}'
+
+
+def status_since(events: List[dict], since: int, snapshot_fn: Callable[[], dict], scope: str,
+                 job_id_fn: Callable[[], Optional[str]] = None,
+                 if_none_match: Optional[str] = None) -> Tuple[Optional[dict], str]:
+    """Delta for a ?since= poll that waited for events.
+
+    A poll that timed out without events gets None (answered with 304) only
+    when the client sent the matching ETag, otherwise an empty delta.
+    """
+    if not events and etag_matches(if_none_match, f'{scope}-{since}'):
+        return None, f'{scope}-{since}'
+    version = events[-1]['id'] if events else since
+    snapshot = snapshot_fn()
+    delta = status_delta(events, snapshot, version, job_id_fn() if job_id_fn else None)
+    if delta is None:
+        delta = dict(snapshot, version=version, full=True)
+    return delta, f'{scope}-{version}'
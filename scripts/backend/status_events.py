@@ -0,0 +1,74 @@
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import List, Optional
+
+
+class StatusEventLog:
+    """Sequence-numbered log of status changes that SSE clients can follow and resume."""
+
+    def __init__(self, max_events: int = 1000):
+        self._events = deque(maxlen=max_events)
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def publish(self, event_type: str, data: dict) -> int:
+        """Append an event and wake every waiting stream"""
+        with self._cond:
+            self._seq += 1
+            self._events.append({'id': self._seq, 'event': event_type, 'data': data})
+            self._cond.notify_all()
+            return self._seq
+
+    def can_resume(self, last_id: int) -> bool:
+        """True if every event after last_id is still buffered"""
+        with self._cond:
+            oldest = self._events[0]['id'] if self._events else self._seq + 1
+            return oldest - 1 <= last_id <= self._seq
+
+    def since(self, last_id: int) -> List[dict]:
+        with self._cond:
+            return [event for event in self._events if event['id'] > last_id]
+
+    def wait(self, last_id: int, timeout: Optional[float] = None) -> List[dict]:
+        """Block until there are events after last_id or the timeout passes"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > last_id, timeout=timeout)
+            return [event for event in self._events if event['id'] > last_id]
+
+
+def format_sse(event_id: int, event_type: str, data: dict) -> str:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+class AsyncStatusEventLog(StatusEventLog):
+    """Event log for the async server: every publisher and reader runs on one event loop"""
+
+    def __init__(self, max_events: int = 1000):
+        super().__init__(max_events)
+        self._waiters = set()
+
+    def publish(self, event_type: str, data: dict) -> int:
+        seq = super().publish(event_type, data)
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        return seq
+
+    async def next_events(self, last_id: int, timeout: Optional[float] = None) -> List[dict]:
+        """Wait without blocking the loop until there are events after last_id"""
+        if self._seq <= last_id:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.add(waiter)
+            try:
+                await asyncio.wait_for(waiter, timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._waiters.discard(waiter)
+        return self.since(last_id)
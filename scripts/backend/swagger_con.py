@@ -1,15 +1,19 @@
 import json
+from typing import TYPE_CHECKING
 
 import requests
 from bravado.client import SwaggerClient
-from pyats.topology import Device
 from bravado.requests_client import RequestsClient
 
+if TYPE_CHECKING:
+    # only for annotations: importing this connector must not load pyATS
+    from pyats.topology import Device
+
 
 class SwaggerConnector:
-    def __init__(self, device: Device, **kwargs):
+    def __init__(self, device: 'Device', **kwargs):
         print('got:', kwargs)
-        self.device: Device = device
+        self.device: 'Device' = device
         self.client = None
         self._session = None
         self._headers = None
@@ -19,6 +23,8 @@ class SwaggerConnector:
         self.__refresh_token = None
         self.__token_type = None
         self.connected = False
+        # pyATS passes the per-attempt timeout of device.connect() through
+        self.timeout = kwargs.get('connection_timeout', 30)
 
     def connect(self):
         host = self.device.connections.swagger.ip
@@ -39,6 +45,7 @@ class SwaggerConnector:
             url=self._url + endpoint,
             headers=self._headers,
             verify=False,
+            timeout=self.timeout,
             data=json.dumps(
                 {
                     'username': self.device.credentials.default.username,
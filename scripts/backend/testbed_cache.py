@@ -0,0 +1,110 @@
+import copy
+import ipaddress
+import json
+import os
+from typing import List, Optional, Tuple
+
+import yaml
+
+from lib.testbed.loader import content_hash, resolve_extends, testbed_hash
+
+CACHE_DIR_NAME = '.testbed_cache'
+
+
+def default_cache_dir(testbed_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(testbed_path)), CACHE_DIR_NAME)
+
+
+def validate_testbed(data: dict) -> List[str]:
+    """Structural checks the orchestrator relies on, returns a list of error messages"""
+    errors = []
+    devices = data.get('devices')
+    if not isinstance(devices, dict) or not devices:
+        return ["Testbed has no 'devices' section"]
+
+    for name, device in devices.items():
+        if not isinstance(device, dict):
+            errors.append(f"Device {name}: definition must be a mapping")
+            continue
+        for key in ('os', 'type'):
+            if not device.get(key):
+                errors.append(f"Device {name}: missing '{key}'")
+        for conn_name, conn in (device.get('connections') or {}).items():
+            if isinstance(conn, dict) and 'ip' in conn:
+                try:
+                    ipaddress.ip_address(str(conn['ip']).strip())
+                except ValueError:
+                    errors.append(f"Device {name}: connection {conn_name} has invalid ip '{conn['ip']}'")
+
+    for name, topo in (data.get('topology') or {}).items():
+        if name not in devices:
+            errors.append(f"Topology references undeclared device {name}")
+            continue
+        for intf_name, intf in ((topo or {}).get('interfaces') or {}).items():
+            if not isinstance(intf, dict):
+                errors.append(f"{name} {intf_name}: definition must be a mapping")
+                continue
+            if 'ipv4' in intf:
+                try:
+                    ipaddress.ip_interface(str(intf['ipv4']))
+                except ValueError:
+                    errors.append(f"{name} {intf_name}: invalid ipv4 '{intf['ipv4']}'")
+    return errors
+
+
+class TestbedCache:
+    """Parse-once testbed store keyed by the hash of the file and everything it extends"""
+
+    def __init__(self, cache_dir: str, pyats_validation: bool = False):
+        self.cache_dir = cache_dir
+        # Full pyATS schema check on store; off by default so uploads and jobs never import pyATS
+        self.pyats_validation = pyats_validation
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def store(self, testbed_path: str) -> Tuple[Optional[str], List[str]]:
+        """Parse and validate a testbed, cache the merged model; returns (hash, errors)"""
+        try:
+            data, files = resolve_extends(testbed_path)
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            return None, [str(e)]
+
+        errors = validate_testbed(data)
+        if not errors and self.pyats_validation:
+            try:
+                from pyats.topology import loader
+                loader.load(copy.deepcopy(data))
+            except ImportError:
+                pass
+            except Exception as e:
+                errors.append(f"pyATS validation failed: {e}")
+        if errors:
+            return None, errors
+
+        key = content_hash(files)
+        tmp_path = self._entry(key) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'), default=str)
+        os.replace(tmp_path, self._entry(key))
+        return key, []
+
+    def testbed_hash(self, testbed_path: str) -> str:
+        """Cache key of a testbed file and everything it extends"""
+        return testbed_hash(testbed_path)
+
+    def load_model(self, testbed_path: str) -> dict:
+        """Merged testbed dict from cache, parsing and storing it on a miss"""
+        entry = self._entry(self.testbed_hash(testbed_path))
+        if not os.path.exists(entry):
+            key, errors = self.store(testbed_path)
+            if errors:
+                raise ValueError('; '.join(errors))
+            entry = self._entry(key)
+        with open(entry) as f:
+            return json.load(f)
+
+    def load(self, testbed_path: str):
+        from pyats.topology import loader
+        return loader.load(self.load_model(testbed_path))
@@ -1,17 +1,29 @@
+import argparse
 import subprocess
 
-print("🧹 CLEANING ALL 192.168.x.x ROUTES...")
+from lib.hostnet.routes import RouteReconciler
+from lib.testbed.loader import load
+from lib.testbed.topology import TopologyGraph
 
-# Delete all 192.168.x.x routes
-result = subprocess.run(
-    "sudo ip route show | grep '192.168.' | grep 'via' | sudo xargs -I {} ip route del {}",
-    shell=True,
-    capture_output=True,
-    text=True
-)
+parser = argparse.ArgumentParser(description='Remove the server routes installed for the testbeds')
+parser.add_argument('testbed', nargs='?',
+                    help='also remove this testbed\'s routes if they were added without the managed tag')
+parser.add_argument('--server', default='UbuntuServer', help='testbed device the routes were added on')
+args = parser.parse_args()
 
-print(f"✅ Cleanup command executed (return code: {result.returncode})")
+owned = {}
+if args.testbed:
+    owned = TopologyGraph.from_testbed(load(args.testbed), root=args.server).routes()
+
+# Desired state is "no managed routes": routes of other tools are left alone
+reconciler = RouteReconciler()
+plan, results = reconciler.reconcile({}, owned=owned)
+print(f"🧹 CLEANING TESTBED ROUTES: {plan.summary()}")
+
+for result in results:
+    status = "✅" if result.ok else f"⚠️ {result.error}"
+    print(f"{result.command}: {status}")
 
 # Show current routes
 print("📋 CURRENT ROUTING TABLE:")
-subprocess.run(["ip", "route", "show"])
\ No newline at end of file
+subprocess.run(["ip", "route", "show"])
@@ -0,0 +1,10 @@
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BACKEND = os.path.join(ROOT, 'scripts', 'backend')
+
+# lib.* from the repository root, the backend modules by their own names like the servers import them
+for path in (ROOT, BACKEND):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,64 @@
+import ipaddress
+
+from lib.testbed.addressing import PrefixTrie, check_addressing
+from lib.testbed.loader import load
+
+
+def make_testbed(topology, types=None):
+    types = types or {}
+    return load({
+        'devices': {name: {'type': types.get(name, 'router')} for name in topology},
+        'topology': {
+            name: {'interfaces': {intf: {'ipv4': ipv4, 'link': link} for intf, (ipv4, link) in interfaces.items()}}
+            for name, interfaces in topology.items()
+        },
+    })
+
+
+def test_trie_returns_covering_prefixes():
+    trie = PrefixTrie()
+    net = ipaddress.IPv4Network
+    assert trie.insert(net('10.0.0.0/8'), 'a') == []
+    assert trie.insert(net('10.1.0.0/16'), 'b') == [(net('10.0.0.0/8'), 'a')]
+    assert trie.insert(net('10.1.0.0/16'), 'c') == [(net('10.0.0.0/8'), 'a'), (net('10.1.0.0/16'), 'b')]
+    assert trie.insert(net('192.168.0.0/24'), 'd') == []
+    # a prefix stored again keeps its first value and is counted once
+    assert len(trie) == 3
+
+
+def test_default_route_covers_everything():
+    trie = PrefixTrie()
+    trie.insert(ipaddress.IPv4Network('0.0.0.0/0'), 'default')
+    assert trie.insert(ipaddress.IPv4Network('172.16.0.0/12'), 'x') == [(ipaddress.IPv4Network('0.0.0.0/0'), 'default')]
+
+
+def test_clean_addressing_has_no_errors():
+    tb = make_testbed({
+        'R1': {'e0/0': ('10.0.12.1/24', 'r1-r2'), 'e0/1': ('10.0.13.1/24', 'r1-r3')},
+        'R2': {'e0/0': ('10.0.12.2/24', 'r1-r2')},
+        'R3': {'e0/0': ('10.0.13.3/24', 'r1-r3')},
+    })
+    assert check_addressing(tb) == []
+
+
+def test_addressing_errors():
+    tb = make_testbed({
+        'R1': {'e0/0': ('10.0.12.1/24', 'r1-r2'), 'e0/1': ('10.0.0.1/16', 'r1-r3'), 'e0/2': ('10.9.9.0/24', 'stub')},
+        'R2': {'e0/0': ('10.0.12.1/24', 'r1-r2'), 'e0/1': ('10.0.99.2/24', 'r2-r4')},
+        'R3': {'e0/0': ('10.0.0.3/16', 'r1-r3')},
+        'R4': {'e0/0': ('10.0.98.4/24', 'r2-r4')},
+    })
+    errors = check_addressing(tb)
+    assert 'Duplicate IP 10.0.12.1 on R1 e0/0, R2 e0/0' in errors
+    assert 'R1 e0/2: 10.9.9.0/24 is not a host address' in errors
+    assert 'Link r2-r4 mixes subnets 10.0.98.0/24, 10.0.99.0/24' in errors
+    assert 'Subnet 10.0.12.0/24 (r1-r2) overlaps 10.0.0.0/16 (r1-r3)' in errors
+    assert len(errors) == 6
+
+
+def test_subnet_reused_on_two_links():
+    tb = make_testbed({
+        'R1': {'e0/0': ('10.0.12.1/24', 'a'), 'e0/1': ('10.0.12.5/24', 'b')},
+        'R2': {'e0/0': ('10.0.12.2/24', 'a')},
+    })
+    assert check_addressing(tb) == ['Subnet 10.0.12.0/24 is used on several links: a, b']
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('ansible_runner')
+
+from lib.ansible_api import runner as runner_module
+from lib.ansible_api.runner import PlaybookRunner
+
+EVENTS = [
+    {'event': 'playbook_on_start'},
+    {'event': 'runner_on_ok', 'event_data': {'host': 'R1', 'task': 'hostname', 'res': {'changed': True}}},
+    {'event': 'runner_on_ok', 'event_data': {'host': 'R2', 'task': 'hostname', 'res': {}}},
+    {'event': 'runner_on_unreachable', 'event_data': {'host': 'R3', 'task': 'hostname',
+                                                      'res': {'msg': ['ssh timeout', 'port 22']}}},
+    {'event': 'playbook_on_stats'},
+]
+STATS = {'ok': {'R1': 1, 'R2': 1}, 'changed': {'R1': 1}, 'failures': {}, 'dark': {'R3': 1}, 'skipped': {}}
+
+
+class FakeRunner:
+    def __init__(self, status, rc, stats):
+        self.status, self.rc, self.stats = status, rc, stats
+
+
+def fake_run_async(events=EVENTS, status='failed', rc=4, stats=STATS, hang=False):
+    """ansible_runner.run_async stand-in: feeds events from its own thread like the real runner"""
+    calls = []
+
+    def run_async(event_handler=None, cancel_callback=None, **kwargs):
+        calls.append(kwargs)
+        runner = FakeRunner(status, rc, stats)
+
+        def play():
+            for event in events:
+                event_handler(event)
+            while hang and not cancel_callback():
+                time.sleep(0.01)
+            if hang:
+                runner.status, runner.rc = 'canceled', 254
+
+        thread = threading.Thread(target=play)
+        thread.start()
+        return thread, runner
+
+    run_async.calls = calls
+    return run_async
+
+
+def test_events_and_result_are_mapped(monkeypatch, tmp_path):
+    monkeypatch.setattr(runner_module.ansible_runner, 'run_async', fake_run_async())
+    delivered = []
+
+    def on_event(event):
+        delivered.append((event, threading.current_thread() is threading.main_thread()))
+
+    result = asyncio.run(PlaybookRunner(str(tmp_path), on_event=on_event).run('site.yaml', {'all': {}}, limit='R1'))
+
+    # only per-host task events, delivered on the event loop's thread
+    assert [(e.host, e.status, e.message) for e, _ in delivered] == [
+        ('R1', 'changed', ''), ('R2', 'ok', ''), ('R3', 'unreachable', 'ssh timeout; port 22'),
+    ]
+    assert all(on_loop for _, on_loop in delivered)
+    assert (result.playbook, result.status, result.rc, result.events) == ('site.yaml', 'failed', 4, 5)
+    assert result.hosts['R1'] == {'ok': 1, 'changed': 1, 'failures': 0, 'unreachable': 0, 'skipped': 0}
+    assert result.hosts['R3']['unreachable'] == 1
+    assert not result.ok and result.failed_hosts == ['R3']
+    assert runner_module.ansible_runner.run_async.calls[0]['limit'] == 'R1'
+
+
+def test_failing_event_callback_does_not_stop_the_run(monkeypatch, tmp_path):
+    monkeypatch.setattr(runner_module.ansible_runner, 'run_async', fake_run_async(status='successful', rc=0, stats={}))
+
+    def on_event(event):
+        raise ValueError('broken consumer')
+
+    result = asyncio.run(PlaybookRunner(str(tmp_path), on_event=on_event).run('site.yaml', {}))
+    assert result.ok and result.events == len(EVENTS)
+
+
+def test_runner_errors_propagate(monkeypatch, tmp_path):
+    def run_async(**kwargs):
+        raise RuntimeError('inventory is not valid')
+
+    monkeypatch.setattr(runner_module.ansible_runner, 'run_async', run_async)
+    with pytest.raises(RuntimeError, match='inventory is not valid'):
+        asyncio.run(PlaybookRunner(str(tmp_path)).run('site.yaml', {}))
+
+
+def test_timeout_cancels_the_runner(monkeypatch, tmp_path):
+    monkeypatch.setattr(runner_module.ansible_runner, 'run_async', fake_run_async(events=[], hang=True))
+    result = asyncio.run(PlaybookRunner(str(tmp_path)).run('site.yaml', {}, timeout=0.05))
+    assert (result.status, result.rc) == ('canceled', 254) and not result.ok
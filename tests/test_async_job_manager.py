@@ -0,0 +1,77 @@
+import asyncio
+
+from async_job_manager import AsyncJobManager
+from job_manager import CANCELLED
+
+
+class RecordingHistory:
+    def __init__(self):
+        self.records = []
+
+    def record_job(self, record):
+        self.records.append(record)
+
+
+class SlowOrchestrator:
+    def __init__(self, **kwargs):
+        self.configured_passed = set()
+        self.configured_failed = set()
+        self.device_results = []
+        self.reachability = self.verification = self.convergence = self.ansible = None
+
+    async def full_orchestration(self):
+        # one outcome before the long step
+        self.device_results.append({'device': 'R1', 'step_id': 3, 'success': True, 'message': 'configured'})
+        await asyncio.sleep(10)
+        return {}
+
+
+def test_cancel_before_task_started():
+    history = RecordingHistory()
+
+    async def scenario():
+        manager = AsyncJobManager(SlowOrchestrator, max_workers=1, history=history)
+        job = manager.submit('testbed.yaml')
+        # cancelled before the task took its first step
+        assert manager.cancel(job.id)
+        await asyncio.gather(job.task, return_exceptions=True)
+        await asyncio.sleep(0.05)
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.state == CANCELLED
+    assert job.snapshot()['error'] == 'Cancelled before start'
+    assert job.finished_at is not None
+    assert [record['state'] for record in history.records] == [CANCELLED]
+
+
+def test_cancel_waiting_and_running_jobs():
+    history = RecordingHistory()
+
+    async def scenario():
+        manager = AsyncJobManager(SlowOrchestrator, max_workers=1, history=history)
+        running = manager.submit('a.yaml')
+        waiting = manager.submit('b.yaml')
+        await asyncio.sleep(0.05)
+        assert manager.cancel(waiting.id) and manager.cancel(running.id)
+        await asyncio.gather(running.task, waiting.task, return_exceptions=True)
+        return running, waiting
+
+    running, waiting = asyncio.run(scenario())
+    assert running.snapshot()['error'] == 'Cancelled'
+    assert waiting.snapshot()['error'] == 'Cancelled before start'
+    assert sorted(record['state'] for record in history.records) == [CANCELLED, CANCELLED]
+
+
+def test_cancelled_job_keeps_device_outcomes():
+    history = RecordingHistory()
+
+    async def scenario():
+        manager = AsyncJobManager(SlowOrchestrator, max_workers=1, history=history)
+        job = manager.submit('a.yaml')
+        await asyncio.sleep(0.05)
+        assert manager.cancel(job.id)
+        await asyncio.gather(job.task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert [device['device'] for device in history.records[0]['devices']] == ['R1']
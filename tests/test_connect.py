@@ -0,0 +1,76 @@
+import asyncio
+
+from lib.pyats_tools.connect import connect_all, gather_devices
+
+
+class FakeWriter:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_gather_devices_keeps_other_devices_when_one_raises():
+    async def ok():
+        return 'session'
+
+    async def broken():
+        raise RuntimeError('unexpected prompt')
+
+    results = asyncio.run(gather_devices({'R1': ok, 'R2': broken}, timeout=1, retries=0, retry_delay=0))
+    assert results['R1'].connected and results['R1'].connection == 'session'
+    assert not results['R2'].connected
+    assert results['R2'].error == 'unexpected prompt'
+
+
+def test_gather_devices_timeout_cancels_factory_so_it_can_close():
+    writers = []
+
+    async def hanging():
+        writer = FakeWriter()
+        writers.append(writer)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            writer.close()
+            raise
+
+    results = asyncio.run(gather_devices({'R1': hanging}, timeout=0.05, retries=1, retry_delay=0))
+    assert not results['R1'].connected
+    assert results['R1'].attempts == 2
+    assert 'no answer' in results['R1'].error
+    assert len(writers) == 2 and all(writer.closed for writer in writers)
+
+
+class FlakyDevice:
+    def __init__(self, name, failures):
+        self.name = name
+        self.failures = failures
+        self.calls = []
+        self.destroyed = 0
+
+    def connect(self, **kwargs):
+        self.calls.append(kwargs)
+        if len(self.calls) <= self.failures:
+            raise ConnectionError('refused')
+        return 'connected'
+
+    def destroy(self):
+        self.destroyed += 1
+
+
+class FakeTestbed:
+    def __init__(self, *devices):
+        self.devices = {device.name: device for device in devices}
+
+
+def test_connect_all_retries_and_passes_timeout():
+    flaky, dead = FlakyDevice('R1', failures=1), FlakyDevice('R2', failures=5)
+    results = connect_all(FakeTestbed(flaky, dead), timeout=7, retries=1, retry_delay=0)
+
+    assert results['R1'].connected and results['R1'].attempts == 2
+    assert flaky.destroyed == 1
+    assert all(call['connection_timeout'] == 7 for call in flaky.calls)
+    assert not results['R2'].connected and results['R2'].error == 'refused'
+    assert len(dead.calls) == 2
@@ -0,0 +1,81 @@
+import asyncio
+
+from lib.runners import convergence
+from lib.runners.convergence import expected_prefixes, wait_for_convergence
+from lib.runners.verification import SHOW_ROUTES
+from lib.testbed.loader import load
+
+
+def router(mgmt_ip, *routed):
+    interfaces = {'e0': {'alias': 'initial', 'link': 'management', 'ipv4': f'{mgmt_ip}/24'}}
+    for i, (link, ipv4) in enumerate(routed, 1):
+        interfaces[f'e{i}'] = {'link': link, 'ipv4': ipv4}
+    return {'interfaces': interfaces}
+
+
+TESTBED = load({
+    'devices': {
+        name: {'type': 'router', 'os': 'iosxe',
+               'credentials': {'default': {'username': 'admin', 'password': 'secret'}}}
+        for name in ('R1', 'R2')
+    },
+    'topology': {
+        'R1': router('192.168.200.1', ('lan1', '10.0.1.1/24'), ('r1_r2', '10.0.12.1/24')),
+        'R2': router('192.168.200.2', ('r1_r2', '10.0.12.2/24'), ('lan2', '10.0.2.1/24')),
+    },
+})
+
+PARTIAL = '''
+      10.0.0.0/8 is variably subnetted, 2 subnets, 2 masks
+C        10.0.1.0/24 is directly connected, Ethernet0/1
+C        10.0.12.0/24 is directly connected, Ethernet0/2
+'''
+FULL = PARTIAL + 'R        10.0.2.0/24 [120/1] via 10.0.12.2, 00:00:03, Ethernet0/2\n'
+
+
+class ScriptedShow:
+    """Stands in for collect(): each poll of a host gets the next scripted output (the last one repeats)"""
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.polls = {host: 0 for host in outputs}
+
+    def __call__(self, target, commands, pool=None, timeout=30.0):
+        host = target[0]
+        script = self.outputs[host]
+        output = script[min(self.polls[host], len(script) - 1)]
+        self.polls[host] += 1
+        if isinstance(output, Exception):
+            raise output
+        return {SHOW_ROUTES: output}
+
+
+def test_expected_prefixes_skip_management():
+    assert expected_prefixes(TESTBED) == {name: {'10.0.1.0/24', '10.0.12.0/24', '10.0.2.0/24'} for name in ('R1', 'R2')}
+
+
+def test_converges_when_every_router_has_every_prefix(monkeypatch):
+    show = ScriptedShow({
+        '192.168.200.1': [PARTIAL, ConnectionError('reloading'), FULL],
+        '192.168.200.2': [FULL],
+    })
+    monkeypatch.setattr(convergence, 'collect', show)
+
+    report = asyncio.run(wait_for_convergence(TESTBED, expected_prefixes(TESTBED), interval=0.01, timeout=5))
+
+    assert report.converged
+    assert report.routers['R1'].polls == 3 and report.routers['R1'].error is None
+    # R2 had everything on the first poll and is not polled again
+    assert report.routers['R2'].polls == 1 and show.polls['192.168.200.2'] == 1
+    assert report.seconds == max(router.seconds for router in report.routers.values())
+
+
+def test_timeout_reports_what_is_still_missing(monkeypatch):
+    monkeypatch.setattr(convergence, 'collect', ScriptedShow({'192.168.200.1': [PARTIAL], '192.168.200.2': [FULL]}))
+
+    report = asyncio.run(wait_for_convergence(TESTBED, expected_prefixes(TESTBED), interval=0.02, timeout=0.1))
+
+    assert not report.converged and report.seconds is None
+    r1 = report.routers['R1']
+    assert not r1.converged and r1.missing == ['10.0.2.0/24'] and r1.polls > 1
+    assert report.routers['R2'].converged
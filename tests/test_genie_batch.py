@@ -0,0 +1,57 @@
+from lib.pyats_tools.genie_batch import ConfigBatch, merge_config
+
+
+def test_conflicting_subcommands_keep_their_order():
+    lines = ['interface Gi2', ' no shutdown', ' shutdown', ' no shutdown', ' exit']
+    assert merge_config(lines) == lines
+
+
+def test_consecutive_repeats_are_dropped():
+    lines = [
+        'interface Gi2', ' ip address 10.0.0.1 255.255.255.0', ' ip address 10.0.0.1 255.255.255.0', ' exit',
+        'interface Gi2', ' ip address 10.0.0.1 255.255.255.0', ' exit',
+        'ip route 0.0.0.0 0.0.0.0 10.0.0.2',
+        'ip route 0.0.0.0 0.0.0.0 10.0.0.2',
+    ]
+    assert merge_config(lines) == [
+        'interface Gi2', ' ip address 10.0.0.1 255.255.255.0', ' exit',
+        'ip route 0.0.0.0 0.0.0.0 10.0.0.2',
+    ]
+
+
+def test_blocks_are_not_moved_across_other_commands():
+    lines = [
+        'interface Gi2', ' shutdown', ' exit',
+        'no ip routing',
+        'interface Gi2', ' no shutdown', ' exit',
+    ]
+    assert merge_config(lines) == lines
+
+
+class FakeDevice:
+    def __init__(self, name):
+        self.name = name
+        self.configured = []
+
+    def configure(self, config):
+        self.configured.append(config)
+
+
+class FakeConf:
+    def __init__(self, device, text):
+        self.device = device
+        self.text = text
+
+    def build_config(self, apply=True):
+        return self.text
+
+
+def test_one_configure_call_per_device():
+    r1, r2 = FakeDevice('R1'), FakeDevice('R2')
+    batch = ConfigBatch()
+    batch.add(FakeConf(r1, 'hostname R1')).add(FakeConf(r2, 'hostname R2')).add(FakeConf(r1, 'hostname R1'))
+    results = batch.apply()
+
+    assert r1.configured == ['hostname R1'] and r2.configured == ['hostname R2']
+    assert all(result.ok for result in results.values())
+    assert batch.apply() == {}
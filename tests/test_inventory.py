@@ -0,0 +1,88 @@
+import os
+import stat
+
+import yaml
+
+from lib.ansible_api import inventory as inventory_module
+from lib.ansible_api.inventory import InventoryCache, build_inventory
+from lib.testbed.loader import load
+
+CREDENTIALS = {'default': {'username': 'admin', 'password': 'Cisco@135'}, 'enable': {'password': 'Cisco!246'}}
+
+TESTBED = {
+    'devices': {
+        'R1': {
+            'os': 'iosxe', 'type': 'router', 'credentials': CREDENTIALS,
+            'connections': {'telnet': {'protocol': 'telnet', 'ip': '192.168.1.10', 'port': 5000}},
+        },
+        'Edge-FW': {
+            'os': 'ftd', 'type': 'firewall', 'credentials': {'default': {'username': 'admin', 'password': 'x'}},
+            'connections': {'ssh': {'protocol': 'ssh', 'ip': '192.168.200.4', 'port': 2222}},
+        },
+        'Server': {'os': 'linux', 'type': 'linux', 'connections': {'ssh': {'protocol': 'ssh', 'ip': '192.168.200.254'}}},
+        'Console-only': {'os': 'iosxe', 'type': 'router', 'connections': {}},
+    },
+    'topology': {
+        'R1': {'interfaces': {'Ethernet0/0': {'alias': 'initial', 'ipv4': '192.168.200.1/24'}}},
+    },
+}
+
+
+def test_build_inventory_hosts_and_groups():
+    inventory = build_inventory(load(TESTBED), skip=['Server'])['all']
+
+    # devices without any address and skipped ones are left out
+    assert list(inventory['hosts']) == ['R1', 'Edge-FW']
+    assert inventory['hosts']['R1'] == {
+        'ansible_host': '192.168.200.1',
+        'ansible_user': 'admin',
+        'ansible_password': 'Cisco@135',
+        'ansible_become_password': 'Cisco!246',
+        'testbed_connections': {'telnet': {'protocol': 'telnet', 'ip': '192.168.1.10', 'port': 5000}},
+    }
+    # no management interface: the ssh connection, with its non-default port
+    assert inventory['hosts']['Edge-FW']['ansible_host'] == '192.168.200.4'
+    assert inventory['hosts']['Edge-FW']['ansible_port'] == 2222
+
+    children = inventory['children']
+    assert children['type_router']['hosts'] == {'R1': None}
+    assert children['os_iosxe']['vars']['ansible_network_os'] == 'cisco.ios.ios'
+    assert 'vars' not in children['os_ftd']
+
+
+def write(path, data):
+    path.write_text(yaml.safe_dump(data))
+    return str(path)
+
+
+def test_cache_hits_until_the_testbed_changes(tmp_path, monkeypatch):
+    testbed = write(tmp_path / 'lab.yaml', TESTBED)
+    cache = InventoryCache(str(tmp_path / 'cache'))
+    builds = []
+    real_build = inventory_module.build_inventory
+    monkeypatch.setattr(inventory_module, 'build_inventory', lambda tb: builds.append(tb) or real_build(tb))
+
+    first = cache.path(testbed)
+    assert cache.path(testbed) == first and len(builds) == 1
+    assert yaml.safe_load(open(first))['all']['hosts']['R1']['ansible_host'] == '192.168.200.1'
+
+    changed = dict(TESTBED, topology={'R1': {'interfaces': {'e0': {'alias': 'initial', 'ipv4': '10.0.0.1/24'}}}})
+    write(tmp_path / 'lab.yaml', changed)
+    second = cache.path(testbed)
+    assert second != first and len(builds) == 2
+    assert yaml.safe_load(open(second))['all']['hosts']['R1']['ansible_host'] == '10.0.0.1'
+
+
+def test_cache_follows_extended_files(tmp_path):
+    base = write(tmp_path / 'base.yaml', TESTBED)
+    testbed = write(tmp_path / 'lab.yaml', {'extends': os.path.basename(base), 'testbed': {'name': 'lab'}})
+    cache = InventoryCache(str(tmp_path / 'cache'))
+
+    first = cache.path(testbed)
+    write(tmp_path / 'base.yaml', dict(TESTBED, devices={'R1': TESTBED['devices']['R1']}))
+    assert cache.path(testbed) != first
+
+
+def test_cached_inventory_is_private(tmp_path):
+    entry = InventoryCache(str(tmp_path / 'cache')).path(write(tmp_path / 'lab.yaml', TESTBED))
+    assert stat.S_IMODE(os.stat(entry).st_mode) == 0o600
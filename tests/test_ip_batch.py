@@ -0,0 +1,68 @@
+import stat
+import sys
+
+import pytest
+
+from lib.hostnet.ip_batch import IpBatch, parse_failures
+
+STDERR = '''RTNETLINK answers: File exists
+Command failed -:2
+Error: inet prefix is expected rather than "bogus".
+Command failed -:3
+RTNETLINK answers: No such process
+Command failed -:4
+'''
+
+
+def fake_ip(tmp_path, stderr, returncode=1):
+    """An `ip` stand-in that swallows the batch and prints the given stderr"""
+    path = tmp_path / 'ip'
+    path.write_text(
+        f'#!{sys.executable}\n'
+        'import sys\n'
+        'sys.stdin.read()\n'
+        f'sys.stderr.write({stderr!r})\n'
+        f'sys.exit({returncode})\n'
+    )
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+def test_parse_failures_maps_errors_to_lines():
+    assert parse_failures(STDERR) == {
+        2: 'RTNETLINK answers: File exists',
+        3: 'Error: inet prefix is expected rather than "bogus".',
+        4: 'RTNETLINK answers: No such process',
+    }
+    assert parse_failures('') == {}
+
+
+def test_run_maps_failures_to_entries(tmp_path):
+    batch = IpBatch(sudo=False, ip=fake_ip(tmp_path, STDERR))
+    batch.link_up('ens4')
+    batch.address_add('192.168.200.254/24', 'ens4')
+    batch.route_add('bogus', '192.168.200.1')
+    batch.route_del('10.0.0.0/24', '192.168.200.1')
+
+    results = batch.run()
+    assert [(r.command, r.ok, r.unchanged) for r in results] == [
+        ('link set ens4 up', True, False),
+        ('address add 192.168.200.254/24 dev ens4', True, True),
+        ('route add bogus via 192.168.200.1', False, False),
+        ('route del 10.0.0.0/24 via 192.168.200.1', True, True),
+    ]
+    assert 'inet prefix' in results[2].error
+    assert len(batch) == 0
+
+
+def test_run_without_failure_lines_fails_every_entry(tmp_path):
+    batch = IpBatch(sudo=False, ip=fake_ip(tmp_path, 'sudo: a password is required\n'))
+    batch.link_up('ens4').link_up('ens5')
+    results = batch.run()
+    assert [r.ok for r in results] == [False, False]
+    assert all(r.error == 'sudo: a password is required' for r in results)
+
+
+def test_multiline_commands_are_rejected():
+    with pytest.raises(ValueError):
+        IpBatch().add('route add 10.0.0.0/24 via 10.1.1.1\nlink set ens4 down')
@@ -0,0 +1,60 @@
+import time
+
+from job_history import JobHistory
+
+
+def job_record(job_id, devices, steps=(), created_at=None):
+    now = created_at or time.time()
+    return {
+        'job_id': job_id, 'testbed_file': 'testbed.yaml', 'testbed_hash': 'abc', 'state': 'succeeded',
+        'error': None, 'created_at': now, 'started_at': now, 'finished_at': now + 1,
+        'steps': list(steps), 'devices': devices,
+    }
+
+
+def device(name, step_id, success, message=''):
+    now = time.time()
+    return {'device': name, 'step_id': step_id, 'success': success, 'message': message,
+            'started_at': now - 1, 'finished_at': now}
+
+
+def test_every_playbook_outcome_is_kept(tmp_path):
+    history = JobHistory(str(tmp_path / 'history.db'))
+    history.record_job(job_record('job1', [
+        device('R1', 9, False, 'a.yaml'),
+        device('R1', 9, True, 'b.yaml'),
+        device('R2', 9, True, 'a.yaml'),
+    ]))
+
+    devices = history.get_job('job1')['devices']
+    assert [(row['device'], row['success'], row['message']) for row in devices] == [
+        ('R1', 0, 'a.yaml'), ('R1', 1, 'b.yaml'), ('R2', 1, 'a.yaml'),
+    ]
+    assert history.device_failures() == [{'device': 'R1', 'runs': 2, 'failures': 1}]
+
+
+def test_rerecording_a_job_replaces_its_rows(tmp_path):
+    history = JobHistory(str(tmp_path / 'history.db'))
+    history.record_job(job_record('job1', [device('R1', 3, False)]))
+    history.record_job(job_record('job1', [device('R1', 3, True)]))
+    assert [row['success'] for row in history.get_job('job1')['devices']] == [1]
+
+
+def test_step_duration_percentiles(tmp_path):
+    history = JobHistory(str(tmp_path / 'history.db'))
+    now = time.time()
+    for n, duration in enumerate([5, 1, 4, 2, 3, 10, 6, 8, 7, 9], start=1):
+        steps = [{'id': 2, 'name': 'Server interfaces', 'completed': True,
+                  'started_at': now - 100, 'finished_at': now - 100 + duration}]
+        history.record_job(job_record(f'job{n}', [], steps))
+    # a failed run does not count
+    history.record_job(job_record('failed', [], [{'id': 2, 'name': 'Server interfaces', 'completed': False,
+                                                  'started_at': now - 100, 'finished_at': now}]))
+
+    stats = history.step_durations(2, percentiles=(50, 90, 95, 100))
+    assert stats['count'] == 10 and stats['mean'] == 5.5
+    # nearest rank: ceil(p * n / 100)-th smallest duration
+    assert (stats['p50'], stats['p90'], stats['p95'], stats['p100']) == (5, 9, 10, 10)
+
+    empty = history.step_durations(7)
+    assert empty['count'] == 0 and empty['mean'] is None and empty['p50'] is None
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from job_manager import CANCELLED, QUEUED, Job, JobManager, status_delta
+
+
+class RecordingHistory:
+    def __init__(self):
+        self.records = []
+
+    def record_job(self, record):
+        self.records.append(record)
+
+
+def test_cancel_after_worker_took_job_finishes_it():
+    history = RecordingHistory()
+    manager = JobManager(orchestrator_factory=None, max_workers=1, history=history)
+    try:
+        job = Job('testbed.yaml', global_events=manager.events)
+        manager._jobs[job.id] = job
+        # a worker already picked the future up, so future.cancel() fails
+        job.future = Future()
+        assert job.future.set_running_or_notify_cancel()
+
+        assert manager.cancel(job.id)
+        assert job.state == QUEUED
+
+        manager._run(job)
+
+        assert job.state == CANCELLED
+        assert job.finished_at is not None
+        assert job.started_at is None
+        assert job.snapshot()['error'] == 'Cancelled before start'
+        assert [record['state'] for record in history.records] == [CANCELLED]
+        assert not manager.cancel(job.id)
+    finally:
+        manager.shutdown()
+
+
+def test_cancel_queued_job():
+    history = RecordingHistory()
+    manager = JobManager(orchestrator_factory=None, max_workers=1, history=history)
+    try:
+        job = Job('testbed.yaml', global_events=manager.events)
+        manager._jobs[job.id] = job
+        job.future = Future()
+
+        assert manager.cancel(job.id)
+        assert job.state == CANCELLED
+        assert [record['job_id'] for record in history.records] == [job.id]
+    finally:
+        manager.shutdown()
+
+
+
+class SlowOrchestrator:
+    started = None
+
+    def __init__(self, **kwargs):
+        self.configured_passed = set()
+        self.configured_failed = set()
+        self.device_results = []
+
+    async def full_orchestration(self):
+        self.device_results.append({'device': 'R1', 'step_id': 3, 'success': True, 'message': 'configured'})
+        SlowOrchestrator.started.set()
+        await asyncio.sleep(10)
+        return {}
+
+
+def test_cancel_running_job_keeps_device_outcomes():
+    history = RecordingHistory()
+    SlowOrchestrator.started = threading.Event()
+    manager = JobManager(orchestrator_factory=SlowOrchestrator, max_workers=1, history=history)
+    try:
+        job = manager.submit('testbed.yaml')
+        assert SlowOrchestrator.started.wait(5)
+        assert manager.cancel(job.id)
+        job.future.result(timeout=5)
+
+        assert job.state == CANCELLED
+        assert [record['devices'] for record in history.records] == [
+            [{'device': 'R1', 'step_id': 3, 'success': True, 'message': 'configured'}],
+        ]
+    finally:
+        manager.shutdown()
+
+def status_snapshot():
+    return {
+        'job_id': 'job1', 'state': 'running', 'current_step': 3, 'isRunning': True, 'error': None,
+        'steps': [{'id': step_id, 'name': f'step {step_id}', 'completed': step_id < 3} for step_id in range(1, 5)],
+    }
+
+
+def step_event(step_id, job_id='job1'):
+    return {'event': 'step', 'data': {'job_id': job_id, 'step': {'id': step_id}}}
+
+
+def test_status_delta_collapses_events_into_changed_steps():
+    events = [step_event(2), {'event': 'status', 'data': {'job_id': 'job1'}}, step_event(3), step_event(2)]
+    delta = status_delta(events, status_snapshot(), 7, job_id='job1')
+
+    assert delta['full'] is False and delta['version'] == 7
+    assert (delta['state'], delta['current_step'], delta['isRunning']) == ('running', 3, True)
+    # each step once, in the order it first changed, with its current state
+    assert [step['id'] for step in delta['changed_steps']] == [2, 3]
+    assert delta['changed_steps'][0]['completed'] is True
+
+
+def test_status_delta_needs_full_document_for_other_jobs():
+    assert status_delta([step_event(2), step_event(1, job_id='job2')], status_snapshot(), 7, job_id='job1') is None
+    # without a job filter every event counts
+    assert len(status_delta([step_event(1, job_id='job2')], status_snapshot(), 7)['changed_steps']) == 1
+
+
+def test_device_outcomes_reach_the_delta():
+    job = Job('testbed.yaml')
+    job.device_callback({'device': 'R1', 'step_id': 3, 'success': False, 'message': 'timeout'})
+    delta = status_delta(job.events.since(0), job.snapshot(), job.events.seq, job_id=job.id)
+
+    assert delta['changed_steps'] == []
+    assert delta['changed_devices'] == [{'device': 'R1', 'step_id': 3, 'success': False, 'message': 'timeout'}]
+    assert job.snapshot()['devices'] == delta['changed_devices']
@@ -0,0 +1,107 @@
+import asyncio
+import socket
+
+import pytest
+
+pytest.importorskip('telnetlib3')
+
+from lib.gns3_api import lab_manager
+from lib.gns3_api.client import Gns3Client
+from lib.gns3_api.lab_manager import LabManager, LabNode, console_host, resolve_address
+from lib.gns3_api.mock_server import serve
+from lib.testbed.loader import load
+
+TESTBED = {
+    'testbed': {'name': 'lab'},
+    'devices': {
+        'R1': {'os': 'ios', 'type': 'router'},
+        'R2': {'os': 'ios', 'type': 'router'},
+    },
+}
+
+
+def test_console_host_falls_back_to_api_host():
+    assert console_host('0.0.0.0', 'http://gns3.local:3080') == 'gns3.local'
+    assert console_host('10.0.0.5', 'http://gns3.local:3080') == '10.0.0.5'
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+    """Answers getaddrinfo from a table, so the tests never depend on the host's DNS"""
+    names = {'localhost': '127.0.0.1', 'gns3.lab': '192.0.2.20'}
+    lookups = []
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        lookups.append(host)
+        if host not in names:
+            raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+        return [(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', (names[host], port or 0))]
+
+    monkeypatch.setattr(lab_manager.socket, 'getaddrinfo', getaddrinfo)
+    return lookups
+
+
+def test_resolve_address(resolver):
+    assert resolve_address('192.0.2.7') == '192.0.2.7'
+    assert resolve_address('gns3.lab') == '192.0.2.20'
+    with pytest.raises(ValueError, match='no-such-host'):
+        resolve_address('no-such-host.invalid')
+    # literal addresses never reach the resolver
+    assert resolver == ['gns3.lab', 'no-such-host.invalid']
+
+
+def test_testbed_dict_loads_with_hostname_console(resolver):
+    manager = LabManager('http://localhost:3080', 'lab', client=object())
+    manager.nodes = {
+        'R1': LabNode('R1', 'c7200', node_id='n1', console_host=console_host('0.0.0.0', manager.url), console=5000),
+        'R2': LabNode('R2', 'c7200', node_id='n2', console_host='192.0.2.10', console=5001),
+    }
+    testbed = load(manager.testbed_dict(load(TESTBED)))
+
+    r1 = testbed.devices['R1'].connections.telnet
+    assert str(r1.ip) == '127.0.0.1' and r1.port == 5000
+    assert resolver == ['localhost']
+    assert str(testbed.devices['R2'].connections.telnet.ip) == '192.0.2.10'
+
+
+@pytest.fixture
+def mock_lab(monkeypatch):
+    async def prompt(host, port, timeout=600.0, poke_interval=5.0):
+        return 'R#'
+
+    monkeypatch.setattr(lab_manager, 'wait_for_prompt', prompt)
+    server = serve('127.0.0.1', 0)
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    client = Gns3Client(url)
+    template = next(iter(client.template_ids()))
+    manager = LabManager(url, 'lab', client=client, templates={'ios': template})
+    try:
+        yield manager
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+def statuses(manager):
+    return {node['name']: node['status'] for node in manager.client.nodes(manager.project['project_id'])}
+
+
+def test_start_nodes_leaves_other_project_nodes_alone(mock_lab):
+    mock_lab.open_project()
+    project_id = mock_lab.project['project_id']
+    mock_lab.client.create_node(project_id, next(iter(mock_lab.client.template_ids().values())), 'Other')
+    mock_lab.create_nodes(load(TESTBED))
+
+    nodes = asyncio.run(mock_lab.start_nodes())
+    assert all(node.ready for node in nodes.values())
+    assert statuses(mock_lab) == {'Other': 'stopped', 'R1': 'started', 'R2': 'started'}
+
+
+def test_start_nodes_subset(mock_lab):
+    mock_lab.create_nodes(load(TESTBED))
+    asyncio.run(mock_lab.start_nodes(['R2']))
+    assert statuses(mock_lab) == {'R1': 'stopped', 'R2': 'started'}
+
+    asyncio.run(mock_lab.start_nodes())
+    assert statuses(mock_lab) == {'R1': 'started', 'R2': 'started'}
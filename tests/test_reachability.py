@@ -0,0 +1,67 @@
+import asyncio
+import errno
+import os
+
+from conftest import BACKEND
+from lib.runners import reachability
+from lib.runners.reachability import ProbeResult, interface_targets, probe, probe_matrix
+from lib.testbed.loader import load
+
+
+class FakeProber:
+    """Stands in for probe(): answers from a table and tracks how many probes overlap"""
+
+    def __init__(self, down=()):
+        self.down = set(down)
+        self.calls = []
+        self.active = self.peak = 0
+
+    async def __call__(self, ip, timeout=1.0, ports=reachability.TCP_PORTS, icmp=True):
+        self.calls.append((ip, timeout, ports))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if ip in self.down:
+            return ProbeResult(ip, False, error='no answer')
+        return ProbeResult(ip, True, 'icmp', 1.0)
+
+
+def test_matrix_rows_belong_to_their_device(monkeypatch):
+    prober = FakeProber(down={'10.0.0.9'})
+    monkeypatch.setattr(reachability, 'probe', prober)
+    targets = {'R1': ['10.0.0.1', '10.0.0.9'], 'R2': ['10.0.0.2', '10.0.0.1'], 'R3': []}
+
+    matrix = asyncio.run(probe_matrix(targets, timeout=0.5, concurrency=2, ports=[22]))
+
+    # every device keeps its own row, in target order, even when an address is shared
+    assert {device: list(row) for device, row in matrix.items()} == targets
+    assert matrix['R1']['10.0.0.1'] is not matrix['R2']['10.0.0.1']
+    assert not matrix['R1']['10.0.0.9'].reachable and matrix['R2']['10.0.0.2'].reachable
+    assert len(prober.calls) == 4 and all(call[1:] == (0.5, (22,)) for call in prober.calls)
+    assert prober.peak == 2
+
+
+def test_interface_targets_skips_devices_and_keeps_interface_order():
+    targets = interface_targets(load(os.path.join(BACKEND, 'genie_testbed.yaml')))
+    assert 'UbuntuServer' not in targets
+    assert targets['CSR'] == ['192.168.200.3', '192.168.30.2', '192.168.40.1']
+
+
+def test_probe_falls_back_to_the_fastest_tcp_port(monkeypatch):
+    async def no_icmp(ip, timeout):
+        raise PermissionError(errno.EPERM, 'Operation not permitted')
+
+    async def tcp(ip, port, timeout):
+        return {22: 5.0, 23: None, 443: 2.5}[port]
+
+    monkeypatch.setattr(reachability, '_icmp_probe', no_icmp)
+    monkeypatch.setattr(reachability, '_tcp_probe', tcp)
+    assert asyncio.run(probe('10.0.0.1')) == ProbeResult('10.0.0.1', True, 'tcp/443', 2.5)
+
+    async def silent(ip, port, timeout):
+        return None
+
+    monkeypatch.setattr(reachability, '_tcp_probe', silent)
+    result = asyncio.run(probe('10.0.0.1'))
+    assert not result.reachable and result.error == 'icmp: Operation not permitted'
@@ -0,0 +1,70 @@
+from lib.hostnet.ip_batch import IpBatch
+from lib.hostnet.routes import MANAGED_PROTO, RouteReconciler
+
+CURRENT = [
+    {'dst': 'default', 'gateway': '192.168.0.1', 'protocol': 'dhcp'},
+    {'dst': '192.168.200.0/24', 'dev': 'ens4', 'protocol': 'kernel'},
+    # ours and right
+    {'dst': '10.0.1.0/24', 'gateway': '192.168.200.1', 'protocol': MANAGED_PROTO},
+    # ours, wrong gateway
+    {'dst': '10.0.2.0/24', 'gateway': '192.168.200.9', 'protocol': MANAGED_PROTO},
+    # ours, no longer wanted
+    {'dst': '10.0.3.0/24', 'gateway': '192.168.200.1', 'protocol': MANAGED_PROTO},
+    # someone else's, no longer wanted by us: left alone
+    {'dst': '10.0.4.0/24', 'gateway': '192.168.200.1', 'protocol': 'boot'},
+    # host route shown without a prefix length, added before routes were tagged
+    {'dst': '10.0.5.1', 'gateway': '192.168.200.1', 'protocol': 'boot'},
+]
+
+
+def test_plan_only_touches_differences():
+    plan = RouteReconciler().plan({
+        '10.0.1.0/24': '192.168.200.1',
+        '10.0.2.0/24': '192.168.200.2',
+        '10.0.6.0/24': '192.168.200.2',
+        '192.168.200.0/24': '192.168.200.1',
+    }, current=CURRENT, owned={'10.0.5.1/32': '192.168.200.1'})
+
+    assert plan.unchanged == 1
+    assert plan.add == {'10.0.6.0/24': '192.168.200.2'}
+    assert plan.replace == {'10.0.2.0/24': '192.168.200.2'}
+    assert plan.delete == [('10.0.3.0/24', '192.168.200.1'), ('10.0.5.1/32', '192.168.200.1')]
+    # the kernel's connected route is not ours to replace
+    assert plan.conflicts == {'192.168.200.0/24': '192.168.200.1'}
+    assert plan.summary() == '1 to add, 1 to replace, 2 to delete, 1 unchanged, 1 conflicting (192.168.200.0/24)'
+
+
+def test_duplicate_managed_routes_are_deleted():
+    current = [
+        {'dst': '10.0.1.0/24', 'gateway': '192.168.200.1', 'protocol': MANAGED_PROTO},
+        {'dst': '10.0.1.0/24', 'gateway': '192.168.200.2', 'protocol': MANAGED_PROTO},
+    ]
+    plan = RouteReconciler().plan({'10.0.1.0/24': '192.168.200.1'}, current=current)
+    assert plan.unchanged == 1
+    assert plan.delete == [('10.0.1.0/24', '192.168.200.2')]
+    assert not plan.add and not plan.replace
+
+
+def test_converged_table_gives_empty_plan():
+    plan = RouteReconciler().plan({'10.0.1.0/24': '192.168.200.1'}, current=CURRENT[2:3])
+    assert len(plan) == 0
+
+
+def test_queue_deletes_before_replacing():
+    reconciler = RouteReconciler()
+    plan = reconciler.plan({'10.0.2.0/24': '192.168.200.2', '10.0.6.0/24': '192.168.200.2'}, current=CURRENT)
+    batch = reconciler.queue(plan, IpBatch(sudo=False))
+    assert [command for command, _ in batch._entries] == [
+        'route del 10.0.1.0/24 via 192.168.200.1',
+        'route del 10.0.3.0/24 via 192.168.200.1',
+        f'route replace 10.0.2.0/24 via 192.168.200.2 proto {MANAGED_PROTO}',
+        f'route add 10.0.6.0/24 via 192.168.200.2 proto {MANAGED_PROTO}',
+    ]
+
+
+def test_foreign_route_is_never_replaced():
+    reconciler = RouteReconciler()
+    plan = reconciler.plan({'10.0.4.0/24': '192.168.200.2'}, current=CURRENT)
+    assert plan.conflicts == {'10.0.4.0/24': '192.168.200.2'}
+    batch = reconciler.queue(plan, IpBatch(sudo=False))
+    assert not any('10.0.4.0/24' in command for command, _ in batch._entries)
@@ -0,0 +1,163 @@
+import asyncio
+import importlib
+import io
+import re
+import threading
+
+import pytest
+
+TESTBED = b'devices:\n  R1:\n    os: iosxe\n    type: router\n'
+
+
+class GatedOrchestrator:
+    """Waits for `release`, then completes step 1 and finishes"""
+    release = None
+
+    def __init__(self, status_callback=None, **kwargs):
+        self.status_callback = status_callback
+        self.configured_passed = {'R1'}
+        self.configured_failed = set()
+        self.device_results = []
+        self.reachability = self.verification = self.convergence = self.ansible = None
+
+    async def full_orchestration(self):
+        while not self.release.is_set():
+            await asyncio.sleep(0.01)
+        self.status_callback(1, completed=True, message='done')
+        return {'step': True}
+
+
+def sse_events(body):
+    """(event, data.state) of every frame in an SSE body"""
+    return [(event, re.search(r'"state": "(\w+)"', data).group(1) if '"state"' in data else None)
+            for event, data in re.findall(r'event: (\w+)\ndata: (.*)\n\n', body)]
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # uploads/ and the history database are relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def flask_client(workdir):
+    pytest.importorskip('flask')
+    api_server = importlib.import_module('api_server')
+    app = api_server.create_app()
+    yield app.test_client()
+    app.job_manager.shutdown()
+
+
+def run_aiohttp(scenario):
+    pytest.importorskip('aiohttp')
+    from aiohttp.test_utils import TestClient, TestServer
+    async_api_server = importlib.import_module('async_api_server')
+
+    async def main():
+        client = TestClient(TestServer(async_api_server.create_app()))
+        await client.start_server()
+        try:
+            return await scenario(client)
+        finally:
+            await client.close()
+
+    return asyncio.run(main())
+
+
+def test_flask_status_etag_and_long_poll(flask_client):
+    response = flask_client.get('/api/status')
+    assert response.status_code == 200 and response.json['full'] is True
+    etag = response.headers['ETag']
+    assert flask_client.get('/api/status', headers={'If-None-Match': etag}).status_code == 304
+
+    # A timed-out long poll is an empty delta, or 304 for a client holding the current ETag
+    version = response.json['version']
+    response = flask_client.get(f'/api/status?since={version}&timeout=0.05')
+    assert response.status_code == 200 and response.json['full'] is False
+    assert response.json['changed_steps'] == [] and response.json['changed_devices'] == []
+    response = flask_client.get(f'/api/status?since={version}&timeout=0.05', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+
+def test_flask_upload_and_job_validation(flask_client, workdir):
+    response = flask_client.post('/api/upload', data={'file': (io.BytesIO(TESTBED), 'notes.txt')})
+    assert response.status_code == 400 and response.json['error'] == 'Only YAML files are allowed'
+
+    response = flask_client.post('/api/upload', data={'file': (io.BytesIO(TESTBED), 'lab.yaml')})
+    assert response.status_code == 200 and response.json['testbed_hash']
+    assert (workdir / 'uploads' / 'lab.yaml').read_bytes() == TESTBED
+
+    response = flask_client.post('/api/upload', data={'file': (io.BytesIO(b'devices: {}\n'), 'empty.yaml')})
+    assert response.status_code == 422 and response.json['validation_errors']
+
+
+def test_flask_job_stream_ends_with_the_job(flask_client):
+    manager = flask_client.application.job_manager
+    manager.orchestrator_factory = GatedOrchestrator
+    GatedOrchestrator.release = threading.Event()
+    job = manager.submit('lab.yaml')
+
+    response = flask_client.get(f'/api/jobs/{job.id}/events', buffered=False)
+    frames = response.iter_encoded()
+    snapshot = next(frames).decode()
+    GatedOrchestrator.release.set()
+    events = sse_events(snapshot + b''.join(frames).decode())
+    assert events[0][0] == 'snapshot'
+    assert ('step', None) in events
+    assert events[-1] == ('status', 'succeeded')
+
+    # a finished job's stream is just its snapshot
+    response = flask_client.get(f'/api/jobs/{job.id}/events')
+    assert sse_events(response.get_data(as_text=True)) == [('snapshot', 'succeeded')]
+
+
+def test_aiohttp_job_stream_ends_with_the_job(workdir):
+    async def scenario(client):
+        manager = client.server.app['job_manager']
+        manager.orchestrator_factory = GatedOrchestrator
+        GatedOrchestrator.release = threading.Event()
+        job = manager.submit('lab.yaml')
+
+        response = await client.get(f'/api/jobs/{job.id}/events')
+        snapshot = await asyncio.wait_for(response.content.readuntil(b'\n\n'), timeout=5)
+        GatedOrchestrator.release.set()
+        running = sse_events(snapshot.decode() + await asyncio.wait_for(response.text(), timeout=5))
+        response = await client.get(f'/api/jobs/{job.id}/events')
+        finished = sse_events(await asyncio.wait_for(response.text(), timeout=5))
+        return running, finished
+
+    running, finished = run_aiohttp(scenario)
+    assert running[0][0] == 'snapshot' and ('step', None) in running
+    assert running[-1] == ('status', 'succeeded')
+    assert finished == [('snapshot', 'succeeded')]
+
+
+def test_aiohttp_serves_the_same_documents(workdir):
+    async def scenario(client):
+        response = await client.get('/api/status')
+        assert response.status == 200
+        body = await response.json()
+        assert body['full'] is True
+        etag = response.headers['ETag']
+        assert (await client.get('/api/status', headers={'If-None-Match': etag})).status == 304
+        response = await client.get(f"/api/status?since={body['version']}&timeout=0.05")
+        assert response.status == 200 and (await response.json())['changed_devices'] == []
+        response = await client.get(f"/api/status?since={body['version']}&timeout=0.05", headers={'If-None-Match': etag})
+        assert response.status == 304
+
+        form = {'file': io.BytesIO(TESTBED)}
+        form['file'].name = 'lab.yaml'
+        response = await client.post('/api/upload', data=form)
+        assert response.status == 200 and (await response.json())['testbed_hash']
+
+        form = {'file': io.BytesIO(TESTBED)}
+        form['file'].name = 'notes.txt'
+        response = await client.post('/api/upload', data=form)
+        assert response.status == 400
+
+        response = await client.post('/api/jobs', json={'testbed_file': 'lab.yaml'})
+        if not importlib.import_module('server_common').ORCHESTRATOR_AVAILABLE:
+            assert response.status == 500 and (await response.json())['error'] == 'Orchestrator not available'
+
+    run_aiohttp(scenario)
@@ -0,0 +1,58 @@
+import pytest
+import requests
+
+from lib.gns3_api.client import Gns3Client
+from lib.gns3_api.mock_server import serve
+from lib.gns3_api.snapshots import LabSnapshots, stage_snapshot_name
+
+
+@pytest.fixture
+def lab():
+    server = serve('127.0.0.1', 0)
+    client = Gns3Client(f'http://127.0.0.1:{server.server_address[1]}')
+    try:
+        project_id = client.create_project('lab')['project_id']
+        template_id = next(iter(client.template_ids().values()))
+        client.start_node(project_id, client.create_node(project_id, template_id, 'R1')['node_id'])
+        yield LabSnapshots(client, project_id), template_id
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_take_replace_and_restore(lab):
+    snapshots, template_id = lab
+    name = stage_snapshot_name('ftd_initial')
+    first = snapshots.take(name)
+    assert list(snapshots.list()) == [name]
+
+    # taking it again replaces the old snapshot instead of failing on the name
+    second = snapshots.take(name)
+    assert second['snapshot_id'] != first['snapshot_id']
+    assert [s['snapshot_id'] for s in snapshots.list().values()] == [second['snapshot_id']]
+
+    with pytest.raises(requests.HTTPError):
+        snapshots.take(name, replace=False)
+
+    snapshots.client.create_node(snapshots.project_id, template_id, 'R2')
+    assert sorted(node['name'] for node in snapshots.nodes()) == ['R1', 'R2']
+
+    snapshots.restore(name)
+    # the node cache is dropped, restored nodes come back stopped
+    assert [(node['name'], node['status']) for node in snapshots.nodes()] == [('R1', 'stopped')]
+
+
+def test_take_with_stopped_nodes_restarts_them(lab):
+    snapshots, _ = lab
+    snapshots.take('consistent', stop_nodes=True)
+    assert [node['status'] for node in snapshots.nodes()] == ['started']
+    snapshots.restore('consistent')
+    assert [node['status'] for node in snapshots.nodes()] == ['stopped']
+
+
+def test_restore_and_delete_unknown_snapshot(lab):
+    snapshots, _ = lab
+    with pytest.raises(KeyError):
+        snapshots.restore('missing')
+    assert snapshots.delete('missing') is False
@@ -0,0 +1,35 @@
+import itertools
+import threading
+
+import pytest
+
+pytest.importorskip('paramiko')
+
+from lib.connectors.ssh_con import SshConnection
+
+
+class ActiveTransport:
+    def is_active(self):
+        return True
+
+
+class CountingConnection(SshConnection):
+    """Answers every command with its call number instead of opening channels"""
+
+    def __init__(self):
+        super().__init__('192.0.2.1', 22, 'admin', 'secret')
+        self.transport = ActiveTransport()
+        self._calls = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def execute(self, command, timeout=30.0, deadline=None):
+        with self._lock:
+            return 0, f'{command} #{next(self._calls)}'
+
+
+def test_execute_many_keeps_repeated_commands():
+    conn = CountingConnection()
+    conn.max_channels = 1
+    pairs = conn.execute_many(['show clock', 'show ip route', 'show clock'])
+    assert pairs == [('show clock', 'show clock #1'), ('show ip route', 'show ip route #2'),
+                     ('show clock', 'show clock #3')]
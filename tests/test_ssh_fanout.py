@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('paramiko')
+
+from lib.runners.ssh_fanout import run_targets
+
+
+class FakeChannel:
+    def __init__(self, transport):
+        self.transport = transport
+        self.timeout = None
+        self.closed = threading.Event()
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def set_combine_stderr(self, combine):
+        pass
+
+    def exec_command(self, command):
+        pass
+
+    def recv(self, size):
+        return self.transport.recv(self)
+
+    def recv_exit_status(self):
+        return 0
+
+    def close(self):
+        self.closed.set()
+
+
+class TricklingTransport:
+    """Sends a byte every 50ms and never finishes; honours the channel timeout"""
+
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def is_active(self):
+        return not self.closed.is_set()
+
+    def open_session(self, timeout=None):
+        return FakeChannel(self)
+
+    def recv(self, channel):
+        if channel.closed.wait(min(0.05, channel.timeout)):
+            return b''
+        return b'.'
+
+
+class HungTransport(TricklingTransport):
+    """Blocks in recv regardless of the channel timeout until the channel is closed"""
+
+    def recv(self, channel):
+        channel.closed.wait()
+        return b''
+
+
+class FakePool:
+    def __init__(self, transport_cls):
+        self.transport_cls = transport_cls
+        self.transports = {}
+
+    def get_transport(self, host, port, username, password, timeout=10.0):
+        return self.transports.setdefault(host, self.transport_cls())
+
+    def close(self, host, port, username):
+        transport = self.transports.pop(host, None)
+        if transport is not None:
+            transport.closed.set()
+
+
+def targets(count):
+    return [{'name': f'R{i}', 'host': f'192.0.2.{i}', 'port': 22, 'username': 'admin', 'password': 'x'}
+            for i in range(1, count + 1)]
+
+
+@pytest.mark.parametrize('transport_cls', [TricklingTransport, HungTransport])
+def test_device_deadline_covers_all_commands(transport_cls):
+    # 10 commands over 4 channels: three waves of per-command timeouts without a shared deadline
+    commands = [f'show run {i}' for i in range(10)]
+    started = time.monotonic()
+    pool = FakePool(transport_cls)
+    report = run_targets(targets(2), commands, max_workers=2, timeout=0.3, output=None, pool=pool)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.6
+    assert [result['status'] for result in report['results']] == ['timeout', 'timeout']
+    assert report['summary']['failed'] == 2
+    # only the task's own channels were closed, the shared transports stay up
+    assert len(pool.transports) == 2 and all(t.is_active() for t in pool.transports.values())
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import time
+
+from status_events import AsyncStatusEventLog, StatusEventLog, format_sse
+
+
+def test_publish_wakes_waiting_reader():
+    log = StatusEventLog()
+    timer = threading.Timer(0.05, log.publish, ('step', {'step': {'id': 1}}))
+    timer.start()
+    started = time.monotonic()
+    events = log.wait(0, timeout=5)
+    timer.join()
+
+    assert time.monotonic() - started < 1
+    assert [(event['id'], event['event']) for event in events] == [(1, 'step')]
+
+
+def test_wait_times_out_without_events():
+    log = StatusEventLog()
+    log.publish('status', {})
+    assert log.wait(1, timeout=0.01) == []
+
+
+def test_since_replays_missed_events_while_buffered():
+    log = StatusEventLog(max_events=3)
+    for step_id in range(1, 5):
+        log.publish('step', {'step': {'id': step_id}})
+
+    # event 1 fell out of the buffer: a client that saw it can resume, one that did not cannot
+    assert log.can_resume(1) and not log.can_resume(0)
+    assert [event['id'] for event in log.since(2)] == [3, 4]
+    assert log.since(4) == []
+    assert not log.can_resume(5)
+
+
+def test_async_publish_wakes_next_events():
+    async def scenario():
+        log = AsyncStatusEventLog()
+        reader = asyncio.ensure_future(log.next_events(0, timeout=5))
+        await asyncio.sleep(0)
+        log.publish('status', {'state': 'running'})
+        events = await asyncio.wait_for(reader, timeout=1)
+        idle = await log.next_events(events[-1]['id'], timeout=0.01)
+        return events, idle, log._waiters
+
+    events, idle, waiters = asyncio.run(scenario())
+    assert [event['data'] for event in events] == [{'state': 'running'}]
+    assert idle == [] and not waiters
+
+
+def test_format_sse_frames_one_event():
+    assert format_sse(7, 'step', {'step': {'id': 3}}) == 'id: 7\nevent: step\ndata: {"step": {"id": 3}}\n\n'
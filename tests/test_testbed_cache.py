@@ -0,0 +1,27 @@
+import testbed_cache
+from lib.testbed import loader
+
+PARENT = '''devices:
+  R1:
+    os: iosxe
+    type: router
+    custom: {{version: {version}}}
+'''
+
+
+def test_key_follows_parents_the_yaml_parser_sees(tmp_path):
+    (tmp_path / 'base.yaml').write_text('testbed: {name: lab}\n')
+    (tmp_path / 'parent.yaml').write_text(PARENT.format(version=1))
+    # a quoted key and a multi-line flow list are both valid `extends`
+    child = tmp_path / 'child.yaml'
+    child.write_text('"extends": [\n  base.yaml,\n  parent.yaml\n]\n')
+
+    cache = testbed_cache.TestbedCache(str(tmp_path / 'cache'))
+    key, errors = cache.store(str(child))
+    assert errors == []
+    assert key == loader.testbed_hash(str(child)) == cache.testbed_hash(str(child))
+    assert cache.load_model(str(child))['devices']['R1']['custom'] == {'version': 1}
+
+    (tmp_path / 'parent.yaml').write_text(PARENT.format(version=2))
+    assert loader.testbed_hash(str(child)) != key
+    assert cache.load_model(str(child))['devices']['R1']['custom'] == {'version': 2}
@@ -0,0 +1,39 @@
+import os
+
+from conftest import BACKEND
+from lib.connectors.ssh_con import SshConnection
+from lib.testbed.loader import load
+
+
+def test_backend_testbeds_resolve_their_ssh_class():
+    for name, device in (('copie_testbed1.yaml', 'CSR'), ('csr_testbed.yaml', 'CSR'), ('genie_testbed.yaml', None)):
+        tb = load(os.path.join(BACKEND, name))
+        devices = [tb.devices[device]] if device else [d for d in tb.devices.values() if 'ssh' in d.connections]
+        assert devices
+        for dev in devices:
+            assert dev.connections.ssh.get('class') is SshConnection
+
+
+def test_index_endpoints_and_lookups():
+    tb = load(os.path.join(BACKEND, 'genie_testbed.yaml'))
+    index = tb.index
+
+    management = index.endpoints('management')
+    assert [(intf.device.name, intf.name) for intf in management] == [
+        ('UbuntuServer', 'ens4'), ('IOU1', 'Ethernet0/0'), ('Router', 'GigabitEthernet0/0'),
+        ('CSR', 'GigabitEthernet1'), ('FTD', 'Management1/1'),
+    ]
+    assert [intf.device.name for intf in index.endpoints('csr_ftd')] == ['CSR', 'FTD']
+    assert index.endpoints('no-such-link') == []
+
+    # devices by role (their testbed type)
+    assert index.first('linux') is tb.devices['UbuntuServer']
+    assert [device.name for device in index.devices('iosxe')] == ['IOU1', 'Router', 'CSR']
+    assert index.first('asa') is None and index.devices('asa') == []
+
+    # interfaces by alias
+    initial = index.interface('CSR', 'initial')
+    assert initial is tb.devices['CSR'].interfaces['GigabitEthernet1']
+    assert str(initial.ipv4.ip) == '192.168.200.3'
+    assert index.interface('UbuntuServer', 'initial') is None
+    assert index.interface('CSR', 'uplink') is None
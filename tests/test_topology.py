@@ -0,0 +1,73 @@
+from lib.testbed.loader import load
+from lib.testbed.topology import TopologyGraph
+
+LINKS = {
+    'mgmt': {'Server': '192.168.200.254/24', 'R1': '192.168.200.1/24', 'R2': '192.168.200.2/24'},
+    'r1-r3': {'R1': '10.0.13.1/24', 'R3': '10.0.13.3/24'},
+    'r2-r3': {'R2': '10.0.23.2/24', 'R3': '10.0.23.3/24'},
+    'r3-lan': {'R3': '10.3.3.1/24', 'PC': '10.3.3.10/24'},
+    'pc-lab': {'PC': '10.9.9.10/24', 'R9': '10.9.9.1/24'},
+}
+TYPES = {'Server': 'linux', 'R1': 'router', 'R2': 'router', 'R3': 'router', 'PC': 'host', 'R9': 'router'}
+
+
+def build(links=LINKS):
+    graph = TopologyGraph('Server')
+    for name, device_type in TYPES.items():
+        graph.add_device(name, device_type)
+    for link, members in links.items():
+        graph.add_link(link, members)
+    return graph
+
+
+def test_routes_from_root():
+    graph = build()
+    assert graph.routes() == {
+        '10.0.13.0/24': '192.168.200.1',
+        '10.0.23.0/24': '192.168.200.2',
+        # equal hop counts: the lower gateway wins
+        '10.3.3.0/24': '192.168.200.1',
+        '10.9.9.0/24': '192.168.200.1',
+    }
+    assert graph.distance('R3') == 2 and graph.next_hop('R3') == '192.168.200.1'
+    # hosts do not forward, so nothing is reached through PC
+    assert graph.distance('R9') is None and graph.next_hop('R9') is None
+    assert graph.next_hop('Server') is None
+
+
+def test_remove_link_reroutes_and_add_link_restores():
+    graph = build()
+    graph.remove_link('r1-r3')
+    assert graph.routes() == {
+        '10.0.23.0/24': '192.168.200.2',
+        '10.3.3.0/24': '192.168.200.2',
+        '10.9.9.0/24': '192.168.200.2',
+    }
+    assert graph.routes() == build({k: v for k, v in LINKS.items() if k != 'r1-r3'}).routes()
+
+    graph.add_link('r1-r3', LINKS['r1-r3'])
+    assert graph.routes() == build().routes()
+
+
+def test_removing_the_only_path_drops_routes():
+    graph = build()
+    graph.remove_link('r1-r3')
+    graph.remove_link('r2-r3')
+    assert graph.distance('R3') is None
+    assert graph.routes() == {}
+
+
+def test_readdressed_link_replaces_its_subnet():
+    graph = build()
+    graph.add_link('r2-r3', {'R2': '10.0.32.2/24', 'R3': '10.0.32.3/24'})
+    assert '10.0.23.0/24' not in graph.routes()
+    assert graph.routes()['10.0.32.0/24'] == '192.168.200.2'
+
+
+def test_from_testbed_matches_incremental_build():
+    topology = {}
+    for link, members in LINKS.items():
+        for device, ipv4 in members.items():
+            topology.setdefault(device, {'interfaces': {}})['interfaces'][f'{link}-if'] = {'ipv4': ipv4, 'link': link}
+    tb = load({'devices': {name: {'type': t} for name, t in TYPES.items()}, 'topology': topology})
+    assert TopologyGraph.from_testbed(tb, root='Server').routes() == build().routes()
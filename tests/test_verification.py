@@ -0,0 +1,92 @@
+from lib.runners.verification import compare_with_intent, parse_ip_interface_brief, parse_ip_route
+from lib.testbed.loader import load
+
+INTERFACE_BRIEF = '''
+Interface              IP-Address      OK? Method Status                Protocol
+Ethernet0/0            192.168.200.1   YES NVRAM  up                    up
+Ethernet0/1            10.0.13.1       YES manual up                    up
+Ethernet0/2            unassigned      YES unset  administratively down down
+Loopback0              1.1.1.1         YES manual up                    up
+'''
+
+IP_ROUTE = '''
+Codes: L - local, C - connected, S - static, R - RIP, M - mobile, B - BGP
+       D - EIGRP, EX - EIGRP external, O - OSPF, IA - OSPF inter area
+
+Gateway of last resort is 192.168.200.254 to network 0.0.0.0
+
+S*    0.0.0.0/0 [1/0] via 192.168.200.254
+      1.0.0.0/32 is subnetted, 1 subnets
+C        1.1.1.1 is directly connected, Loopback0
+      10.0.0.0/8 is variably subnetted, 4 subnets, 2 masks
+C        10.0.13.0/24 is directly connected, Ethernet0/1
+L        10.0.13.1/32 is directly connected, Ethernet0/1
+O        10.0.23.0/24 [110/20] via 10.0.13.3, 00:01:02, Ethernet0/1
+      172.16.0.0/24 is subnetted, 1 subnets
+R        172.16.3.0 [120/1] via 10.0.13.3, 00:00:12, Ethernet0/1
+                    [120/1] via 192.168.200.2, 00:00:12, Ethernet0/0
+C     192.168.200.0/24 is directly connected, Ethernet0/0
+'''
+
+
+def test_parse_ip_interface_brief():
+    interfaces = parse_ip_interface_brief(INTERFACE_BRIEF)
+    assert list(interfaces) == ['Ethernet0/0', 'Ethernet0/1', 'Ethernet0/2', 'Loopback0']
+    assert interfaces['Ethernet0/1'] == {'ip': '10.0.13.1', 'method': 'manual', 'status': 'up', 'protocol': 'up'}
+    assert interfaces['Ethernet0/2'] == {
+        'ip': None, 'method': 'unset', 'status': 'administratively down', 'protocol': 'down',
+    }
+
+
+def test_parse_ip_route():
+    routes = parse_ip_route(IP_ROUTE)
+    assert routes['0.0.0.0/0'] == {'code': 'S*', 'via': ['192.168.200.254'], 'interface': None}
+    # prefix length taken from the "is subnetted" header
+    assert routes['1.1.1.1/32'] == {'code': 'C', 'via': [], 'interface': 'Loopback0'}
+    assert routes['10.0.13.1/32']['code'] == 'L'
+    assert routes['10.0.23.0/24'] == {'code': 'O', 'via': ['10.0.13.3'], 'interface': 'Ethernet0/1'}
+    assert routes['192.168.200.0/24']['interface'] == 'Ethernet0/0'
+    # equal cost paths continue on the next line
+    assert routes['172.16.3.0/24'] == {'code': 'R', 'via': ['10.0.13.3', '192.168.200.2'], 'interface': 'Ethernet0/1'}
+    assert len(routes) == 7
+
+
+def test_compare_with_intent():
+    tb = load({
+        'devices': {'R1': {'type': 'router'}},
+        'topology': {'R1': {'interfaces': {
+            'Ethernet0/0': {'ipv4': '192.168.200.1/24', 'link': 'mgmt'},
+            'Ethernet0/1': {'ipv4': '10.0.13.1/24', 'link': 'r1-r3'},
+            'Ethernet0/2': {'ipv4': '10.0.12.1/24', 'link': 'r1-r2'},
+            'Ethernet0/3': {'ipv4': '10.0.14.1/24', 'link': 'r1-r4'},
+        }}},
+    })
+    differences = compare_with_intent(
+        tb.devices['R1'], parse_ip_interface_brief(INTERFACE_BRIEF), parse_ip_route(IP_ROUTE),
+        expected_routes=['10.0.23.0/24', '172.16.3.0/24', '172.16.0.0/16'],
+    )
+    assert differences == [
+        'Ethernet0/2: expected 10.0.12.1, found unassigned',
+        'Ethernet0/2: administratively down/down',
+        '10.0.12.0/24: no connected route',
+        'Ethernet0/3: not present on the device',
+        '172.16.0.0/16: missing from the routing table',
+    ]
+
+
+def test_subnetted_header_mask_stays_inside_its_major_network():
+    routes = parse_ip_route('''
+      10.0.0.0/8 is variably subnetted, 2 subnets, 2 masks
+C        10.1.1.0/30 is directly connected, Ethernet0/0
+L        10.1.1.1/32 is directly connected, Ethernet0/0
+S     172.16.0.0 [1/0] via 10.1.1.2
+      192.168.1.0/26 is subnetted, 2 subnets
+O        192.168.1.0 [110/20] via 10.1.1.2, 00:00:05, Ethernet0/0
+O        192.168.1.64 [110/20] via 10.1.1.2, 00:00:05, Ethernet0/0
+R     192.168.2.0 [120/1] via 10.1.1.2, 00:00:09, Ethernet0/0
+S     203.0.113.0/25 [1/0] via 10.1.1.2
+''')
+    assert list(routes) == [
+        '10.1.1.0/30', '10.1.1.1/32', '172.16.0.0/16', '192.168.1.0/26', '192.168.1.64/26',
+        '192.168.2.0/24', '203.0.113.0/25',
+    ]